@@ -0,0 +1,368 @@
+"""Regression benchmarks of the branch and bound algorithm.
+
+Each case is a graph (from data/dimacs, data/konect or a seeded random
+    model), restricted to its largest connected component, with terminals
+    chosen by a seeded sample of its vertices of highest degree. Each phase
+    of the solve is timed separately over several repeats:
+
+        load: reading the graph and choosing the terminals
+        root: the initial isolating cuts
+        branching: isolation_branching, including its own root
+        lp: the LP relaxation
+
+    The peak memory of each phase is measured in one more run under
+    tracemalloc, so that tracing does not slow the timed repeats.
+
+Usage:
+    python experiments/benchmark.py run --label before
+    python experiments/benchmark.py run --label after
+    python experiments/benchmark.py compare --baseline before --current after
+
+Each run is appended to the JSON history file. The compare command exits
+    with status 1 if any case regressed by more than the tolerances.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import networkx as nx
+
+from ktcut.compact_graph import CompactGraph
+from ktcut.isolation_branching import isolation_branching
+from ktcut.isolation_branching_root import IsolationBranchingRoot
+from ktcut.lp_algorithm import lp_algorithm
+from ktcut.read_data import read_dimacs_graph
+from ktcut.read_data import read_konect_graph
+
+PHASES = ["load", "root", "branching", "lp"]
+
+# (name, source, path or model, vertex count, terminal count)
+CASES = [
+    ("football", "dimacs", "data/dimacs/football.graph", None, 5),
+    ("jazz", "dimacs", "data/dimacs/jazz.graph", None, 5),
+    ("polbooks", "dimacs", "data/dimacs/polbooks.graph", None, 5),
+    ("adjnoun", "dimacs", "data/dimacs/adjnoun.graph", None, 5),
+    ("celegans_metabolic", "dimacs", "data/dimacs/celegans_metabolic.graph", None, 5),
+    ("netscience", "dimacs", "data/dimacs/netscience.graph", None, 5),
+    ("maayan-pdzbase", "konect", "data/konect/out.maayan-pdzbase", None, 5),
+    ("euroroad", "konect", "data/konect/out.subelj_euroroad_euroroad", None, 5),
+    ("moreno_propro", "konect", "data/konect/out.moreno_propro_propro", None, 5),
+    ("ego-facebook", "konect", "data/konect/out.ego-facebook", None, 5),
+    ("powerlaw_cluster-1000", "synthetic", "powerlaw_cluster", 1000, 5),
+    ("barabasi_albert-1000", "synthetic", "barabasi_albert", 1000, 5),
+    ("watts_strogatz-1000", "synthetic", "connected_watts_strogatz", 1000, 5),
+]
+
+# the terminals are sampled from this many times as many vertices of highest degree
+TERMINAL_POOL = 4
+
+DEFAULT_HISTORY = "experiments/benchmark_history.json"
+
+# a phase has regressed if it takes this fraction longer (and at least
+# MINIMUM_SECONDS longer), or uses this fraction more memory
+TIME_TOLERANCE = 0.25
+MINIMUM_SECONDS = 0.05
+MEMORY_TOLERANCE = 0.25
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--label", default=None)
+    run_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--time-limit", type=float, default=600)
+    run_parser.add_argument("--cases", nargs="*", default=None,
+                            help="the names of the cases to run (all by default)")
+    run_parser.add_argument("--no-memory", action="store_true",
+                            help="skip the peak memory run")
+
+    compare_parser = commands.add_parser("compare", help="compare two runs")
+    compare_parser.add_argument("--history", default=DEFAULT_HISTORY)
+    compare_parser.add_argument("--baseline", default="-2",
+                                help="the label or index of the baseline run")
+    compare_parser.add_argument("--current", default="-1",
+                                help="the label or index of the current run")
+    compare_parser.add_argument("--time-tolerance", type=float,
+                                default=TIME_TOLERANCE)
+    compare_parser.add_argument("--memory-tolerance", type=float,
+                                default=MEMORY_TOLERANCE)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        cases = [case for case in CASES if args.cases is None or case[0] in args.cases]
+        run = run_benchmarks(cases, args.repeat, args.seed, args.time_limit,
+                             memory=not args.no_memory, label=args.label)
+        append_history(args.history, run)
+        return 0
+
+    history = read_history(args.history)
+    regressions = compare_runs(
+        find_run(history, args.baseline),
+        find_run(history, args.current),
+        time_tolerance=args.time_tolerance,
+        memory_tolerance=args.memory_tolerance,
+    )
+    for regression in regressions:
+        print(regression)
+    print("%d regressions" % len(regressions))
+    return 1 if regressions else 0
+
+
+def run_benchmarks(cases, repeat, seed, time_limit, memory=True, label=None):
+    """Runs each case repeat times (plus once for memory, if memory).
+
+    Returns:
+        run: the settings of the run and the results of each case
+    """
+    results = []
+    for case in cases:
+        print("%s:" % case[0], end=" ", flush=True)
+        measurements = [
+            _measure_case(case, seed, time_limit, traced=False) for _ in range(repeat)
+        ]
+        result = {
+            "case": case[0],
+            "vertices": measurements[0]["vertices"],
+            "edges": measurements[0]["edges"],
+            "terminals": measurements[0]["terminals"],
+            "cut_value": measurements[0]["cut_value"],
+            "lp_value": measurements[0]["lp_value"],
+            "nodes": measurements[0]["nodes"],
+            "times": {
+                phase: [m["times"][phase] for m in measurements] for phase in PHASES
+            },
+            "median_times": {
+                phase: float(np.median([m["times"][phase] for m in measurements]))
+                for phase in PHASES
+            },
+        }
+        if memory:
+            traced = _measure_case(case, seed, time_limit, traced=True)
+            result["peak_bytes"] = traced["peak_bytes"]
+        print(
+            " ".join(
+                "%s %.3fs" % (phase, result["median_times"][phase]) for phase in PHASES
+            ),
+            "nodes %d" % result["nodes"],
+        )
+        results.append(result)
+
+    return {
+        "label": label,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "seed": seed,
+        "time_limit": time_limit,
+        "results": results,
+    }
+
+
+def _measure_case(case, seed, time_limit, traced):
+    """Runs each phase of one case once.
+
+    Returns:
+        measurement: the size of the case, the values found, and the
+            time (or the peak traced memory, if traced) of each phase
+    """
+    name, source, path, vertex_count, terminal_count = case
+    times, peak_bytes = {}, {}
+
+    def phase(phase_name):
+        if traced:
+            return _traced(phase_name, peak_bytes)
+        return _timed(phase_name, times)
+
+    with phase("load"):
+        graph = load_graph(source, path, vertex_count, seed)
+        terminals = choose_terminals(graph, terminal_count, seed)
+
+    with phase("root"):
+        compact_graph = CompactGraph.from_networkx(graph)
+        root = IsolationBranchingRoot(
+            compact_graph, compact_graph.vertex_ids(terminals)
+        )
+        root.initial_isolating_cuts()
+
+    with phase("branching"):
+        _, cut_value, report = isolation_branching(
+            graph.copy(), terminals, reporting=False, time_limit=time_limit
+        )
+
+    with phase("lp"):
+        lp_value = lp_algorithm(graph, terminals)
+
+    return {
+        "vertices": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "terminals": [_json_name(t) for t in terminals],
+        "cut_value": cut_value,
+        "lp_value": round(float(lp_value), 8),
+        "nodes": report["Nodes Total"],
+        "times": times,
+        "peak_bytes": peak_bytes,
+    }
+
+
+@contextlib.contextmanager
+def _timed(phase_name, times):
+    start = time.perf_counter()
+    yield
+    times[phase_name] = time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def _traced(phase_name, peak_bytes):
+    tracemalloc.start()
+    try:
+        yield
+        _, peak_bytes[phase_name] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+
+def load_graph(source, path, vertex_count, seed):
+    """The largest connected component of the graph of a case."""
+    if source == "dimacs":
+        graph = read_dimacs_graph(path)
+    elif source == "konect":
+        graph = read_konect_graph(path)
+    elif source == "synthetic":
+        graph = create_random_graph(path, vertex_count, seed)
+    else:
+        raise ValueError("unknown graph source: %s" % source)
+    largest_component = max(nx.connected_components(graph), key=len)
+    return graph.subgraph(largest_component).copy()
+
+
+def create_random_graph(model_name, node_count, seed):
+    """Creates a random graph with random integer capacities, all from seed.
+
+    Raises:
+        ValueError: if model_name is not a valid model name
+    """
+    if model_name == "gnp":
+        graph = nx.gnp_random_graph(node_count, 0.01, seed=seed)
+    elif model_name == "powerlaw_cluster":
+        graph = nx.powerlaw_cluster_graph(node_count, 3, 0.1, seed=seed)
+    elif model_name == "barabasi_albert":
+        graph = nx.barabasi_albert_graph(node_count, 3, seed=seed)
+    elif model_name == "connected_watts_strogatz":
+        graph = nx.connected_watts_strogatz_graph(node_count, 6, 0.1, seed=seed)
+    else:
+        raise ValueError("unknown random graph model: %s" % model_name)
+
+    rng = random.Random(seed)
+    for u, v in sorted(graph.edges()):
+        graph[u][v]["capacity"] = rng.randint(1, 11)
+    return graph
+
+
+def choose_terminals(graph, terminal_count, seed):
+    """Samples the terminals from the vertices of highest degree, by seed."""
+    by_degree = sorted(graph.nodes, key=lambda n: (-graph.degree(n), str(n)))
+    pool = by_degree[: TERMINAL_POOL * terminal_count]
+    return random.Random(seed).sample(pool, terminal_count)
+
+
+def compare_runs(baseline, current, time_tolerance=TIME_TOLERANCE,
+                 memory_tolerance=MEMORY_TOLERANCE):
+    """Finds the regressions of the current run from the baseline run.
+
+    A case regresses if the median time of a phase grows by more than
+        time_tolerance (and by more than MINIMUM_SECONDS), if it explores
+        more nodes, if the peak memory of a phase grows by more than
+        memory_tolerance, or if its cut value changes.
+
+    Returns:
+        regressions: a description of each regression
+    """
+    baseline_results = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        name = result["case"]
+        if name not in baseline_results:
+            continue
+        base = baseline_results[name]
+        if abs(result["cut_value"] - base["cut_value"]) > 1e-6:
+            regressions.append(
+                "%s: cut value %s != %s"
+                % (name, result["cut_value"], base["cut_value"])
+            )
+        if result["nodes"] > base["nodes"]:
+            regressions.append(
+                "%s: nodes %d > %d" % (name, result["nodes"], base["nodes"])
+            )
+        for phase in PHASES:
+            before, after = base["median_times"][phase], result["median_times"][phase]
+            slower = after > before * (1 + time_tolerance)
+            if slower and after - before > MINIMUM_SECONDS:
+                regressions.append(
+                    "%s: %s time %.3fs > %.3fs" % (name, phase, after, before)
+                )
+            if "peak_bytes" in base and "peak_bytes" in result:
+                before, after = base["peak_bytes"][phase], result["peak_bytes"][phase]
+                if after > before * (1 + memory_tolerance):
+                    regressions.append(
+                        "%s: %s peak memory %d > %d bytes"
+                        % (name, phase, after, before)
+                    )
+    return regressions
+
+
+def read_history(history_path):
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return json.load(f)
+
+
+def append_history(history_path, run):
+    history = read_history(history_path)
+    history.append(run)
+    with open(history_path, "w") as f:
+        json.dump(history, f, indent=1)
+
+
+def find_run(history, key):
+    """The run with the given label, or else at the given index."""
+    for run in reversed(history):
+        if run["label"] == key:
+            return run
+    try:
+        return history[int(key)]
+    except (ValueError, IndexError):
+        raise KeyError("no run with label or index %s" % key)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _json_name(name):
+    return name.item() if isinstance(name, np.generic) else name
+
+
+if __name__ == "__main__":
+    sys.exit(main())
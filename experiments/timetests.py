@@ -16,8 +16,6 @@ from ktcut.isolation_branching import isolation_branching
 from ktcut.read_data import read_dimacs_graph
 from ktcut.read_data import read_konect_graph
 
-from pulp import GUROBI
-
 DIMACS_DATASETS = [
     "data/dimacs/adjnoun.graph",
     "data/dimacs/polbooks.graph",
@@ -48,7 +46,7 @@ KONECT_DATASETS = [
     # 'data/konect/out.ca-AstroPh',  # 1944 kb
     "data/konect/out.loc-brightkite_edges",  # 2225 kb
     "data/konect/out.douban",  # 3945 kb
-    "data/konect/out.wordnet-words"  # 7773 kb
+    "data/konect/out.wordnet-words",  # 7773 kb
     "data/konect/out.log-gowalla_edges",  # 10810 kb
     "data/konect/out.com-amazon",  # 11783 kb
     "data/konect/out.com-dblp",  # 13096 kb
@@ -106,7 +104,7 @@ def time_test_synthetic_repeated(
     test_bb_weak=False,
     test_bb_strong=False,
     test_ip_cbc=False,
-    test_ip_gurobi=True,
+    test_ip_gurobi=False,
 ):
     """Runs several time tests and reports average and median for each of the algorithms."""
 
@@ -245,6 +243,9 @@ def time_test_simple(
 
     ip_gurobi_rpt = None
     if test_ip_gurobi:
+        # NB: Gurobi is optional, so it is only imported when it is tested
+        from pulp import GUROBI
+
         _, _ = ip_algorithm(
             graph.copy(), terminals, solver=GUROBI(msg=False)
         )
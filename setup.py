@@ -16,8 +16,7 @@ setup(name='ktcut',
       version='0.1dev',
       classifiers=[
           'Development Status :: 3 - Alpha',
-          'Programming Language :: Python :: 3.6',
-          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
       ],
       description='k-Terminal Cut Solver',
       keywords='',
@@ -28,7 +27,8 @@ setup(name='ktcut',
       long_description=readme(),
       packages=find_packages('src'),
       package_dir={'': 'src'},
-      install_requires=['numpy', 'networkx'],
+      python_requires='>=3.8',
+      install_requires=['numpy', 'networkx', 'scipy>=1.8', 'pulp'],
       setup_requires=['pytest-runner', ],
       tests_require=['pytest', ],
       zip_safe=False
@@ -0,0 +1,120 @@
+"""Approximates the k-Terminal Cut Problem with a Guaranteed Gap."""
+import random
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+from ktcut.ip_formulation import IPFormulation
+from ktcut.isolation_branching_root import IsolationBranchingRoot
+
+APPROXIMATION_METHODS = ["isolating_cuts", "lp_rounding"]
+
+
+def approximation_algorithm(
+    graph,
+    terminals,
+    method="isolating_cuts",
+    backend="auto",
+    trials=16,
+    seed=0,
+    solver=None,
+):
+    """Finds a k-terminal cut within a known factor of the minimum.
+
+    isolating_cuts: the minimum isolating cut of every terminal but the
+        heaviest is kept, and the remaining vertices join the heaviest
+        terminal. The cut is at most (2 - 2/k) times the minimum. Every
+        optimal source set is an isolating cut, so half the total weight
+        of the minimum isolating cuts is a lower bound.
+    lp_rounding: the LP relaxation is solved, then rounded by the
+        Calinescu-Karloff-Rabani rule: for a random threshold and a random
+        order of the terminals, each terminal in turn takes the unassigned
+        vertices whose value for it is at least the threshold. The expected
+        cut is at most (3/2 - 1/k) times the LP value, which is a lower bound.
+        The best of several trials is kept.
+
+    Assumes that the graph has 'capacity' along each edge. Otherwise,
+        assumes the capacity should be 1.0.
+
+    Args:
+        graph: the networkx graph in which to find the multi-terminal cut
+        terminals: the terminals of the networkx graph
+        method: the approximation [isolating_cuts, lp_rounding]
+        backend: the maximum-flow backend for isolating cuts
+        trials: the number of roundings of the LP solution
+        seed: the seed of the random roundings
+        solver: which solver to use to solve the LP
+
+    Returns:
+        source_sets: the partition of the nodes of the graph
+        cut_value: the weight of the multi-terminal cut
+        lower_bound: a lower bound on the weight of the minimum cut
+
+    Raises:
+        ValueError: if method is not a valid approximation method
+    """
+    if method not in APPROXIMATION_METHODS:
+        raise ValueError("unknown approximation method: %s" % method)
+    for u, v in graph.edges:
+        if "capacity" not in graph[u][v]:
+            graph[u][v]["capacity"] = 1.0
+
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+    if method == "isolating_cuts":
+        sides, lower_bound = _isolating_cuts_partition(
+            compact_graph, vertex_terminals, backend
+        )
+    else:
+        sides, lower_bound = _lp_rounding_partition(
+            graph, terminals, compact_graph, trials, seed, solver
+        )
+
+    source_sets = {
+        name: set(compact_graph.vertex_names(np.flatnonzero(sides == terminal)))
+        for name, terminal in zip(terminals, vertex_terminals)
+    }
+    cut_value = round(_cut_weight(compact_graph, sides), 8)
+    return source_sets, cut_value, round(lower_bound, 8)
+
+
+def _isolating_cuts_partition(graph, terminals, backend):
+    """The partition of the isolating cut heuristic, and its lower bound."""
+    root = IsolationBranchingRoot(graph, terminals, backend)
+    root.initial_isolating_cuts()
+    root_graph = root.get_graph()
+    # NB: each terminal's edges in the contracted graph form its isolating cut
+    weights = root_graph.weighted_degrees()[terminals]
+    heaviest = terminals[int(np.argmax(weights))]
+    sides = root_graph.labels.copy()
+    sides[~np.isin(sides, terminals)] = heaviest
+    return sides, float(weights.sum()) / 2.0
+
+
+def _lp_rounding_partition(graph, terminals, compact_graph, trials, seed, solver):
+    """The best of several roundings of the LP solution, and the LP value."""
+    ip_formulation = IPFormulation(graph, terminals, solver)
+    ip_formulation.solve_lp()
+    # NB: both follow the order of graph.nodes()
+    values = ip_formulation.get_node_value_array()
+    vertex_terminals = np.array(compact_graph.vertex_ids(terminals))
+
+    rng = random.Random(seed)
+    best_sides, best_weight = None, np.inf
+    for _ in range(trials):
+        threshold = rng.uniform(0.0, 1.0)
+        order = rng.sample(range(len(terminals)), len(terminals))
+        sides = np.full(compact_graph.vertex_count, vertex_terminals[order[-1]])
+        unassigned = np.ones(compact_graph.vertex_count, dtype=bool)
+        for index in order[:-1]:
+            taken = unassigned & (values[:, index] >= threshold)
+            sides[taken] = vertex_terminals[index]
+            unassigned &= ~taken
+        weight = _cut_weight(compact_graph, sides)
+        if weight < best_weight:
+            best_sides, best_weight = sides, weight
+    return best_sides, ip_formulation.get_cut_value()
+
+
+def _cut_weight(graph, sides):
+    """The weight of the edges between different sides of a partition."""
+    crossing = sides[graph.entry_tails()] != sides[graph.neighbors]
+    return float(graph.capacities[crossing].sum()) / 2.0
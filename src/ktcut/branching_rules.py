@@ -0,0 +1,283 @@
+"""Rules which choose the vertex to branch on in Isolation Branching."""
+import time
+import numpy as np
+from ktcut.isolation_branching_node import IsolationBranchingNode
+
+# the number of candidates whose children are evaluated by strong branching
+STRONG_BRANCHING_CANDIDATES = 8
+
+# the number of branchings on a vertex after which its pseudo-costs are trusted
+RELIABILITY_THRESHOLD = 4
+
+# the smallest gain in a product score, so that one zero gain does not hide the other
+_SCORE_EPSILON = 1e-6
+
+
+class BranchingRule:
+    """Chooses the unassigned vertex on which a node branches.
+
+    A child assigns the vertex to one of its allowed terminals. The gain of
+        a child is the increase of its lower bound over the node's. Rules
+        which learn from gains are told about every branching.
+
+    Attributes:
+        statistics: counters of the work done by the rule
+    """
+
+    name = None
+
+    def __init__(self):
+        self.statistics = {"Choices": 0}
+
+    def choose_vertex(self, node, terminals_by_vertex):
+        """Chooses the vertex on which node branches.
+
+        Params:
+            node: an IsolationBranchingNode with unassigned vertices
+            terminals_by_vertex: the terminals allowed for each vertex id
+
+        Returns:
+            vertex: an unassigned vertex id of node
+        """
+        raise NotImplementedError
+
+    def expansions(self, node, vertex):
+        """The ChildExpansion of each child of node, if already evaluated (or None)."""
+        return None
+
+    def record(self, node, vertex, children):
+        """Learns from the children created by branching node on vertex."""
+
+
+class HighestDegreeRule(BranchingRule):
+    """Branches on the unassigned vertex with the largest weighted degree."""
+
+    name = "highest_degree"
+
+    def choose_vertex(self, node, terminals_by_vertex):
+        self.statistics["Choices"] += 1
+        (vertex,) = node.highest_degree_vertices()
+        return vertex
+
+
+class StrongBranchingRule(BranchingRule):
+    """Evaluates the children of the candidates of largest weighted degree.
+
+    The candidate whose children have the best product score, the product
+        of the smallest and the largest gain, is chosen. Its children are
+        then constructed from their evaluations, without a second flow.
+    """
+
+    name = "strong"
+
+    def __init__(self, candidates=STRONG_BRANCHING_CANDIDATES):
+        super().__init__()
+        self.candidates = candidates
+        self.statistics.update(
+            {"Candidates Evaluated": 0, "Children Evaluated": 0, "Time Evaluating": 0.0}
+        )
+        self._evaluated_node = None
+        self._evaluated_expansions = {}
+
+    def choose_vertex(self, node, terminals_by_vertex):
+        self.statistics["Choices"] += 1
+        return self._strong_branch(
+            node, terminals_by_vertex, node.highest_degree_vertices(self.candidates)
+        )
+
+    def expansions(self, node, vertex):
+        if node is not self._evaluated_node:
+            return None
+        return self._evaluated_expansions.get(vertex)
+
+    def _strong_branch(self, node, terminals_by_vertex, candidates):
+        """Evaluates the children of each candidate, and returns the best candidate."""
+        start_time = time.time()
+        self._evaluated_node, self._evaluated_expansions = node, {}
+        best_vertex, best_score = None, -np.inf
+        for vertex in candidates:
+            expansions = [
+                IsolationBranchingNode(
+                    node.graph,
+                    node.terminals,
+                    vertex,
+                    terminal,
+                    depth=node.depth + 1,
+                    parent=node,
+                    backend=node.backend,
+                    flows=node.flows,
+                ).expansion
+                for terminal in terminals_by_vertex[vertex]
+            ]
+            self._evaluated_expansions[vertex] = expansions
+            gains = [
+                expansion.lower_bound - node.lower_bound for expansion in expansions
+            ]
+            self._learn(vertex, gains)
+            score = _product_score(gains)
+            self.statistics["Candidates Evaluated"] += 1
+            self.statistics["Children Evaluated"] += len(expansions)
+            if score > best_score:
+                best_vertex, best_score = vertex, score
+        self.statistics["Time Evaluating"] += time.time() - start_time
+        return best_vertex
+
+    def _learn(self, vertex, gains):
+        """Strong branching alone does not learn."""
+
+
+class PseudoCostRule(BranchingRule):
+    """Branches on the vertex whose past children gained the most.
+
+    The pseudo-costs of a vertex are the average smallest and largest gain
+        of its children, over every node which branched on it. A vertex
+        never branched on is given the average over all vertices. Ties, such
+        as those early in the search, go to the largest weighted degree.
+    """
+
+    name = "pseudo_cost"
+
+    def __init__(self):
+        super().__init__()
+        self.statistics.update({"Updates": 0})
+        self._smallest_gain_sums = None
+        self._largest_gain_sums = None
+        self._counts = None
+
+    def choose_vertex(self, node, terminals_by_vertex):
+        self.statistics["Choices"] += 1
+        unassigned_vertices = node.unassigned_vertices
+        scores = self._pseudo_cost_scores(node, unassigned_vertices)
+        degrees = _weighted_degrees(node, unassigned_vertices)
+        return int(unassigned_vertices[np.lexsort((-degrees, -scores))[0]])
+
+    def record(self, node, vertex, children):
+        gains = [child.lower_bound - node.lower_bound for child in children]
+        if gains:
+            self._learn(vertex, gains)
+
+    def _learn(self, vertex, gains):
+        self._smallest_gain_sums[vertex] += min(gains)
+        self._largest_gain_sums[vertex] += max(gains)
+        self._counts[vertex] += 1
+        self.statistics["Updates"] += 1
+
+    def _pseudo_cost_scores(self, node, vertices):
+        """The product score of the pseudo-costs of each vertex."""
+        if self._counts is None:
+            vertex_count = node.graph.vertex_count
+            self._smallest_gain_sums = np.zeros(vertex_count)
+            self._largest_gain_sums = np.zeros(vertex_count)
+            self._counts = np.zeros(vertex_count, dtype=np.int64)
+        counts = self._counts[vertices]
+        total_count = max(self._counts.sum(), 1)
+        smallest_gains = np.where(
+            counts > 0,
+            self._smallest_gain_sums[vertices] / np.maximum(counts, 1),
+            self._smallest_gain_sums.sum() / total_count,
+        )
+        largest_gains = np.where(
+            counts > 0,
+            self._largest_gain_sums[vertices] / np.maximum(counts, 1),
+            self._largest_gain_sums.sum() / total_count,
+        )
+        return np.maximum(smallest_gains, _SCORE_EPSILON) * np.maximum(
+            largest_gains, _SCORE_EPSILON
+        )
+
+
+class ReliabilityRule(PseudoCostRule, StrongBranchingRule):
+    """Pseudo-cost branching, with strong branching while pseudo-costs are unreliable.
+
+    Among the candidates with the best pseudo-cost scores, those branched on
+        fewer than reliability times are evaluated by strong branching,
+        which also initializes their pseudo-costs. If every candidate is
+        reliable, the pseudo-costs decide alone.
+    """
+
+    name = "reliability"
+
+    def __init__(
+        self,
+        candidates=STRONG_BRANCHING_CANDIDATES,
+        reliability=RELIABILITY_THRESHOLD,
+    ):
+        PseudoCostRule.__init__(self)
+        self.candidates = candidates
+        self.reliability = reliability
+        self.statistics.update(
+            {
+                "Candidates Evaluated": 0,
+                "Children Evaluated": 0,
+                "Time Evaluating": 0.0,
+                "Reliable Choices": 0,
+            }
+        )
+        self._evaluated_node = None
+        self._evaluated_expansions = {}
+
+    def choose_vertex(self, node, terminals_by_vertex):
+        self.statistics["Choices"] += 1
+        unassigned_vertices = node.unassigned_vertices
+        scores = self._pseudo_cost_scores(node, unassigned_vertices)
+        degrees = _weighted_degrees(node, unassigned_vertices)
+        order = np.lexsort((-degrees, -scores))[: self.candidates]
+        candidates = unassigned_vertices[order]
+        unreliable = self._counts[candidates] < self.reliability
+        if not unreliable.any():
+            self.statistics["Reliable Choices"] += 1
+            return int(candidates[0])
+
+        # NB: the best reliable candidate competes with the evaluated ones
+        vertex = self._strong_branch(
+            node, terminals_by_vertex, candidates[unreliable].tolist()
+        )
+        if not unreliable.all():
+            reliable = int(candidates[~unreliable][0])
+            scores = self._pseudo_cost_scores(node, np.array([vertex, reliable]))
+            if scores[1] > scores[0]:
+                return reliable
+        return vertex
+
+    def record(self, node, vertex, children):
+        # NB: evaluated children were learned from when they were evaluated
+        if self.expansions(node, vertex) is None:
+            PseudoCostRule.record(self, node, vertex, children)
+
+    def _learn(self, vertex, gains):
+        PseudoCostRule._learn(self, vertex, gains)
+
+
+BRANCHING_RULES = {
+    HighestDegreeRule.name: HighestDegreeRule,
+    StrongBranchingRule.name: StrongBranchingRule,
+    PseudoCostRule.name: PseudoCostRule,
+    ReliabilityRule.name: ReliabilityRule,
+}
+
+
+def get_branching_rule(rule):
+    """Chooses the branching rule.
+
+    Args:
+        rule: a BranchingRule, or the name of a branching rule
+
+    Returns:
+        rule: a BranchingRule
+
+    Raises:
+        ValueError: if rule is not a valid branching rule name
+    """
+    if isinstance(rule, BranchingRule):
+        return rule
+    if rule not in BRANCHING_RULES:
+        raise ValueError("unknown branching rule: %s" % rule)
+    return BRANCHING_RULES[rule]()
+
+
+def _weighted_degrees(node, vertices):
+    return node.graph.weighted_degrees()[vertices]
+
+
+def _product_score(gains):
+    return max(min(gains), _SCORE_EPSILON) * max(max(gains), _SCORE_EPSILON)
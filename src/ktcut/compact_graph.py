@@ -0,0 +1,220 @@
+"""Array-backed (CSR) graph used internally by Isolation Branching."""
+import networkx as nx
+import numpy as np
+
+
+class CompactGraph:
+    """Undirected graph stored in compressed sparse row (CSR) form.
+
+    Vertices are the integers 0, ..., n-1. Contraction never renumbers
+        vertices: a vertex which is contracted into u keeps its id, loses
+        its adjacency list, and is labelled with u. Contraction returns a
+        new graph, so a CompactGraph can be shared without copying.
+
+    Attributes:
+        offsets: the neighbors of vertex i are
+            neighbors[offsets[i]:offsets[i + 1]]
+        neighbors: the concatenated adjacency lists
+        capacities: the capacity of each entry in neighbors
+        labels: the supervertex which currently contains each vertex
+        names: the original name of each vertex
+    """
+
+    def __init__(self, offsets, neighbors, capacities, labels, names, index=None):
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.capacities = capacities
+        self.labels = labels
+        self.names = names
+        self._index = index
+
+    @classmethod
+    def from_edges(cls, vertex_count, tails, heads, capacities, names=None):
+        """Builds a graph from arrays of undirected edges.
+
+        Self-loops are dropped and the capacities of parallel edges are summed.
+
+        Args:
+            vertex_count: the number of vertices in the graph
+            tails: the first endpoint of each edge
+            heads: the second endpoint of each edge
+            capacities: the capacity of each edge
+            names: the name of each vertex (defaults to the vertex id)
+
+        Returns:
+            graph: the CompactGraph
+        """
+        tails = np.asarray(tails, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        capacities = np.asarray(capacities, dtype=np.float64)
+        offsets, neighbors, capacities = _compress(
+            np.concatenate((tails, heads)),
+            np.concatenate((heads, tails)),
+            np.concatenate((capacities, capacities)),
+            vertex_count,
+        )
+        if names is None:
+            names = list(range(vertex_count))
+        labels = np.arange(vertex_count, dtype=np.int32)
+        return cls(offsets, neighbors, capacities, labels, names)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """Builds a graph from an undirected networkx graph.
+
+        Edges without a 'capacity' attribute are given capacity 1.0.
+        """
+        names = list(graph.nodes())
+        index = {name: i for i, name in enumerate(names)}
+        edge_count = graph.number_of_edges()
+        tails = np.empty(edge_count, dtype=np.int64)
+        heads = np.empty(edge_count, dtype=np.int64)
+        capacities = np.empty(edge_count, dtype=np.float64)
+        for e, (u, v, capacity) in enumerate(graph.edges(data="capacity", default=1.0)):
+            tails[e] = index[u]
+            heads[e] = index[v]
+            capacities[e] = capacity
+        compact_graph = cls.from_edges(len(names), tails, heads, capacities, names)
+        compact_graph._index = index
+        return compact_graph
+
+    def to_networkx(self):
+        """The active vertices and their edges as a networkx graph on vertex ids."""
+        graph = nx.Graph()
+        graph.add_nodes_from(self.active_vertices.tolist())
+        tails = self.entry_tails()
+        upper = tails < self.neighbors
+        graph.add_weighted_edges_from(
+            zip(
+                tails[upper].tolist(),
+                self.neighbors[upper].tolist(),
+                self.capacities[upper].tolist(),
+            ),
+            weight="capacity",
+        )
+        return graph
+
+    @property
+    def vertex_count(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        """The number of bytes held by the arrays of the graph."""
+        return (
+            self.offsets.nbytes
+            + self.neighbors.nbytes
+            + self.capacities.nbytes
+            + self.labels.nbytes
+        )
+
+    @property
+    def active_vertices(self):
+        """The vertices which have not been contracted into another vertex."""
+        return np.flatnonzero(self.labels == np.arange(self.vertex_count))
+
+    def vertex_ids(self, names):
+        """The vertex ids of the given vertex names."""
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return [self._index[name] for name in names]
+
+    def vertex_names(self, vertices):
+        """The vertex names of the given vertex ids."""
+        return [self.names[v] for v in vertices]
+
+    def adjacency(self, u):
+        """The neighbors of u and the capacities of the edges to them."""
+        start, stop = self.offsets[u], self.offsets[u + 1]
+        return self.neighbors[start:stop], self.capacities[start:stop]
+
+    def members(self, u):
+        """The vertices which have been contracted into u, including u."""
+        return np.flatnonzero(self.labels == u)
+
+    def weighted_degrees(self):
+        """The total capacity of the edges adjacent to each vertex."""
+        return np.bincount(
+            self.entry_tails(), weights=self.capacities, minlength=self.vertex_count
+        )
+
+    def contract_vertices(self, u, v_set):
+        """Contracts the vertices in v_set into u.
+
+        The capacity of the edge from u to w becomes the sum of the capacities
+            from u and v_set to w. Edges between u and v_set disappear.
+
+        Returns:
+            graph: a new CompactGraph in which v_set is labelled u
+        """
+        mapping = np.arange(self.vertex_count, dtype=np.int32)
+        mapping[np.fromiter(v_set, dtype=np.int64, count=len(v_set))] = u
+        return self.quotient(mapping)
+
+    def contract_vertex(self, u, v):
+        """Contracts the single vertex v into u."""
+        return self.contract_vertices(u, {v})
+
+    def contract_groups(self, contractions):
+        """Contracts several sets of vertices at once.
+
+        Args:
+            contractions: (u, vertices) pairs, contracting the active vertices
+                in vertices into u. Each u must remain active.
+
+        Returns:
+            graph: a new CompactGraph with the same names
+        """
+        mapping = np.arange(self.vertex_count, dtype=np.int32)
+        for u, vertices in contractions:
+            mapping[vertices] = u
+        return self.quotient(mapping)
+
+    def quotient(self, mapping):
+        """Contracts every active vertex v into mapping[v].
+
+        Args:
+            mapping: an array with one entry per vertex. Each active vertex
+                must map to an active vertex which maps to itself.
+
+        Returns:
+            graph: a new CompactGraph with the same names
+        """
+        offsets, neighbors, capacities = _compress(
+            mapping[self.entry_tails()],
+            mapping[self.neighbors],
+            self.capacities,
+            self.vertex_count,
+        )
+        return CompactGraph(
+            offsets,
+            neighbors,
+            capacities,
+            mapping[self.labels],
+            self.names,
+            self._index,
+        )
+
+    def entry_tails(self):
+        """The vertex at the tail of each entry in neighbors."""
+        return np.repeat(
+            np.arange(self.vertex_count, dtype=np.int32), np.diff(self.offsets)
+        )
+
+
+def _compress(tails, heads, weights, vertex_count):
+    """Builds CSR arrays from directed entries, summing duplicate entries.
+
+    Returns:
+        offsets: the row offsets
+        neighbors: the column of each entry, sorted within each row
+        weights: the summed weight of each entry
+    """
+    keep = tails != heads
+    keys = tails[keep].astype(np.int64) * vertex_count + heads[keep]
+    keys, inverse = np.unique(keys, return_inverse=True)
+    weights = np.bincount(inverse, weights=weights[keep], minlength=len(keys))
+    tails, heads = np.divmod(keys, vertex_count)
+    offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=vertex_count), out=offsets[1:])
+    return offsets, heads.astype(np.int32), weights
@@ -1,4 +1,5 @@
 """Utilities for contracting vertices in a graph while adding capacities of adjacent edges."""
+from ktcut.compact_graph import CompactGraph
 
 
 def contract_vertices(graph, u, v_set):
@@ -8,8 +9,10 @@ def contract_vertices(graph, u, v_set):
         from u to w is the sum of the capacities from u and v_set to w. Stores a list
         of contracted vertices at u.
 
+    A CompactGraph is not modified; the contracted graph is returned instead.
+
     Args:
-        graph: an undirected networkx graph
+        graph: an undirected networkx graph or CompactGraph
         u: a vertex in the graph
         v_set: a set of vertices in the graph to be contracted into u and removed
 
@@ -18,6 +21,9 @@ def contract_vertices(graph, u, v_set):
     """
     assert u not in v_set, "cannot combine a vertex to itself."
 
+    if isinstance(graph, CompactGraph):
+        return graph.contract_vertices(u, v_set)
+
     for node_v in v_set:
         for _, node_w, data_dict in graph.edges(node_v, data=True):
             if node_w == u or node_w in v_set:
@@ -42,8 +48,10 @@ def contract_vertex(graph, u, v):
     Contracts vertex v to vertex u in the graph. The resulting capacity of edges from u to w is
         the sum of the capacities from u and v to w. Stores a list of contracted nodes at u.
 
+    A CompactGraph is not modified; the contracted graph is returned instead.
+
     Args:
-        graph: an undirected networkx graph
+        graph: an undirected networkx graph or CompactGraph
         u: a vertex in the graph
         v: a vertex in the graph to be contracted into u and removed
 
@@ -52,6 +60,9 @@ def contract_vertex(graph, u, v):
     """
     assert u != v, "cannot combine a node to itself"
 
+    if isinstance(graph, CompactGraph):
+        return graph.contract_vertex(u, v)
+
     for _, w, d in graph.edges(v, data=True):
         if w == u:
             continue
@@ -0,0 +1,89 @@
+"""Deadlines and cancellation of long phases of Isolation Branching."""
+import time
+import numpy as np
+
+# the seconds a parent process waits on its children before checking for cancellation
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class DeadlineExceeded(Exception):
+    """Raised inside a phase which finds its Deadline expired or cancelled."""
+
+
+class Deadline:
+    """A time after which a solve stops, which may also be cancelled.
+
+    Long phases (the root isolating cuts, the construction of children,
+        the maximum flows of the backends, the LP) check the deadline
+        between their steps and raise DeadlineExceeded once it has passed.
+        A maximum flow which is already running is not interrupted; the
+        LP solved by HiGHS is given the time remaining as its time limit.
+
+    A deadline made within another expires no later than it, and is
+        cancelled with it. Cancelling a deadline in one process does not
+        reach copies of it in other processes, which only see it expire,
+        unless they hold a SharedDeadline whose flag the parent sets.
+
+    Attributes:
+        expires_at: the time (as in time.time()) at which it expires
+        parent: the deadline within which it was made (or None)
+    """
+
+    def __init__(self, seconds=np.inf, parent=None):
+        self.expires_at = time.time() + seconds
+        self.parent = parent
+        self._cancelled = False
+        if parent is not None:
+            self.expires_at = min(self.expires_at, parent.expires_at)
+
+    def cancel(self):
+        """Makes the deadline expire at once."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def expired(self):
+        return self.cancelled or time.time() >= self.expires_at
+
+    @property
+    def remaining(self):
+        """The seconds left before the deadline (0 once it has expired)."""
+        if self.cancelled:
+            return 0.0
+        return max(self.expires_at - time.time(), 0.0)
+
+    def check(self):
+        """Raises DeadlineExceeded if the deadline has expired."""
+        if self.expired:
+            raise DeadlineExceeded(
+                "cancelled" if self.cancelled else "deadline expired"
+            )
+
+
+class SharedDeadline(Deadline):
+    """A copy of a deadline in another process, also cancelled by a shared flag.
+
+    The flag is a multiprocessing Value, which the parent process sets once
+        it sees its own deadline cancelled (the copy cannot see that).
+
+    Attributes:
+        deadline: the copy of the deadline of the parent process (or None)
+        cancelled_flag: the flag shared with the parent process
+    """
+
+    def __init__(self, deadline, cancelled_flag):
+        super().__init__(parent=deadline)
+        self._cancelled_flag = cancelled_flag
+
+    @property
+    def cancelled(self):
+        return bool(self._cancelled_flag.value) or super().cancelled
+
+
+def check_deadline(deadline):
+    """Raises DeadlineExceeded if deadline (which may be None) has expired."""
+    if deadline is not None:
+        deadline.check()
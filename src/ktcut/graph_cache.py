@@ -0,0 +1,166 @@
+"""Memory-mapped cache of the graphs read from files."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+
+# the cache directory is trimmed to this many bytes
+DEFAULT_MAX_BYTES = 1 << 30
+
+# the number of bytes hashed at once
+_HASH_BLOCK_BYTES = 1 << 20
+
+_ARRAYS = ["offsets", "neighbors", "capacities", "names"]
+
+
+class GraphCache:
+    """Keeps the CompactGraphs read from files as .npy arrays in a directory.
+
+    Each source file has an entry: a subdirectory, named by the hash of the
+        path and format of the file, which holds the CSR arrays of the graph
+        and the size, mtime and content hash of the file. An entry is used
+        while the size and mtime of the file match. The file is only hashed
+        when its mtime changed but its size did not, so a hit does not read
+        the source. The arrays are memory-mapped, so loading is nearly
+        instant and processes reading the same graph share pages.
+
+    When the directory grows beyond max_bytes, the least recently used
+        entries are removed.
+
+    Attributes:
+        cache_dir: the directory of the entries (created if needed)
+        max_bytes: the size to which the directory is trimmed
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def read(self, filename, graph_format, reader):
+        """Loads the graph of filename from the cache, or reads and caches it.
+
+        Args:
+            filename: the path of the source file
+            graph_format: the name of the format of the file (part of the key)
+            reader: reads a CompactGraph from filename, on a miss
+
+        Returns:
+            graph: the CompactGraph (with memory-mapped arrays on a hit)
+        """
+        status = os.stat(filename)
+        entry = os.path.join(self.cache_dir, _entry_name(filename, graph_format))
+        graph = self._load(entry, filename, status)
+        if graph is None:
+            graph = reader(filename)
+            self._store(entry, _source_signature(filename, status), graph)
+            self._evict(keep=entry)
+        return graph
+
+    def _load(self, entry, filename, status):
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("size") != status.st_size:
+            return None
+        if meta.get("mtime") != status.st_mtime_ns:
+            # NB: the file was touched, and is the same if its content is
+            if meta.get("hash") != _content_hash(filename):
+                return None
+            meta["mtime"] = status.st_mtime_ns
+            self._write_meta(entry, meta)
+        try:
+            arrays = {
+                name: np.load(os.path.join(entry, name + ".npy"), mmap_mode="r")
+                for name in _ARRAYS
+            }
+            # NB: the mtime of the metadata marks the latest use of the entry
+            os.utime(os.path.join(entry, "meta.json"))
+        except (OSError, ValueError):
+            # NB: another process removed or replaced the entry meanwhile
+            return None
+        return CompactGraph(
+            arrays["offsets"],
+            arrays["neighbors"],
+            arrays["capacities"],
+            np.arange(len(arrays["names"]), dtype=np.int32),
+            arrays["names"].tolist(),
+        )
+
+    def _write_meta(self, entry, meta):
+        """Replaces the metadata of an entry, so later hits skip the hash."""
+        temporary = os.path.join(entry, ".meta-%d.json" % os.getpid())
+        try:
+            with open(temporary, "w") as f:
+                json.dump(meta, f)
+            os.replace(temporary, os.path.join(entry, "meta.json"))
+        except OSError:
+            pass
+
+    def _store(self, entry, source, graph):
+        """Writes the entry in a temporary directory, then renames it into place."""
+        temporary = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        np.save(os.path.join(temporary, "offsets.npy"), graph.offsets)
+        np.save(os.path.join(temporary, "neighbors.npy"), graph.neighbors)
+        np.save(os.path.join(temporary, "capacities.npy"), graph.capacities)
+        np.save(os.path.join(temporary, "names.npy"), np.asarray(graph.names))
+        with open(os.path.join(temporary, "meta.json"), "w") as f:
+            json.dump(source, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(temporary, entry)
+        except OSError:
+            # NB: another process stored the same entry first
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    def _evict(self, keep):
+        """Removes the least recently used entries until the cache fits."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(entry, "meta.json"))
+                size = sum(
+                    os.path.getsize(os.path.join(entry, file))
+                    for file in os.listdir(entry)
+                )
+            except OSError:
+                continue
+            entries.append((last_used, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+
+def _entry_name(filename, graph_format):
+    key = "%s\n%s" % (os.path.abspath(filename), graph_format)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _source_signature(filename, status):
+    """The size, mtime (from status, an os.stat_result) and content hash of a file."""
+    return {
+        "size": status.st_size,
+        "mtime": status.st_mtime_ns,
+        "hash": _content_hash(filename),
+    }
+
+
+def _content_hash(filename):
+    content_hash = hashlib.sha1()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
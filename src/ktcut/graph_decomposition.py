@@ -0,0 +1,316 @@
+"""Splits the k-Terminal Cut Problem into independent subproblems."""
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+from ktcut.deadline import check_deadline
+from ktcut.isolating_cut_backends import get_backend
+
+
+class GraphDecomposition:
+    """Splits a graph at its connected components and articulation vertices.
+
+    Each connected component is cut independently. Within a component, the
+        blocks (biconnected components) form a tree joined at articulation
+        vertices. Every part P which hangs off an articulation vertex a is
+        resolved bottom-up, according to the terminals in P other than a:
+        no terminal: P joins a's side at no cost.
+        a is a terminal: P and a form an independent subproblem.
+        one terminal t: P only matters through whether a joins t. If not,
+            P costs the minimum cut between t and a in P. So P is replaced
+            by an edge from t to a with the capacity of that cut.
+        several terminals: P stays in the subproblem of the component.
+
+    A component (or remainder of one) with a single terminal joins it.
+        Only what is left needs branch and bound. The subproblems are
+        solved one after another.
+
+    The components, blocks and articulation vertices are found by a single
+        iterative pass of Tarjan's algorithm over the CSR arrays, and the
+        parts are cut with the CompactGraph backends.
+
+    Attributes:
+        graph: the CompactGraph to decompose
+        terminals: the terminal vertex ids
+        deadline: a Deadline, checked before each cut of a part (or None)
+    """
+
+    def __init__(self, graph, terminals, deadline=None):
+        self._graph = graph
+        self._terminals = terminals
+        self._deadline = deadline
+        self._terminal_set = set(terminals)
+        # (graph, vertices) of each subproblem, as vertex ids of graph
+        self._subproblems = []
+        # the steps to undo, in order:
+        #   ("join", vertices, u): the vertices join the side of u
+        #   ("cut", t, a, source_set, sink_set): the part hanging off a
+        #       replaced by an edge to t, and its minimum cut
+        self._records = []
+        # the vertices resolved so far, which have left their component
+        self._removed = np.zeros(graph.vertex_count, dtype=bool)
+        # the terminals whose part was replaced by an edge, whose edges
+        #   in graph no longer count
+        self._replaced = np.zeros(graph.vertex_count, dtype=bool)
+        # the edges which replaced parts, by endpoint: {u: {v: capacity}}
+        self._added_edges = {}
+
+    def decompose(self):
+        """Finds the subproblems.
+
+        Raises:
+            DeadlineExceeded: if the deadline expires first (the
+                decomposition is then incomplete, and should be dropped)
+        """
+        for component, blocks in self._components():
+            component_terminals = set(component) & self._terminal_set
+            if len(component_terminals) <= 1:
+                # NB: a component without terminals is cut from nothing,
+                # so it may join any terminal
+                terminal = min(component_terminals, default=self._terminals[0])
+                self._records.append(("join", set(component) - {terminal}, terminal))
+            else:
+                self._decompose_component(component, blocks)
+
+    def _components(self):
+        """The connected components and their blocks, by an iterative Tarjan pass.
+
+        Returns:
+            components: the (vertices, blocks) of each connected component,
+                where each block is the list of its vertices
+        """
+        offsets = self._graph.offsets.tolist()
+        neighbors = self._graph.neighbors.tolist()
+        discovery = [-1] * self._graph.vertex_count
+        low = [0] * self._graph.vertex_count
+        parents = [-1] * self._graph.vertex_count
+        count = 0
+        components = []
+        for root in self._graph.active_vertices.tolist():
+            if discovery[root] != -1:
+                continue
+            discovery[root] = low[root] = count
+            count += 1
+            component, blocks = [root], []
+            # (vertex, position of its next entry in neighbors)
+            stack = [(root, offsets[root])]
+            vertex_stack = [root]
+            while stack:
+                u, position = stack[-1]
+                if position < offsets[u + 1]:
+                    stack[-1] = (u, position + 1)
+                    v = neighbors[position]
+                    if discovery[v] == -1:
+                        discovery[v] = low[v] = count
+                        count += 1
+                        parents[v] = u
+                        component.append(v)
+                        vertex_stack.append(v)
+                        stack.append((v, offsets[v]))
+                    elif v != parents[u]:
+                        low[u] = min(low[u], discovery[v])
+                    continue
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[u])
+                if low[u] >= discovery[parent]:
+                    # NB: parent separates the vertices above u on the stack
+                    block = [parent]
+                    while block[-1] != u:
+                        block.append(vertex_stack.pop())
+                    blocks.append(block)
+            components.append((component, blocks))
+        return components
+
+    def _decompose_component(self, component, blocks):
+        """Resolves the parts of a component which hang off articulation vertices."""
+        # the blocks of each vertex: those of an articulation vertex are several
+        vertex_blocks = {}
+        for index, block in enumerate(blocks):
+            for u in block:
+                vertex_blocks.setdefault(u, []).append(index)
+
+        # walk the block-cut tree from a block with a terminal,
+        #   keeping the articulation vertex above each block
+        root = next(
+            index for index, block in enumerate(blocks)
+            if not self._terminal_set.isdisjoint(block)
+        )
+        parent_articulations = {root: None}
+        order = [root]
+        for index in order:
+            for u in blocks[index]:
+                if u == parent_articulations[index]:
+                    continue
+                for child in vertex_blocks[u]:
+                    if child not in parent_articulations:
+                        parent_articulations[child] = u
+                        order.append(child)
+
+        # the vertices of the part below each block which remain
+        remaining = {}
+        for index in reversed(order[1:]):
+            a = parent_articulations[index]
+            parts = [set(blocks[index]) - {a}] + [
+                remaining.pop(child)
+                for u in blocks[index] if u != a
+                for child in vertex_blocks[u] if child != index
+            ]
+            # NB: the smaller parts are merged into the largest,
+            # so a long chain of blocks is not copied at every step
+            part = max(parts, key=len)
+            for other in parts:
+                if other is not part:
+                    part |= other
+            remaining[index] = self._resolve_part(part, a)
+
+        self._add_subproblem(
+            [u for u in component if not self._removed[u]]
+        )
+
+    def _resolve_part(self, part, a):
+        """Resolves the part hanging off the articulation vertex a.
+
+        Returns:
+            remaining: the vertices of the part which remain in the component
+        """
+        part_terminals = part & self._terminal_set
+        if not part_terminals:
+            self._records.append(("join", part, a))
+        elif a in self._terminal_set:
+            self._add_subproblem(list(part | {a}))
+        elif len(part_terminals) == 1:
+            (terminal,) = part_terminals
+            check_deadline(self._deadline)
+            vertices = np.array(sorted(part | {a}), dtype=np.int64)
+            part_graph = self._induced_graph(vertices)
+            source, sink = np.searchsorted(vertices, [terminal, a]).tolist()
+            source_set, weight = get_backend("auto", part_graph).minimum_isolating_cut(
+                part_graph, {source}, {sink}, deadline=self._deadline
+            )
+            source_set = set(vertices[sorted(source_set)].tolist())
+            self._records.append(("cut", terminal, a, source_set, part - source_set))
+            self._remove(part - {terminal})
+            self._replace(terminal, a, weight)
+            return {terminal}
+        else:
+            return part
+        self._remove(part)
+        return set()
+
+    def _remove(self, vertices):
+        self._removed[list(vertices)] = True
+
+    def _replace(self, terminal, a, weight):
+        """Replaces the edges of terminal by a single edge to a (if weight > 0)."""
+        self._replaced[terminal] = True
+        for u in self._added_edges.pop(terminal, {}):
+            del self._added_edges[u][terminal]
+        if weight > 0:
+            self._added_edges[terminal] = {a: weight}
+            self._added_edges.setdefault(a, {})[terminal] = weight
+
+    def _induced_graph(self, vertices):
+        """The CompactGraph of the current edges between the sorted vertices.
+
+        Only the adjacency of the given vertices is read, so building the
+            graph of a part does not scan the whole graph.
+        """
+        graph = self._graph
+        index = {u: i for i, u in enumerate(vertices.tolist())}
+        kept = vertices[~self._replaced[vertices]]
+        # the positions in neighbors of the entries of the kept vertices
+        starts = graph.offsets[kept]
+        lengths = graph.offsets[kept + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(
+            starts - (np.cumsum(lengths) - lengths), lengths
+        )
+        tails = np.repeat(kept, lengths)
+        heads = graph.neighbors[positions].astype(np.int64)
+        local_heads = np.searchsorted(vertices, heads).clip(max=len(vertices) - 1)
+        keep = (
+            (tails < heads)
+            & (vertices[local_heads] == heads)
+            & ~self._replaced[heads]
+        )
+        edge_tails = np.searchsorted(vertices, tails[keep]).tolist()
+        edge_heads = local_heads[keep].tolist()
+        capacities = graph.capacities[positions[keep]].tolist()
+        for u in vertices.tolist():
+            for v, capacity in self._added_edges.get(u, {}).items():
+                if u < v and v in index:
+                    edge_tails.append(index[u])
+                    edge_heads.append(index[v])
+                    capacities.append(capacity)
+        return CompactGraph.from_edges(
+            len(vertices),
+            edge_tails,
+            edge_heads,
+            capacities,
+            names=graph.vertex_names(vertices),
+        )
+
+    def _add_subproblem(self, vertices):
+        terminals = set(vertices) & self._terminal_set
+        if len(terminals) == 1:
+            (terminal,) = terminals
+            self._records.append(("join", set(vertices) - {terminal}, terminal))
+        else:
+            vertices = np.array(sorted(vertices), dtype=np.int64)
+            self._subproblems.append((self._induced_graph(vertices), vertices))
+
+    def get_subproblems(self):
+        """The subproblems which need branch and bound.
+
+        Returns:
+            subproblems: the (graph, terminals, vertices) of each subproblem,
+                where graph is a CompactGraph with the names of the input
+                graph, terminals are its terminal vertex ids, and vertices
+                are the input vertex id of each of its vertices
+        """
+        subproblems = []
+        for graph, vertices in self._subproblems:
+            index = {u: i for i, u in enumerate(vertices.tolist())}
+            subproblems.append(
+                (graph, [index[t] for t in self._terminals if t in index], vertices)
+            )
+        return subproblems
+
+    def restore(self, source_sets):
+        """Stitches the partitions of the subproblems into one partition.
+
+        Args:
+            source_sets: the input vertex ids in the source set of each
+                terminal, over all subproblems
+
+        Returns:
+            source_sets: the input vertex ids in the source set of each
+                terminal, over the whole graph
+        """
+        sides = np.full(self._graph.vertex_count, -1, dtype=np.int64)
+        for terminal, source_set in source_sets.items():
+            sides[list(source_set)] = terminal
+        sides[self._terminals] = self._terminals
+        for record in reversed(self._records):
+            if record[0] == "join":
+                _, vertices, u = record
+                sides[list(vertices)] = sides[u]
+            else:
+                _, terminal, a, source_set, sink_set = record
+                if sides[a] == terminal:
+                    sides[list(sink_set)] = terminal
+                else:
+                    sides[list(sink_set)] = sides[a]
+                sides[list(source_set)] = terminal
+        return {
+            terminal: set(np.flatnonzero(sides == terminal).tolist())
+            for terminal in self._terminals
+        }
+
+    @property
+    def report(self):
+        return {
+            "Subproblems": len(self._subproblems),
+            "Parts Joined": sum(record[0] == "join" for record in self._records),
+            "Parts Cut": sum(record[0] == "cut" for record in self._records),
+        }
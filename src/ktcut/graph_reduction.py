@@ -0,0 +1,167 @@
+"""Safe reductions of the k-Terminal Cut Problem, applied before branching."""
+from collections import deque
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from ktcut.compact_graph import CompactGraph
+
+
+class GraphReduction:
+    """Shrinks a graph without changing the value of its minimum k-terminal cut.
+
+    The reductions are:
+        components: a connected component without terminals is cut from
+            nothing, so it is dropped (and joins the first terminal)
+        heavy edges: a non-terminal vertex v whose heaviest edge, to u,
+            carries at least half the weighted degree of v can always join
+            u's side without increasing the cut, so v is contracted into u.
+            This folds degree-1 vertices into their neighbor, and a degree-2
+            vertex into its heavier neighbor, which leaves an edge between
+            its neighbors with the lighter of its two capacities.
+
+    Each contraction is recorded, so a partition of the reduced graph is
+        mapped back to the original vertices by undoing them in reverse.
+        Every contraction is safe on its own, so once the deadline expires
+        the reductions stop, and those made so far are kept.
+
+    Attributes:
+        graph: the CompactGraph to reduce
+        terminals: the terminal vertex ids
+        deadline: a Deadline, checked before each contraction (or None)
+    """
+
+    def __init__(self, graph, terminals, deadline=None):
+        self._graph = graph
+        self._terminals = terminals
+        self._deadline = deadline
+        self._reduced_graph = None
+        self._reduced_terminals = None
+        # the original vertex id of each vertex in the reduced graph
+        self._kept_vertices = None
+        # the (v, u) pairs, in order, where v was contracted into u
+        self._contractions = []
+        self._dropped_vertices = np.empty(0, dtype=np.int64)
+
+    def reduce(self):
+        """Applies the reductions until none applies."""
+        graph = self._graph
+        terminal_set = set(self._terminals)
+        alive = np.zeros(graph.vertex_count, dtype=bool)
+        alive[graph.active_vertices] = True
+
+        # drop the components without terminals
+        _, components = connected_components(
+            sp.csr_matrix(
+                (graph.capacities, graph.neighbors, graph.offsets),
+                shape=(graph.vertex_count, graph.vertex_count),
+            ),
+            directed=False,
+        )
+        terminal_components = np.zeros(components.max() + 1, dtype=bool)
+        terminal_components[components[list(self._terminals)]] = True
+        dropped = alive & ~terminal_components[components]
+        alive &= ~dropped
+
+        adjacency = {}
+        for u in np.flatnonzero(alive).tolist():
+            neighbors, capacities = graph.adjacency(u)
+            adjacency[u] = dict(zip(neighbors.tolist(), capacities.tolist()))
+
+        candidates = deque(u for u in adjacency if u not in terminal_set)
+        queued = set(candidates)
+        while candidates:
+            if self._deadline is not None and self._deadline.expired:
+                break
+            v = candidates.popleft()
+            queued.discard(v)
+            if v not in adjacency:
+                continue
+            neighbors = adjacency[v]
+            if not neighbors:
+                # NB: v lost its last neighbor, so it is cut from nothing
+                del adjacency[v]
+                dropped[v] = True
+                continue
+            u = max(neighbors, key=neighbors.get)
+            if 2 * neighbors[u] < sum(neighbors.values()):
+                continue
+
+            # contract v into u
+            del adjacency[v]
+            del adjacency[u][v]
+            for w, capacity in neighbors.items():
+                if w == u:
+                    continue
+                del adjacency[w][v]
+                adjacency[u][w] = adjacency[u].get(w, 0.0) + capacity
+                adjacency[w][u] = adjacency[w].get(u, 0.0) + capacity
+            self._contractions.append((v, u))
+
+            # NB: the degrees of u and of the neighbors of v have changed
+            for w in [u] + list(neighbors):
+                if w not in terminal_set and w not in queued:
+                    candidates.append(w)
+                    queued.add(w)
+
+        self._dropped_vertices = np.flatnonzero(dropped)
+        self._kept_vertices = np.array(sorted(adjacency), dtype=np.int64)
+        index = {u: i for i, u in enumerate(self._kept_vertices.tolist())}
+        tails, heads, capacities = [], [], []
+        for u, neighbors in adjacency.items():
+            for w, capacity in neighbors.items():
+                if u < w:
+                    tails.append(index[u])
+                    heads.append(index[w])
+                    capacities.append(capacity)
+        self._reduced_graph = CompactGraph.from_edges(
+            len(self._kept_vertices),
+            tails,
+            heads,
+            capacities,
+            names=graph.vertex_names(self._kept_vertices),
+        )
+        self._reduced_terminals = [index[terminal] for terminal in self._terminals]
+
+    def get_graph(self):
+        """The reduced CompactGraph, whose names are those of the original graph."""
+        return self._reduced_graph
+
+    def get_terminals(self):
+        """The terminal vertex ids in the reduced graph."""
+        return self._reduced_terminals
+
+    def get_original_vertices(self):
+        """The original vertex id of each vertex of the reduced graph."""
+        return self._kept_vertices
+
+    def restore(self, source_sets):
+        """Maps a partition of the reduced graph back to the original graph.
+
+        Args:
+            source_sets: the reduced vertex ids in the source set of each
+                reduced terminal (unassigned vertices may be left out)
+
+        Returns:
+            source_sets: the original vertex ids in the source set of each
+                original terminal
+        """
+        sides = np.full(self._graph.vertex_count, -1, dtype=np.int64)
+        for terminal, source_set in source_sets.items():
+            sides[self._kept_vertices[list(source_set)]] = self._kept_vertices[terminal]
+        sides[self._dropped_vertices] = self._terminals[0]
+        for v, u in reversed(self._contractions):
+            sides[v] = sides[u]
+        # NB: vertices contracted before the reduction follow their supervertex
+        sides = sides[self._graph.labels]
+        return {
+            terminal: set(np.flatnonzero(sides == terminal).tolist())
+            for terminal in self._terminals
+        }
+
+    @property
+    def report(self):
+        return {
+            "Vertices Dropped": len(self._dropped_vertices),
+            "Vertices Contracted": len(self._contractions),
+            "Vertices Remaining": len(self._kept_vertices),
+        }
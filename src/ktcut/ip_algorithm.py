@@ -15,7 +15,8 @@ def ip_algorithm(graph, terminals, solver=None):
     Args:
         graph: The networkx graph for which the k-Terminal Cut problem is to be solved.
         terminals: The vertices which are terminals in the k-Terminal Cut problem.
-        solver: which solver to use to solve the IP.
+        solver: which solver to use to solve the IP: None for HiGHS, or
+            a PuLP solver (or 'pulp' for its default solver).
 
     Returns:
         source_sets: dictionary of nodes to terminal.
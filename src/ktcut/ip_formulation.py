@@ -1,6 +1,9 @@
 """LP and IP Formulations of the k-Terminal Cut Problem."""
 
+import numpy as np
 import pulp
+import scipy.sparse as sp
+from scipy.optimize import linprog
 from pulp import LpProblem
 from pulp import LpMinimize
 from pulp import LpVariable
@@ -8,6 +11,21 @@ from pulp import LpInteger
 from pulp import LpContinuous
 from pulp import lpSum
 from pulp import value
+from ktcut.deadline import DeadlineExceeded
+from ktcut.deadline import check_deadline
+
+try:
+    from scipy.optimize import Bounds
+    from scipy.optimize import LinearConstraint
+    from scipy.optimize import milp
+except ImportError:  # scipy < 1.9
+    milp = None
+
+# x values within this distance of 1 count as 1
+_ROUNDING_DECIMALS = 5
+
+# the status of a HiGHS result which stopped at its time limit
+_HIGHS_LIMIT_STATUS = 1
 
 
 class IPFormulation:
@@ -21,19 +39,38 @@ class IPFormulation:
             sum_k{x_{i}^k} = 1
             z_{ij}^k >= x_{i}^k-x_{j}^k for all k
             z_{ij}^k >= x_{j}^k-x_{i}^k for all k
+
+    By default, the constraint matrix is built directly as a sparse matrix
+        and solved in memory by HiGHS. Given a PuLP solver (or 'pulp'), the
+        model is built variable by variable in PuLP instead. Either way, the
+        solution is kept as the array x_values, with one row per node (in
+        the order of graph.nodes()) and one column per terminal.
+
+    Given a Deadline, HiGHS is limited to the time remaining, and a PuLP
+        solver is only started if time remains. Either way, DeadlineExceeded
+        is raised if the deadline expires before the solution is found.
+
+    Attributes:
+        graph: the networkx graph with 'capacity' along each edge
+        terminals: the terminals of the graph
+        solver: None or 'highs' for HiGHS, or 'pulp' or a PuLP solver
+        deadline: a Deadline (or None)
     """
 
-    def __init__(self, graph, terminals, solver=None):
+    def __init__(self, graph, terminals, solver=None, deadline=None):
         self.graph = graph
         self.terminals = terminals
         self.mdl = None
         self.x_variables = {}
         self.z_variables = {}
+        self.x_values = None
+        self._nodes = list(graph.nodes())
         self.possible_terminals_by_node_weak = None
         self.possible_terminals_by_node_strong = None
         self.source_sets = None
         self.cut_value = None
         self.solver = solver
+        self.deadline = deadline
 
     def _initialize_model(self):
         self.mdl = LpProblem("MultiTerminalCuts", LpMinimize)
@@ -62,29 +99,29 @@ class IPFormulation:
 
     def _initialize_edge_variables_ip(self):
         """
-        Initialize variables z_ij^k for IP.
+        Initialize variables z_ij^k for IP, once per undirected edge (i, j).
         """
         for i in self.graph.nodes():
             self.z_variables[i] = {}
-            for j in self.graph[i]:
-                self.z_variables[i][j] = {}
-                for k in self.terminals:
-                    self.z_variables[i][j][k] = LpVariable(
-                        "n %s, n %s, t %s" % (i, j, k), 0, 1, LpInteger
-                    )
+        for (i, j) in self.graph.edges():
+            self.z_variables[i][j] = {}
+            for k in self.terminals:
+                self.z_variables[i][j][k] = LpVariable(
+                    "n %s, n %s, t %s" % (i, j, k), 0, 1, LpInteger
+                )
 
     def _initialize_edge_variables_lp(self):
         """
-        Initialize variables z_ij^k for LP.
+        Initialize variables z_ij^k for LP, once per undirected edge (i, j).
         """
         for i in self.graph.nodes():
             self.z_variables[i] = {}
-            for j in self.graph[i]:
-                self.z_variables[i][j] = {}
-                for k in self.terminals:
-                    self.z_variables[i][j][k] = LpVariable(
-                        "n %s, n %s, t %s" % (i, j, k), 0, 1, LpContinuous
-                    )
+        for (i, j) in self.graph.edges():
+            self.z_variables[i][j] = {}
+            for k in self.terminals:
+                self.z_variables[i][j][k] = LpVariable(
+                    "n %s, n %s, t %s" % (i, j, k), 0, 1, LpContinuous
+                )
 
     def _initialize_objective(self):
         """
@@ -137,53 +174,176 @@ class IPFormulation:
         for k in self.terminals:
             self.mdl += (self.x_variables[k][k] == 1.0), "init %s" % k
 
+    def _uses_pulp(self, integral):
+        if self.solver is None or self.solver == "highs":
+            # NB: without milp, integer programs fall back to PuLP
+            return integral and milp is None
+        return True
+
     def _run_solver(self):
-        if self.solver is None:
+        check_deadline(self.deadline)
+        if self.solver is None or isinstance(self.solver, str):
             self.mdl.solve()
         else:
             self.mdl.solve(self.solver)
+        check_deadline(self.deadline)
+        self.x_values = np.array(
+            [
+                [self.x_variables[i][k].varValue for k in self.terminals]
+                for i in self._nodes
+            ],
+            dtype=np.float64,
+        ).reshape(len(self._nodes), len(self.terminals))
+        self.cut_value = round(value(self.mdl.objective), 5)
+
+    def _matrix_formulation(self):
+        """The objective and constraints as arrays.
+
+        The variables are x_i^k at i * K + k, followed by z_e^k at
+            N * K + e * K + k for the e-th edge of graph.edges().
+
+        Returns:
+            objective: the cost of each variable
+            upper_matrix: the rows z_e^k >= x_i^k - x_j^k and
+                z_e^k >= x_j^k - x_i^k, as upper_matrix @ variables <= 0
+            equality_matrix: the rows sum_k{x_i^k} = 1
+            lower_bounds: the lower bound of each variable
+        """
+        node_count, terminal_count = len(self._nodes), len(self.terminals)
+        index = {node: i for i, node in enumerate(self._nodes)}
+        edges = list(self.graph.edges(data="capacity", default=1.0))
+        edge_count = len(edges)
+        tails = np.fromiter(
+            (index[i] for i, _, _ in edges), dtype=np.int64, count=edge_count
+        )
+        heads = np.fromiter(
+            (index[j] for _, j, _ in edges), dtype=np.int64, count=edge_count
+        )
+        capacities = np.fromiter(
+            (c for _, _, c in edges), dtype=np.float64, count=edge_count
+        )
+
+        x_count = node_count * terminal_count
+        objective = np.concatenate(
+            (np.zeros(x_count), 0.5 * np.repeat(capacities, terminal_count))
+        )
+
+        # one row per (edge, terminal) and direction
+        offsets = np.tile(np.arange(terminal_count), edge_count)
+        x_tails = np.repeat(tails, terminal_count) * terminal_count + offsets
+        x_heads = np.repeat(heads, terminal_count) * terminal_count + offsets
+        z = x_count + np.arange(edge_count * terminal_count)
+        row_count = edge_count * terminal_count
+        upper_matrix = sp.csr_matrix(
+            (
+                np.tile(np.array([1.0, -1.0, -1.0]), 2 * row_count),
+                (
+                    np.repeat(np.arange(2 * row_count), 3),
+                    np.concatenate(
+                        (
+                            np.stack((x_tails, x_heads, z), axis=1).ravel(),
+                            np.stack((x_heads, x_tails, z), axis=1).ravel(),
+                        )
+                    ),
+                ),
+            ),
+            shape=(2 * row_count, x_count + row_count),
+        )
+        equality_matrix = sp.csr_matrix(
+            (
+                np.ones(x_count),
+                (np.repeat(np.arange(node_count), terminal_count), np.arange(x_count)),
+            ),
+            shape=(node_count, x_count + row_count),
+        )
+
+        lower_bounds = np.zeros(x_count + row_count)
+        for k, terminal in enumerate(self.terminals):
+            lower_bounds[index[terminal] * terminal_count + k] = 1.0
+        return objective, upper_matrix, equality_matrix, lower_bounds
+
+    def _solve_matrix(self, integral):
+        """Solves the matrix formulation in memory with HiGHS."""
+        (
+            objective,
+            upper_matrix,
+            equality_matrix,
+            lower_bounds,
+        ) = self._matrix_formulation()
+        upper_bounds = np.ones(len(objective))
+        options = {}
+        if self.deadline is not None:
+            check_deadline(self.deadline)
+            options["time_limit"] = self.deadline.remaining
+        if integral:
+            x_count = len(self._nodes) * len(self.terminals)
+            integrality = np.zeros(len(objective))
+            # NB: z_e^k takes the integer value |x_i^k - x_j^k| at the optimum
+            integrality[:x_count] = 1
+            result = milp(
+                objective,
+                constraints=[
+                    LinearConstraint(upper_matrix, -np.inf, 0.0),
+                    LinearConstraint(equality_matrix, 1.0, 1.0),
+                ],
+                integrality=integrality,
+                bounds=Bounds(lower_bounds, upper_bounds),
+                options=options,
+            )
+        else:
+            result = linprog(
+                objective,
+                A_ub=upper_matrix,
+                b_ub=np.zeros(upper_matrix.shape[0]),
+                A_eq=equality_matrix,
+                b_eq=np.ones(equality_matrix.shape[0]),
+                bounds=np.stack((lower_bounds, upper_bounds), axis=1),
+                method="highs",
+                options=options,
+            )
+        if self.deadline is not None and result.status == _HIGHS_LIMIT_STATUS:
+            raise DeadlineExceeded("HiGHS stopped at the deadline: %s" % result.message)
+        if result.x is None:
+            raise RuntimeError(
+                "HiGHS did not solve the formulation: %s" % result.message
+            )
+        self.x_values = result.x[: len(self._nodes) * len(self.terminals)].reshape(
+            len(self._nodes), len(self.terminals)
+        )
+        self.cut_value = round(result.fun, 5)
 
     def _calculate_possible_terminals_by_node_weak(self):
         """
         record solution: possible terminals by node assuming *weak* persistence
         """
+        ones = np.round(self.x_values, _ROUNDING_DECIMALS) == 1.0
         self.possible_terminals_by_node_weak = {
-            node: set() for node in self.graph.nodes()
+            node: self._terminals_where(row) if row.any() else self.terminals
+            for node, row in zip(self._nodes, ones)
         }
-        for i in self.graph.nodes():
-            flag = True
-            for k in self.terminals:
-                if round(self.x_variables[i][k].varValue, 5) == 1.0:
-                    self.possible_terminals_by_node_weak[i].add(k)
-                    flag = False
-            if flag:
-                self.possible_terminals_by_node_weak[i] = self.terminals
 
     def _calculate_possible_terminals_by_node_strong(self):
         """
         record solution: possible terminals by node assuming *strong* persistence
         """
         self.possible_terminals_by_node_strong = {
-            node: set() for node in self.graph.nodes()
+            node: self._terminals_where(row)
+            for node, row in zip(self._nodes, self.x_values > 0.0)
         }
-        for i in self.graph.nodes():
-            for k in self.terminals:
-                if self.x_variables[i][k].varValue > 0.0:
-                    self.possible_terminals_by_node_strong[i].add(k)
 
     def _calculate_source_sets(self):
         """
         record solution: source sets
         """
-        self.source_sets = {terminal: set() for terminal in self.terminals}
-        for i in self.graph.nodes():
-            for k in self.terminals:
-                if round(self.x_variables[i][k].varValue, 5) == 1.0:
-                    self.source_sets[k].add(i)
+        ones = np.round(self.x_values, _ROUNDING_DECIMALS) == 1.0
+        self.source_sets = {
+            terminal: {self._nodes[i] for i in np.flatnonzero(ones[:, k]).tolist()}
+            for k, terminal in enumerate(self.terminals)
+        }
 
-    def _calculate_cut_value(self):
-        """calculate: self.cut_value"""
-        self.cut_value = round(value(self.mdl.objective), 5)
+    def _terminals_where(self, mask):
+        terminals = list(self.terminals)
+        return {terminals[k] for k in np.flatnonzero(mask).tolist()}
 
     def get_cut_value(self):
         """get: self.cut_value"""
@@ -197,34 +357,49 @@ class IPFormulation:
         """get: self.possible_terminals_by_node_strong"""
         return self.possible_terminals_by_node_strong
 
+    def get_node_values(self):
+        """get: the value of x_i^k by node i and terminal k"""
+        return {
+            i: dict(zip(self.terminals, row.tolist()))
+            for i, row in zip(self._nodes, self.x_values)
+        }
+
+    def get_node_value_array(self):
+        """get: self.x_values, by node (in graph order) and terminal"""
+        return self.x_values
+
     def get_source_sets(self):
         """get: self.source_sets"""
         return self.source_sets
 
     def solve_ip(self):
         """Solves the Integer Program."""
-        self._initialize_model()
-        self._initialize_node_variables_ip()
-        self._initialize_edge_variables_ip()
-        self._initialize_objective()
-        self._initialize_contraint_nodes()
-        self._initialize_constraint_edges()
-        self._initialize_constraint_terminals()
-        self._run_solver()
-        self._calculate_cut_value()
+        if self._uses_pulp(integral=True):
+            self._initialize_model()
+            self._initialize_node_variables_ip()
+            self._initialize_edge_variables_ip()
+            self._initialize_objective()
+            self._initialize_contraint_nodes()
+            self._initialize_constraint_edges()
+            self._initialize_constraint_terminals()
+            self._run_solver()
+        else:
+            self._solve_matrix(integral=True)
         self._calculate_source_sets()
 
     def solve_lp(self):
         """Solves the Linear Program."""
-        self._initialize_model()
-        self._initialize_node_variables_lp()
-        self._initialize_edge_variables_lp()
-        self._initialize_objective()
-        self._initialize_contraint_nodes()
-        self._initialize_constraint_edges()
-        self._initialize_constraint_terminals()
-        self._run_solver()
-        self._calculate_cut_value()
+        if self._uses_pulp(integral=False):
+            self._initialize_model()
+            self._initialize_node_variables_lp()
+            self._initialize_edge_variables_lp()
+            self._initialize_objective()
+            self._initialize_contraint_nodes()
+            self._initialize_constraint_edges()
+            self._initialize_constraint_terminals()
+            self._run_solver()
+        else:
+            self._solve_matrix(integral=False)
         self._calculate_source_sets()
         self._calculate_possible_terminals_by_node_weak()
         self._calculate_possible_terminals_by_node_strong()
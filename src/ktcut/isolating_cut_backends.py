@@ -0,0 +1,421 @@
+"""Maximum-flow backends for computing minimum isolating cuts."""
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from networkx.algorithms.flow import preflow_push
+from scipy.sparse.csgraph import breadth_first_order
+from scipy.sparse.csgraph import maximum_flow
+from ktcut.deadline import check_deadline
+
+# graphs with fewer adjacency entries than this use the networkx backend
+AUTO_BACKEND_ENTRY_THRESHOLD = 100
+
+# the most flows chained through their base; a warm started flow whose
+#   initial flow has this many is stored whole instead
+MAXIMUM_FLOW_CHAIN = 4
+
+# total (scaled) capacity of the graph handed to scipy, which requires int32
+_MAXIMUM_TOTAL_CAPACITY = 2 ** 30
+
+
+class IsolatingFlow:
+    """A maximum flow of an isolating cut, stored by the vertex ids it joins.
+
+    Contraction never renumbers vertices, so the flow stays feasible in any
+        graph contracted further: the flow along an edge is moved onto the
+        edge between the supervertices of its endpoints, and flow between
+        vertices merged into the same supervertex disappears.
+
+    A warm started flow only stores the flow added to its initial flow,
+        which it keeps as its base. The children of a node share its flow
+        as their base, so each holds just the flow its own repair added.
+        A chain holds at most MAXIMUM_FLOW_CHAIN flows, so that neither
+        the memory it keeps alive nor the cost of entry_flows grows with
+        the depth of the node.
+
+    Attributes:
+        tails: the vertex at the tail of each arc carrying flow
+        heads: the vertex at the head of each arc carrying flow
+        values: the (positive) flow along each arc
+        base: the flow to which this one is added (or None)
+        length: the number of flows in the chain, including this one
+            (kept by a flow sent to another process without its base)
+    """
+
+    def __init__(self, tails, heads, values, base=None, length=None):
+        self.tails = tails
+        self.heads = heads
+        self.values = values
+        self.base = base
+        if length is None:
+            length = 1 if base is None else base.length + 1
+        self.length = length
+
+    @classmethod
+    def from_entry_flows(cls, graph, entry_flows, base=None, length=None):
+        """Stores the positive part of a net flow along each entry of graph."""
+        positive = entry_flows > 0
+        return cls(
+            graph.entry_tails()[positive],
+            graph.neighbors[positive],
+            entry_flows[positive],
+            base,
+            length,
+        )
+
+    @property
+    def nbytes(self):
+        """The bytes held by this flow, and not by its base."""
+        return self.tails.nbytes + self.heads.nbytes + self.values.nbytes
+
+    def without_base(self):
+        """This flow alone, to send to a process which holds (a copy of) its base."""
+        return IsolatingFlow(self.tails, self.heads, self.values, length=self.length)
+
+    def entry_flows(self, graph):
+        """The net flow along each adjacency entry of a contraction of the graph."""
+        flows = []
+        flow = self
+        while flow is not None:
+            flows.append(flow)
+            flow = flow.base
+        tails = graph.labels[np.concatenate([flow.tails for flow in flows])]
+        heads = graph.labels[np.concatenate([flow.heads for flow in flows])]
+        values = np.concatenate([flow.values for flow in flows])
+        keep = tails != heads
+        positions = _entry_positions(
+            graph,
+            np.concatenate((tails[keep], heads[keep])),
+            np.concatenate((heads[keep], tails[keep])),
+        )
+        return np.bincount(
+            positions,
+            weights=np.concatenate((values[keep], -values[keep])),
+            minlength=len(graph.neighbors),
+        )
+
+
+class IsolatingCutBackend:
+    """Computes minimum isolating cuts in a CompactGraph.
+
+    A minimum isolating cut separates all the source vertices from all the
+        sink vertices. The source set is the set of vertices which cannot
+        reach the sink vertices in the residual graph of a maximum flow.
+
+    Given a Deadline, a backend checks it before and after the maximum flow,
+        and raises DeadlineExceeded once it has expired.
+    """
+
+    name = None
+
+    def minimum_isolating_cut(
+        self, graph, source_vertices, sink_vertices, deadline=None
+    ):
+        """Compute a minimum isolating cut in a CompactGraph.
+
+        Params:
+            graph: the CompactGraph in which to compute the minimum isolating cut
+            source_vertices: vertex ids required to fall in the source set
+            sink_vertices: vertex ids required to fall in the sink set
+            deadline: a Deadline (or None)
+
+        Returns:
+            cut_source: the set of active vertex ids in the source set
+            cut_weight: the weight of the isolating cut
+        """
+        raise NotImplementedError
+
+    def isolating_cut_flow(
+        self, graph, source_vertices, sink_vertices, initial_flow=None, deadline=None
+    ):
+        """Compute a minimum isolating cut and the maximum flow which proves it.
+
+        Backends which cannot warm start ignore initial_flow and return no flow.
+
+        Params:
+            graph: the CompactGraph in which to compute the minimum isolating cut
+            source_vertices: vertex ids required to fall in the source set
+            sink_vertices: vertex ids required to fall in the sink set
+            initial_flow: an IsolatingFlow for the same source and sink
+                terminals in an ancestor of graph, used as a warm start
+            deadline: a Deadline (or None)
+
+        Returns:
+            cut_source: the set of active vertex ids in the source set
+            cut_weight: the weight of the isolating cut
+            flow: the IsolatingFlow of the maximum flow, with initial_flow
+                as its base if it was a feasible warm start (or None)
+        """
+        cut_source, cut_weight = self.minimum_isolating_cut(
+            graph, source_vertices, sink_vertices, deadline=deadline
+        )
+        return cut_source, cut_weight, None
+
+
+class NetworkxBackend(IsolatingCutBackend):
+    """Runs networkx preflow_push on a networkx copy of the active vertices."""
+
+    name = "networkx"
+
+    def minimum_isolating_cut(
+        self, graph, source_vertices, sink_vertices, deadline=None
+    ):
+        check_deadline(deadline)
+        cut = preflow_push_isolating_cut(
+            graph.to_networkx(), source_vertices, sink_vertices
+        )
+        check_deadline(deadline)
+        return cut
+
+
+class ScipyBackend(IsolatingCutBackend):
+    """Runs scipy's maximum_flow (Dinic) directly on the CSR arrays.
+
+    scipy requires integer capacities. Integer capacities are used as they
+        are. Otherwise, the capacities are scaled and rounded to integers,
+        so the cut is minimum up to rounding. The weight of the cut is always
+        computed from the original capacities. The 'auto' backend therefore
+        only chooses scipy for graphs with exact integer capacities.
+
+    With integer capacities, the backend warm starts from an initial flow:
+        the maximum flow is computed in the residual graph of the initial
+        flow, so the work scales with the flow still missing.
+    """
+
+    name = "scipy"
+
+    def minimum_isolating_cut(
+        self, graph, source_vertices, sink_vertices, deadline=None
+    ):
+        cut_source, cut_weight, _ = self.isolating_cut_flow(
+            graph, source_vertices, sink_vertices, deadline=deadline
+        )
+        return cut_source, cut_weight
+
+    def isolating_cut_flow(
+        self, graph, source_vertices, sink_vertices, initial_flow=None, deadline=None
+    ):
+        check_deadline(deadline)
+        vertex_count = graph.vertex_count
+        super_source, super_sink = vertex_count, vertex_count + 1
+        source_vertices = np.fromiter(source_vertices, dtype=np.int64)
+        sink_vertices = np.fromiter(sink_vertices, dtype=np.int64)
+        entry_tails = graph.entry_tails()
+        capacities, exact = _integer_capacities(graph.capacities)
+
+        entry_flows = np.zeros(len(capacities))
+        if initial_flow is not None and exact:
+            entry_flows = initial_flow.entry_flows(graph)
+        net_outflows = np.bincount(
+            entry_tails, weights=entry_flows, minlength=vertex_count
+        )
+        supplies = net_outflows[source_vertices]
+        demands = -net_outflows[sink_vertices]
+        if (
+            (supplies < 0).any()
+            or (demands < 0).any()
+            or (entry_flows > capacities).any()
+        ):
+            # not a feasible flow for these sources and sinks
+            initial_flow = None
+            entry_flows = np.zeros(len(capacities))
+            supplies = np.zeros(len(source_vertices))
+            demands = np.zeros(len(sink_vertices))
+
+        # the residual graph of the initial flow,
+        #   with a super-source and a super-sink of unbounded capacity
+        source_count, sink_count = len(source_vertices), len(sink_vertices)
+        tails = np.concatenate(
+            (
+                entry_tails,
+                np.full(source_count, super_source),
+                source_vertices,
+                sink_vertices,
+                np.full(sink_count, super_sink),
+            )
+        )
+        heads = np.concatenate(
+            (
+                graph.neighbors,
+                source_vertices,
+                np.full(source_count, super_source),
+                np.full(sink_count, super_sink),
+                sink_vertices,
+            )
+        )
+        residual_capacities = np.concatenate(
+            (
+                capacities - entry_flows,
+                _MAXIMUM_TOTAL_CAPACITY - supplies,
+                supplies,
+                _MAXIMUM_TOTAL_CAPACITY - demands,
+                demands,
+            )
+        ).astype(np.int32)
+        residual = sp.csr_matrix(
+            (residual_capacities, (tails, heads)),
+            shape=(vertex_count + 2, vertex_count + 2),
+        )
+        residual.eliminate_zeros()
+
+        additional_flow = maximum_flow(
+            residual, super_source, super_sink, method="dinic"
+        ).flow
+        check_deadline(deadline)
+
+        # the sink set is all vertices which reach the super-sink
+        #   along arcs with residual capacity
+        residual = (residual - additional_flow).tocsr()
+        residual.data = (residual.data > 0).astype(np.int8)
+        residual.eliminate_zeros()
+        cut_sink = breadth_first_order(
+            residual.transpose().tocsr(), super_sink, directed=True,
+            return_predecessors=False,
+        )
+
+        in_source = np.zeros(vertex_count + 2, dtype=bool)
+        in_source[graph.active_vertices] = True
+        in_source[cut_sink] = False
+        in_source = in_source[:vertex_count]
+
+        # determine the weight of the resulting minimum cut
+        crossing = in_source[entry_tails] & ~in_source[graph.neighbors]
+        cut_weight = float(graph.capacities[crossing].sum())
+
+        flow = None
+        if exact:
+            additional_flow = additional_flow.tocoo()
+            internal = (additional_flow.row < vertex_count) & (
+                additional_flow.col < vertex_count
+            )
+            positions = _entry_positions(
+                graph, additional_flow.row[internal], additional_flow.col[internal]
+            )
+            additional_entry_flows = np.bincount(
+                positions,
+                weights=additional_flow.data[internal],
+                minlength=len(capacities),
+            )
+            if initial_flow is not None and initial_flow.length >= MAXIMUM_FLOW_CHAIN:
+                flow = IsolatingFlow.from_entry_flows(
+                    graph, entry_flows + additional_entry_flows
+                )
+            else:
+                flow = IsolatingFlow.from_entry_flows(
+                    graph, additional_entry_flows, initial_flow
+                )
+
+        return set(np.flatnonzero(in_source).tolist()), cut_weight, flow
+
+
+BACKENDS = {
+    NetworkxBackend.name: NetworkxBackend,
+    ScipyBackend.name: ScipyBackend,
+}
+
+
+def get_backend(backend, graph=None):
+    """Chooses the isolating cut backend.
+
+    Args:
+        backend: an IsolatingCutBackend, the name of a backend, or 'auto'
+            to choose by the number of adjacency entries in graph (graphs
+            whose capacities are not exact integers always use networkx,
+            whose cuts are exactly minimum)
+        graph: the CompactGraph in which the cuts will be computed
+
+    Returns:
+        backend: an IsolatingCutBackend
+
+    Raises:
+        ValueError: if backend is not a valid backend name
+    """
+    if isinstance(backend, IsolatingCutBackend):
+        return backend
+    if backend == "auto":
+        if graph is not None and (
+            len(graph.neighbors) < AUTO_BACKEND_ENTRY_THRESHOLD
+            or not _integer_capacities(graph.capacities)[1]
+        ):
+            backend = NetworkxBackend.name
+        else:
+            backend = ScipyBackend.name
+    if backend not in BACKENDS:
+        raise ValueError("unknown isolating cut backend: %s" % backend)
+    return BACKENDS[backend]()
+
+
+def preflow_push_isolating_cut(graph, source_vertices, sink_vertices):
+    """Compute a minimum isolating cut in a networkx graph with preflow_push.
+
+    The graph is modified while the cut is computed and restored afterwards.
+
+    Params:
+        graph: the networkx graph in which to compute the minimum isolating cut
+        source_vertices: vertices required to fall in the source set
+        sink_vertices: vertices required to fall in the sink set
+
+    Returns:
+        cut_source: the source set of the isolating cut
+        cut_weight: the weight of the isolating cut
+    """
+
+    # construct auxiliary graph with super-source and super-sink nodes
+    graph.add_nodes_from(["s_node", "t_node"])
+    graph.add_edges_from(
+        [("s_node", source_adj_node) for source_adj_node in source_vertices]
+    )
+    graph.add_edges_from([(sink_adj_node, "t_node") for sink_adj_node in sink_vertices])
+
+    # find the residual graph after running a maximum flow algorithm
+    residual = preflow_push(graph, "s_node", "t_node")
+
+    # remove the edges which are saturated in the residual graph
+    cutset = [
+        (u, v, d) for u, v, d in residual.edges(data=True) if d["flow"] >= d["capacity"]
+    ]
+    residual.remove_edges_from(cutset)
+
+    # the sink set is all nodes which are reachable from the super-sink
+    #   after the saturated arcs have been removed
+    cut_sink = set(nx.shortest_path_length(residual, target="t_node"))
+    # the source set is all the nodes which are not in the sink set
+    cut_source = set(graph) - cut_sink
+
+    if cutset is not None:
+        residual.add_edges_from(cutset)
+
+    # determine the weight of the resulting minimum cut
+    cut_weight = residual.graph["flow_value"]
+
+    assert "s_node" in cut_source, " source node not included in source set "
+    assert "t_node" in cut_sink, " sink node not included in sink set "
+
+    cut_source -= {"s_node"}
+    cut_sink -= {"t_node"}
+
+    graph.remove_nodes_from(["s_node", "t_node"])
+
+    return cut_source, cut_weight
+
+
+def _integer_capacities(capacities):
+    """Integer capacities for scipy, scaled if they are not already integers.
+
+    Returns:
+        capacities: the integer capacities
+        exact: True if the capacities were not scaled
+    """
+    total = capacities.sum()
+    integral = np.array_equal(capacities, np.round(capacities))
+    if integral and total < _MAXIMUM_TOTAL_CAPACITY:
+        return capacities, True
+    return np.round(capacities * ((_MAXIMUM_TOTAL_CAPACITY - 1) / total)), False
+
+
+def _entry_positions(graph, tails, heads):
+    """The positions of the (tail, head) entries in the adjacency of graph."""
+    # NB: entries are sorted by tail and then by head
+    vertex_count = graph.vertex_count
+    entry_keys = graph.entry_tails().astype(np.int64) * vertex_count + graph.neighbors
+    return np.searchsorted(entry_keys, tails.astype(np.int64) * vertex_count + heads)
@@ -1,9 +1,36 @@
 """ Solves the k-Terminal Cut Problem with Isolation Branching. """
-from ktcut.lp_algorithm import lp_algorithm
+import time
+from ktcut.compact_graph import CompactGraph
+from ktcut.deadline import Deadline
+from ktcut.deadline import DeadlineExceeded
+from ktcut.graph_decomposition import GraphDecomposition
+from ktcut.graph_reduction import GraphReduction
 from ktcut.isolation_branching_tree import IsolationBranchingTree
+from ktcut.isolation_branching_tree import sum_statistics
+from ktcut.solver_profile import combine_profiles
 
 
-def isolation_branching(graph, terminals, persistence=None, reporting=True, time_limit=600):
+def isolation_branching(
+    graph,
+    terminals,
+    persistence=None,
+    reporting=True,
+    time_limit=600,
+    absolute_gap=0.0,
+    relative_gap=0.0,
+    node_limit=None,
+    backend="auto",
+    warm_start=True,
+    strategy="best_first",
+    processes=1,
+    workers=1,
+    reduce=True,
+    decompose=True,
+    local_search=True,
+    branching="highest_degree",
+    profile=False,
+    deadline=None,
+):
     """Solves k-Terminal Cut for given graph and terminals.
 
     The k-terminal cut partitions the graph into k sets
@@ -17,30 +44,206 @@ def isolation_branching(graph, terminals, persistence=None, reporting=True, time
         graph: the networkx graph in which to find the multi-terminal cut
         terminals: the terminals of the networkx graph
         persistence: if persistence is assumed [strong, weak, None]
-        reporting: if the branching solver should print results as it goes
+        reporting: if the branching solver should print its progress as it goes
         time_limit: the time after which to terminate,
-            even if the optimal solution has not yet been reached.
+            even if the optimal solution has not yet been reached
+            (counted from the call, so reduction and decomposition
+            take their share of it).
+        absolute_gap: the largest difference between the cut value and the
+            lower bound at which to terminate (in each subproblem)
+        relative_gap: the largest difference between the cut value and the
+            lower bound, as a fraction of the cut value, at which to
+            terminate (in each subproblem)
+        node_limit: the number of explored nodes after which to terminate
+            (in each subproblem, None for no limit)
+        backend: the maximum-flow backend for isolating cuts
+            ['auto', 'networkx', 'scipy']
+        warm_start: if child isolating cuts are repaired from the parent's
+            maximum flows instead of being recomputed (scipy backend only)
+        strategy: the order in which nodes are explored
+            [best_first, depth_first, best_estimate, hybrid]
+        processes: the size of the process pool in which the children
+            of each node are constructed concurrently
+        workers: the number of processes which explore the tree concurrently,
+            sharing the incumbent and stealing nodes from each other
+        reduce: if safe reductions shrink the graph before branching
+        decompose: if the graph is split at its connected components and
+            articulation vertices into subproblems, solved one by one
+        local_search: if partial assignments are completed by local search
+            to improve the incumbent during branching
+        branching: the rule which chooses the vertex to branch on
+            [highest_degree, strong, pseudo_cost, reliability]
+        profile: if the time and calls of each phase of the solve, the depths
+            of the nodes and the bytes held by the frontier are kept in
+            report["Profile"] (see SolverProfile)
+        deadline: a Deadline shared by the reduction, the decomposition and
+            the subproblems, which stops the search inside its longest
+            phases when it expires or is cancelled (the best partition
+            found is returned, and report["Gap"] bounds its distance from
+            the optimum)
 
     Returns:
         source_sets: the partition of the nodes of the graph which defines the minimum cut
         cut_value: the weight of the optimal multi-terminal cut
         report: the final values in the Isolation Branching tree
     """
+    start_time = time.time()
+    deadline = Deadline(time_limit, parent=deadline)
+
     for u, v in graph.edges:
         if "capacity" in graph[u][v]:
             continue
         else:
             graph[u][v]["capacity"] = 1.0
 
-    if persistence in {"strong", "weak"}:
-        terminals_by_vertex = lp_algorithm(graph, terminals, persistence=persistence)
-    else:
-        terminals_by_vertex = {node: terminals for node in graph.nodes()}
+    # NB: the solver runs on integer vertex ids;
+    # networkx is only used to read the input and label the output
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+
+    # NB: the solver graph keeps the names of the input graph
+    reduction = None
+    solver_graph, solver_terminals = compact_graph, vertex_terminals
+    if reduce:
+        reduction = GraphReduction(compact_graph, vertex_terminals, deadline)
+        reduction.reduce()
+        solver_graph = reduction.get_graph()
+        solver_terminals = reduction.get_terminals()
+
+    decomposition = None
+    subproblems = [(solver_graph, solver_terminals, None)]
+    if decompose:
+        decomposition = GraphDecomposition(solver_graph, solver_terminals, deadline)
+        try:
+            decomposition.decompose()
+            subproblems = decomposition.get_subproblems()
+        except DeadlineExceeded:
+            # NB: the graph is then solved whole, which stops at once
+            decomposition = None
+
+    vertex_source_sets = {terminal: set() for terminal in solver_terminals}
+    cut_value, reports = 0.0, []
+    for subproblem_graph, subproblem_terminals, vertices in subproblems:
+        (
+            subproblem_source_sets,
+            subproblem_cut_value,
+            subproblem_report,
+        ) = _solve_subproblem(
+            subproblem_graph,
+            subproblem_terminals,
+            persistence=persistence,
+            reporting=reporting,
+            time_limit=time_limit - (time.time() - start_time),
+            absolute_gap=absolute_gap,
+            relative_gap=relative_gap,
+            node_limit=node_limit,
+            backend=backend,
+            warm_start=warm_start,
+            strategy=strategy,
+            processes=processes,
+            workers=workers,
+            local_search=local_search,
+            branching=branching,
+            profile=profile,
+            deadline=deadline,
+        )
+        for terminal, source_set in subproblem_source_sets.items():
+            if vertices is None:
+                vertex_source_sets[terminal] |= source_set
+            else:
+                vertex_source_sets[int(vertices[terminal])] |= set(
+                    vertices[sorted(source_set)].tolist()
+                )
+        cut_value += subproblem_cut_value
+        reports.append(subproblem_report)
+
+    report = _combine_reports(reports)
+    if decomposition is not None:
+        vertex_source_sets = decomposition.restore(vertex_source_sets)
+        report["Decomposition"] = decomposition.report
+    if reduction is not None:
+        vertex_source_sets = reduction.restore(vertex_source_sets)
+        report["Reductions"] = reduction.report
+
+    source_sets = {
+        compact_graph.names[terminal]: set(compact_graph.vertex_names(source_set))
+        for terminal, source_set in vertex_source_sets.items()
+    }
+
+    return source_sets, round(cut_value, 8), report
+
+
+def _solve_subproblem(
+    graph,
+    terminals,
+    persistence,
+    reporting,
+    time_limit,
+    absolute_gap,
+    relative_gap,
+    node_limit,
+    **options
+):
+    """Solves k-Terminal Cut in a CompactGraph with an Isolation Branching tree.
 
+    Returns:
+        source_sets: the vertex ids in the source set of each terminal
+        cut_value: the weight of the multi-terminal cut
+        report: the final values in the Isolation Branching tree
+    """
     branch_and_bound_tree = IsolationBranchingTree(
-        graph, terminals=terminals, terminals_by_vertex=terminals_by_vertex
+        graph,
+        terminals=terminals,
+        terminals_by_vertex=[terminals] * graph.vertex_count,
+        persistence=persistence,
+        **options
+    )
+    source_sets, cut_value = branch_and_bound_tree.solve(
+        reporting=reporting,
+        time_limit=time_limit,
+        absolute_gap=absolute_gap,
+        relative_gap=relative_gap,
+        node_limit=node_limit,
     )
+    return source_sets, cut_value, branch_and_bound_tree.report
 
-    source_sets, cut_value = branch_and_bound_tree.solve(reporting=reporting, time_limit=time_limit)
 
-    return source_sets, cut_value, branch_and_bound_tree.report
+def _combine_reports(reports):
+    """The report of a single subproblem, or the totals over several subproblems."""
+    if len(reports) == 1:
+        return reports[0]
+    report = {
+        key: sum(subproblem_report[key] for subproblem_report in reports)
+        for key in [
+            "Gap",
+            "Best Upper Bound",
+            "Nodes Unexplored",
+            "Nodes Total",
+            "Nodes Explored",
+            "Nodes Pruned",
+            "Time Elapsed",
+        ]
+    }
+    report["Best Lower Bound"] = sum(
+        subproblem_report["Best Lower Bound"] for subproblem_report in reports
+    )
+    # NB: the search is optimal only if every subproblem was solved to optimality
+    report["Status"] = next(
+        (
+            subproblem_report["Status"]
+            for subproblem_report in reports
+            if subproblem_report["Status"] != "optimal"
+        ),
+        "optimal",
+    )
+    for key in ["Branching", "Persistence"]:
+        if any(key in subproblem_report for subproblem_report in reports):
+            report[key] = sum_statistics(
+                subproblem_report.get(key, {}) for subproblem_report in reports
+            )
+    if any("Profile" in subproblem_report for subproblem_report in reports):
+        report["Profile"] = combine_profiles(
+            subproblem_report["Profile"] for subproblem_report in reports
+        )
+    report["Subproblems"] = reports
+    return report
@@ -1,21 +1,52 @@
 """Defines a Node in the Branch and Bound Tree for Isolation Branching."""
-from copy import deepcopy
+from collections import namedtuple
+import numpy as np
 from ktcut.contract_vertices import contract_vertex
 from ktcut.contract_vertices import contract_vertices
-from ktcut.minimum_isolating_cut import minimum_isolating_cut
+from ktcut.deadline import DeadlineExceeded
+from ktcut.deadline import check_deadline
+from ktcut.isolating_cut_backends import IsolatingFlow
+from ktcut.isolating_cut_backends import get_backend
+from ktcut.solver_profile import phase
+
+# the result of expanding a child node, which is all the child keeps
+ChildExpansion = namedtuple(
+    "ChildExpansion", ["contracted_vertices", "lower_bound", "upper_bound", "flow"]
+)
 
 
 class IsolationBranchingNode:
     """Node in the isolation branching tree for k-terminal cut.
 
+    A node only keeps its graph while it is in use. Otherwise, it stores the
+        vertices contracted into new_vertex_terminal since its parent, and
+        rebuilds its graph on demand from the nearest ancestor holding one.
+
     Attributes:
-        input_graph: a graph in which all previous isolating cuts
+        input_graph: a CompactGraph in which all previous isolating cuts
             have been merged to terminals
-        input_terminals: terminals in the graph
+        input_terminals: terminal vertex ids in the graph
         new_vertex: the lonely vertex to add to a terminal
             from the parent node
         new_vertex_terminal: the terminal to add the lonely vertex
             from the parent node
+        parent: the parent node (None for the first node)
+        backend: the IsolatingCutBackend used to find isolating cuts
+        flows: the latest IsolatingFlow of each terminal's isolating cut,
+            used to warm start the isolating cuts of children
+            (None if warm starts are disabled). The flow of
+            new_vertex_terminal only holds what was added to the parent's.
+        contracted_vertices: the vertices contracted into new_vertex_terminal
+            since the parent node, including new_vertex
+        expansion: a ChildExpansion computed elsewhere (e.g. in a worker
+            process), in which case the node does not compute its own
+        path: for a node without parent which was rebuilt in another process,
+            the contractions which led to it from the first node
+        unassigned_count: the number of unassigned vertices in the graph
+        profile: the SolverProfile which times the phases of the node
+            (shared with its parent, None if the solve is not profiled)
+        deadline: the Deadline of the solve, checked before the isolating
+            cut of a child (shared with its parent, or None)
     """
 
     def __init__(
@@ -25,64 +56,217 @@ class IsolationBranchingNode:
         new_vertex,
         new_vertex_terminal,
         depth=0,
+        parent=None,
+        backend="auto",
+        flows=None,
+        expansion=None,
+        path=None,
+        profile=None,
+        deadline=None,
     ):
 
-        # deep copy at this level is important
-        self.graph = deepcopy(input_graph)
+        # NB: contractions of a CompactGraph return a new graph,
+        # so the parent's graph is never modified
+        self._graph = input_graph
         self.terminals = input_terminals
         self.new_vertex = new_vertex
         self.new_vertex_terminal = new_vertex_terminal
         self.depth = depth
+        self.parent = parent
+        self.backend = backend
+        # NB: flows are shared with the parent, so the dictionary is copied
+        self.flows = dict(flows) if flows is not None else None
+        self.contracted_vertices = np.empty(0, dtype=np.int32)
+        self._path_prefix = path if path is not None else []
+        self.profile = parent.profile if parent is not None else profile
+        self.deadline = parent.deadline if parent is not None else deadline
+
+        # NB: contracting vertices into a terminal keeps the weighted degree
+        # of every unassigned vertex, so the vertices are ordered once and
+        # each node only skips past those assigned since the ordering
+        self._vertex_order = None
+        self._order_position = 0
+        if parent is not None:
+            self._vertex_order = parent._vertex_order
+            self._order_position = parent._order_position
 
         self.children = []
 
-        # run expansions
-        if self.new_vertex is not None and self.new_vertex_terminal is not None:
-            self._source_set_add_vertex()
-            self._source_set_isolating_cut()
+        if expansion is not None:
+            # the graph is rebuilt from the parent when needed
+            self._graph = None
+            self.contracted_vertices = expansion.contracted_vertices
+            self.lower_bound = expansion.lower_bound
+            self.upper_bound = expansion.upper_bound
+            if self.flows is not None:
+                self.flows[self.new_vertex_terminal] = self._rebased(expansion.flow)
 
-        terminal_terminal_capacity, terminal_vertex_capacity = self._sum_of_terminal_adjacent_edges()
+        else:
+            # run expansions
+            if self.new_vertex is not None and self.new_vertex_terminal is not None:
+                check_deadline(self.deadline)
+                self._source_set_add_vertex()
+                self._source_set_isolating_cut()
 
-        self.lower_bound = terminal_terminal_capacity + terminal_vertex_capacity / 2.0
-        self.upper_bound = terminal_terminal_capacity + terminal_vertex_capacity
+            with phase(self.profile, "Bound Computation"):
+                (
+                    terminal_terminal_capacity,
+                    terminal_vertex_capacity,
+                ) = self._sum_of_terminal_adjacent_edges()
 
-    def _source_set_add_vertex(self):
-        # copy required because we try adding the same vertex
-        # to several source sets
-        self.graph = contract_vertex(
-            self.graph, self.new_vertex_terminal, self.new_vertex
-        )
+            self.lower_bound = (
+                terminal_terminal_capacity + terminal_vertex_capacity / 2.0
+            )
+            self.upper_bound = terminal_terminal_capacity + terminal_vertex_capacity
 
-    def _source_set_isolating_cut(self):
-        source_set, weight = minimum_isolating_cut(
-            self.graph,
-            source_vertices={self.new_vertex_terminal},
-            sink_vertices=set(self.terminals) - {self.new_vertex_terminal},
+        if parent is not None:
+            self.unassigned_count = parent.unassigned_count - len(
+                self.contracted_vertices
+            )
+        else:
+            self.unassigned_count = len(self.unassigned_vertices)
+
+    @property
+    def graph(self):
+        """The contracted graph of this node, rebuilt if it was released."""
+        if self._graph is None:
+            with phase(self.profile, "Graph Copy"):
+                self._graph = self._rebuild_graph()
+        return self._graph
+
+    @property
+    def nbytes(self):
+        """The bytes held by this node and not by its parent."""
+        nbytes = self.contracted_vertices.nbytes
+        parent_graph = self.parent._graph if self.parent is not None else None
+        if self._graph is not None and self._graph is not parent_graph:
+            nbytes += self._graph.nbytes
+        if self.flows is not None:
+            flows = self.flows.values() if self.parent is None else [
+                self.flows.get(self.new_vertex_terminal)
+            ]
+            nbytes += sum(flow.nbytes for flow in flows if flow is not None)
+        return nbytes
+
+    @property
+    def expansion(self) -> ChildExpansion:
+        """What a parent in another process needs to construct this node."""
+        flow = None
+        if self.flows is not None:
+            flow = self.flows.get(self.new_vertex_terminal)
+        return ChildExpansion(
+            self.contracted_vertices, self.lower_bound, self.upper_bound, flow
         )
-        self.graph = contract_vertices(
-            self.graph,
-            self.new_vertex_terminal,
-            source_set - {self.new_vertex_terminal},
+
+    def _rebased(self, flow):
+        """The flow of an expansion, added to the flow the parent holds.
+
+        An expansion from another process comes without its base (or with
+            a copy of it), which the flow of the parent replaces, so that
+            it is shared.
+        """
+        if flow is None or flow.length == 1:
+            return flow
+        return IsolatingFlow(
+            flow.tails,
+            flow.heads,
+            flow.values,
+            self.flows.get(self.new_vertex_terminal),
         )
 
-    def _construct_child_node(self, new_vertex, new_vertex_terminal):
+    def release_graph(self):
+        """Drops the graph of this node, keeping only the contracted vertices.
+
+        The first node has no parent to rebuild from, so it keeps its graph.
+        """
+        if self.parent is not None:
+            self._graph = None
+
+    def release_explored(self):
+        """Drops everything but what the children need to rebuild their graphs."""
+        self.children = []
+        self.flows = None
+        self.release_graph()
+
+    def path(self):
+        """The (terminal, contracted vertices) pairs from the first node to here."""
+        node, contractions = self, []
+        while node.parent is not None:
+            contractions.append((node.new_vertex_terminal, node.contracted_vertices))
+            node = node.parent
+        return node._path_prefix + contractions[::-1]
+
+    def _rebuild_graph(self):
+        """Applies the contractions since the nearest ancestor holding a graph."""
+        node, contractions = self, []
+        while node._graph is None:
+            contractions.append((node.new_vertex_terminal, node.contracted_vertices))
+            node = node.parent
+
+        # NB: every contracted vertex merges directly into a terminal,
+        # which remains its own supervertex, so one mapping suffices
+        return node._graph.contract_groups(contractions)
+
+    def _source_set_add_vertex(self):
+        with phase(self.profile, "Contraction"):
+            self._graph = contract_vertex(
+                self._graph, self.new_vertex_terminal, self.new_vertex
+            )
+
+    def _source_set_isolating_cut(self):
+        # contracting new_vertex only added to the source, so the previous
+        # flow of this terminal remains feasible and is repaired, not recomputed
+        initial_flow = None
+        if self.flows is not None:
+            initial_flow = self.flows.get(self.new_vertex_terminal)
+        with phase(self.profile, "Max Flow"):
+            backend = get_backend(self.backend, self._graph)
+            source_set, weight, flow = backend.isolating_cut_flow(
+                self._graph,
+                source_vertices={self.new_vertex_terminal},
+                sink_vertices=set(self.terminals) - {self.new_vertex_terminal},
+                initial_flow=initial_flow,
+                deadline=self.deadline,
+            )
+        if self.flows is not None:
+            self.flows[self.new_vertex_terminal] = flow
+        with phase(self.profile, "Cut Extraction"):
+            source_set -= {self.new_vertex_terminal}
+            self.contracted_vertices = np.array(
+                [self.new_vertex] + sorted(source_set), dtype=np.int32
+            )
+        with phase(self.profile, "Contraction"):
+            self._graph = contract_vertices(
+                self._graph,
+                self.new_vertex_terminal,
+                source_set,
+            )
+
+    def _construct_child_node(self, new_vertex, new_vertex_terminal, expansion=None):
         """Creates a new child of this tree node.
 
         Creates a new child of this tree node by adding new_node to
-            the source set of new_vertex_terminal.
+            the source set of new_vertex_terminal. The child releases
+            its graph once its bounds are known.
 
         Params:
             new_node: the node to be added (previously lonely)
             new_source_set: the set this new node will be added to
+            expansion: the ChildExpansion of the child, if already computed
         """
         child = IsolationBranchingNode(
-            self.graph,
+            self.graph if expansion is None else None,
             self.terminals,
             new_vertex,
             new_vertex_terminal,
             depth=self.depth + 1,
+            parent=self,
+            backend=self.backend,
+            flows=self.flows,
+            expansion=expansion,
         )
         assert child.lower_bound >= self.lower_bound, "created bad child."
+        child.release_graph()
         self.children.append(child)
 
     def _sum_of_terminal_adjacent_edges(self):
@@ -94,25 +278,92 @@ class IsolationBranchingNode:
             terminal_vertex_capacity_sum: total weight of edges between a
                 terminal and a non-terminal vertex.
         """
+        terminal_mask = self._terminal_mask()
         terminal_terminal_capacity_sum = 0.0
         terminal_vertex_capacity_sum = 0.0
         for terminal in self.terminals:
-            neighbors = self.graph[terminal]
-            for neighbor in neighbors:
-                if neighbor in self.terminals:
-                    terminal_terminal_capacity_sum += self.graph[terminal][neighbor]["capacity"]
-                else:
-                    terminal_vertex_capacity_sum += self.graph[terminal][neighbor]["capacity"]
+            neighbors, capacities = self.graph.adjacency(terminal)
+            to_terminal = terminal_mask[neighbors]
+            terminal_terminal_capacity_sum += float(capacities[to_terminal].sum())
+            terminal_vertex_capacity_sum += float(capacities[~to_terminal].sum())
         return terminal_terminal_capacity_sum / 2.0, terminal_vertex_capacity_sum
 
-    def construct_children_nodes(self, unassigned_vertex, allowed_terminals):
-        """Runs _add_child for each possible source set."""
+    def _terminal_mask(self):
+        terminal_mask = np.zeros(self.graph.vertex_count, dtype=bool)
+        terminal_mask[list(self.terminals)] = True
+        return terminal_mask
+
+    def construct_children_nodes(
+        self, unassigned_vertex, allowed_terminals, pool=None, expansions=None
+    ):
+        """Runs _add_child for each possible source set.
+
+        Params:
+            unassigned_vertex: the vertex to branch on
+            allowed_terminals: the terminals to which it may be assigned
+            pool: a ChildNodePool which expands the children concurrently
+            expansions: the ChildExpansion of each child, if already computed
+
+        Raises:
+            DeadlineExceeded: if the deadline expires first (the children
+                constructed so far are dropped)
+        """
         assert not self.children, "children already created"
-        for terminal in allowed_terminals:
-            self._construct_child_node(new_vertex=unassigned_vertex, new_vertex_terminal=terminal)
+        if expansions is None and pool is not None and len(allowed_terminals) > 1:
+            expansions = pool.expand_children(
+                self, unassigned_vertex, allowed_terminals
+            )
+        elif expansions is None:
+            expansions = [None] * len(allowed_terminals)
+        try:
+            for terminal, expansion in zip(allowed_terminals, expansions):
+                self._construct_child_node(
+                    new_vertex=unassigned_vertex,
+                    new_vertex_terminal=terminal,
+                    expansion=expansion,
+                )
+        except DeadlineExceeded:
+            self.children = []
+            raise
 
     @property
-    def unassigned_vertices(self) -> set:
+    def unassigned_vertices(self) -> np.ndarray:
         """Finds the vertices in the graph which are unassigned."""
-        unassigned_vertices = set(self.graph.nodes()) - set(self.terminals)
-        return unassigned_vertices
+        active_vertices = self.graph.active_vertices
+        return active_vertices[~self._terminal_mask()[active_vertices]]
+
+    def highest_degree_vertices(self, count=1):
+        """The unassigned vertices of largest weighted degree, largest first.
+
+        Ties go to the smallest vertex id. The ordering is shared with the
+            descendants of the node which made it, and the position of the
+            first unassigned vertex only moves forward.
+
+        Params:
+            count: the largest number of vertices to return
+
+        Returns:
+            vertices: a list of at most count unassigned vertex ids
+        """
+        if self._vertex_order is None:
+            unassigned_vertices = self.unassigned_vertices
+            degrees = self.graph.weighted_degrees()[unassigned_vertices]
+            self._vertex_order = unassigned_vertices[
+                np.argsort(-degrees, kind="stable")
+            ].tolist()
+        order, labels = self._vertex_order, self.graph.labels
+        while (
+            self._order_position < len(order)
+            and labels[order[self._order_position]] != order[self._order_position]
+        ):
+            self._order_position += 1
+
+        # NB: the ordering is scanned in place, as a slice would copy its rest
+        vertices = []
+        position = self._order_position
+        while position < len(order) and len(vertices) < count:
+            vertex = order[position]
+            if labels[vertex] == vertex:
+                vertices.append(vertex)
+            position += 1
+        return vertices
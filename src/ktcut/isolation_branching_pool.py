@@ -0,0 +1,161 @@
+"""Constructs the children of a Node in parallel for Isolation Branching."""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+from ktcut.deadline import CANCEL_POLL_INTERVAL
+from ktcut.deadline import SharedDeadline
+from ktcut.isolating_cut_backends import IsolatingFlow
+from ktcut.isolation_branching_node import IsolationBranchingNode
+
+_GRAPH_ARRAYS = ["offsets", "neighbors", "capacities", "labels"]
+
+# in a pool process, the cancellation flag shared with the parent process
+_cancelled_flag = None
+
+
+class ChildNodePool:
+    """Expands the children of a node concurrently in a process pool.
+
+    The parent's graph is written once into a shared memory block, which the
+        workers map without copying. Each task only ships the new vertex,
+        its terminal and the parent's flow for that terminal (as its net
+        flow along each entry of the graph, not as a chain of flows), and
+        returns the ChildExpansion of the child, whose flow leaves its base
+        behind.
+
+    The pool processes share a cancellation flag with the parent, which
+        sets it once it sees the deadline of the node cancelled, so that
+        the tasks stop as the workers of a ParallelSearch do.
+
+    Attributes:
+        processes: the number of worker processes
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._cancelled = multiprocessing.Value("b", 0)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_share_cancelled_flag,
+            initargs=(self._cancelled,),
+        )
+
+    def expand_children(self, node, unassigned_vertex, allowed_terminals):
+        """Expands the children of node, one per allowed terminal.
+
+        Returns:
+            expansions: the ChildExpansion of each child, in the order of
+                allowed_terminals
+        """
+        self._check_cancelled(node.deadline)
+        memory, layout = _share_graph(node.graph)
+        try:
+            futures = []
+            for terminal in allowed_terminals:
+                flow = node.flows.get(terminal) if node.flows is not None else None
+                futures.append(
+                    self._executor.submit(
+                        _expand_child,
+                        memory.name,
+                        layout,
+                        node.terminals,
+                        unassigned_vertex,
+                        terminal,
+                        node.backend,
+                        flow.entry_flows(node.graph) if flow is not None else None,
+                        flow.length if flow is not None else None,
+                        node.flows is not None,
+                        node.deadline,
+                    )
+                )
+            # NB: every child maps the block, even if another raised
+            while wait(futures, timeout=CANCEL_POLL_INTERVAL).not_done:
+                self._check_cancelled(node.deadline)
+            return [future.result() for future in futures]
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+    def _check_cancelled(self, deadline):
+        """Passes the cancellation of deadline on to the pool processes."""
+        if deadline is not None and deadline.cancelled:
+            self._cancelled.value = 1
+
+
+def _share_cancelled_flag(cancelled_flag):
+    """Keeps the cancellation flag of the parent, in a new pool process."""
+    global _cancelled_flag
+    _cancelled_flag = cancelled_flag
+
+
+def _share_graph(graph):
+    """Copies the arrays of graph into one shared memory block.
+
+    Returns:
+        memory: the SharedMemory block
+        layout: the (name, dtype, offset, length) of each array in the block
+    """
+    layout, size = [], 0
+    for name in _GRAPH_ARRAYS:
+        array = getattr(graph, name)
+        layout.append((name, array.dtype.str, size, len(array)))
+        # NB: keep every array aligned to 8 bytes
+        size += -(-array.nbytes // 8) * 8
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, dtype, offset, length in layout:
+        np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset)[:] = getattr(
+            graph, name
+        )
+    return memory, layout
+
+
+def _expand_child(
+    memory_name,
+    layout,
+    terminals,
+    new_vertex,
+    new_vertex_terminal,
+    backend,
+    entry_flows,
+    flow_length,
+    warm_start,
+    deadline,
+):
+    """Expands one child on the shared graph of its parent, in a worker process."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        arrays = {
+            name: np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset)
+            for name, dtype, offset, length in layout
+        }
+        graph = CompactGraph(names=None, **arrays)
+        flow = None
+        if entry_flows is not None:
+            # NB: the flow keeps the length of the parent's chain,
+            # so the backend collapses it as it would in the parent
+            flow = IsolatingFlow.from_entry_flows(
+                graph, entry_flows, length=flow_length
+            )
+        child = IsolationBranchingNode(
+            graph,
+            terminals,
+            new_vertex,
+            new_vertex_terminal,
+            backend=backend,
+            flows={new_vertex_terminal: flow} if warm_start else None,
+            deadline=SharedDeadline(deadline, _cancelled_flag),
+        )
+        expansion = child.expansion
+        if expansion.flow is not None:
+            expansion = expansion._replace(flow=expansion.flow.without_base())
+        # NB: views of the shared block must be gone before it is closed
+        del arrays, graph, child
+    finally:
+        memory.close()
+    return expansion
@@ -1,31 +1,127 @@
 """Defines a Root in the Branch and Bound Tree for Isolation Branching."""
-from copy import deepcopy
-from ktcut.contract_vertices import contract_vertices
-from ktcut.minimum_isolating_cut import minimum_isolating_cut
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+from ktcut.deadline import check_deadline
+from ktcut.isolating_cut_backends import get_backend
 
 
 class IsolationBranchingRoot:
-    """Pre-processing for isolation branching for k-terminal cut."""
+    """Pre-processing for isolation branching for k-terminal cut.
 
-    def __init__(self, graph, terminals):
-        self._graph = deepcopy(graph)
+    The k minimum isolating cuts are found with about log2(k) maximum flows
+        in the whole graph. Terminal i is put in the source set of the j-th
+        flow if bit j of i is set, so the vertices which fall on the side of
+        terminal i in every flow form a region around it. The regions are
+        disjoint, and each contains a minimum isolating cut of its terminal,
+        which a small flow inside the region then finds.
+
+    Attributes:
+        graph: the CompactGraph in which to find the isolating cuts
+        terminals: the terminal vertex ids
+        backend: the IsolatingCutBackend used to find the isolating cuts
+        deadline: a Deadline, checked before each maximum flow (or None)
+    """
+
+    def __init__(self, graph, terminals, backend="auto", deadline=None):
+        # NB: CompactGraph contractions return a new graph, so no copy is needed
+        self._graph = graph
         self._terminals = terminals
+        self._backend = backend
+        self._deadline = deadline
 
     def initial_isolating_cuts(self):
         """Performs the initial isolating cuts.
 
         The initial isolating cuts are the k minimum (s,t)-cuts
             that separate one terminal from the rest.
+
+        Raises:
+            DeadlineExceeded: if the deadline expires first (the graph is
+                then left as it was)
         """
-        for terminal in self._terminals:
-            source_set, weight = minimum_isolating_cut(
-                self._graph,
-                source_vertices={terminal},
-                sink_vertices=set(self._terminals) - {terminal},
+        regions = self._terminal_regions()
+        source_sets = self._region_isolating_cuts(regions)
+        self._graph = self._graph.contract_groups(zip(self._terminals, source_sets))
+
+    def _terminal_regions(self):
+        """Splits the terminals by the bits of their index.
+
+        Returns:
+            regions: the index of the terminal in whose region each vertex
+                lies (a vertex in no region has an index of k or more, and
+                a contracted vertex has index -1)
+        """
+        graph = self._graph
+        backend = get_backend(self._backend, graph)
+        regions = np.zeros(graph.vertex_count, dtype=np.int64)
+        for bit in range((len(self._terminals) - 1).bit_length()):
+            in_group = [index >> bit & 1 for index in range(len(self._terminals))]
+            source_set, _ = backend.minimum_isolating_cut(
+                graph,
+                source_vertices={t for t, i in zip(self._terminals, in_group) if i},
+                sink_vertices={t for t, i in zip(self._terminals, in_group) if not i},
+                deadline=self._deadline,
+            )
+            regions[list(source_set)] += 1 << bit
+        inactive = np.ones(graph.vertex_count, dtype=bool)
+        inactive[graph.active_vertices] = False
+        regions[inactive] = -1
+        return regions
+
+    def _region_isolating_cuts(self, regions):
+        """Finds the minimum isolating cut of each terminal inside its region.
+
+        Each region is cut out of the graph with the rest of the graph
+            merged into a single sink, so the flows together touch each
+            edge at most twice.
+
+        Returns:
+            source_sets: the source set of each terminal (as vertex ids)
+        """
+        graph = self._graph
+        terminal_count = len(self._terminals)
+        entry_tails = graph.entry_tails()
+        entry_regions = regions[entry_tails]
+
+        # NB: sort vertices and entries by region once,
+        # so each region is a slice of both
+        vertex_order = np.argsort(regions, kind="stable")
+        vertex_bounds = np.searchsorted(
+            regions[vertex_order], np.arange(terminal_count + 1)
+        )
+        entry_order = np.argsort(entry_regions, kind="stable")
+        entry_bounds = np.searchsorted(
+            entry_regions[entry_order], np.arange(terminal_count + 1)
+        )
+
+        source_sets = []
+        for index, terminal in enumerate(self._terminals):
+            check_deadline(self._deadline)
+            vertices = vertex_order[vertex_bounds[index]:vertex_bounds[index + 1]]
+            entries = entry_order[entry_bounds[index]:entry_bounds[index + 1]]
+            sink = len(vertices)
+            heads = graph.neighbors[entries]
+            local_tails = np.searchsorted(vertices, entry_tails[entries])
+            local_heads = np.searchsorted(vertices, heads)
+            outside = regions[heads] != index
+            local_heads[outside] = sink
+            # NB: edges inside the region appear once from each endpoint
+            keep = outside | (local_tails < local_heads)
+            region_graph = CompactGraph.from_edges(
+                sink + 1,
+                local_tails[keep],
+                local_heads[keep],
+                graph.capacities[entries][keep],
             )
-            self._graph = contract_vertices(
-                self._graph, terminal, source_set - {terminal}
+            backend = get_backend(self._backend, region_graph)
+            source_set, _ = backend.minimum_isolating_cut(
+                region_graph,
+                source_vertices={int(np.searchsorted(vertices, terminal))},
+                sink_vertices={sink},
+                deadline=self._deadline,
             )
+            source_sets.append(vertices[sorted(source_set)])
+        return source_sets
 
     def get_graph(self):
         return self._graph
@@ -0,0 +1,162 @@
+"""Defines the Node Scheduler of the Branch and Bound Tree for Isolation Branching."""
+import heapq
+import numpy as np
+
+SEARCH_STRATEGIES = ["best_first", "depth_first", "best_estimate", "hybrid"]
+
+# in the hybrid strategy, the number of depth-first pops after each best-first pop
+DIVE_LENGTH = 8
+
+
+class NodeScheduler:
+    """Unexplored nodes of the branch and bound tree in priority queues.
+
+    Every node is kept in a heap ordered by lower bound, which gives the best
+        unexplored lower bound in O(1). Strategies other than best-first also
+        keep each node in a heap of their own. A node popped from one heap is
+        removed lazily from the other. The incumbent (the node with the best
+        upper bound) is offered every new node, and the frontier is pruned
+        when the incumbent improves.
+
+    Search strategies:
+        best_first: the node with the lowest lower bound
+        depth_first: the deepest node, diving towards a leaf
+        best_estimate: the node with the lowest estimate of its best
+            completion, the midpoint of its lower and upper bounds
+        hybrid: one best-first pop followed by dive_length depth-first pops
+
+    Ties are broken in favor of the most recently pushed node.
+
+    Attributes:
+        strategy: the search strategy
+        dive_length: depth-first pops after each best-first pop (hybrid)
+        track_bytes: if the bytes held by the unexplored nodes are tracked
+        incumbent: the node with the best upper bound pushed so far
+        nbytes: the bytes held by the unexplored nodes (if track_bytes)
+        peak_nbytes: the most bytes held by the unexplored nodes (if track_bytes)
+    """
+
+    def __init__(
+        self, strategy="best_first", dive_length=DIVE_LENGTH, track_bytes=False
+    ):
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError("unknown search strategy: %s" % strategy)
+        self.strategy = strategy
+        self.dive_length = dive_length
+        self.track_bytes = track_bytes
+        self.incumbent = None
+        self.nbytes = 0
+        self.peak_nbytes = 0
+        self._lower_bound_heap = []
+        self._strategy_heap = []
+        self._removed = set()
+        self._pushed_count = 0
+        self._popped_count = 0
+        self._pruned_count = 0
+
+    def __len__(self):
+        return self._pushed_count - self._popped_count - self._pruned_count
+
+    @property
+    def best_lower_bound(self):
+        """The lowest lower bound among all unexplored nodes."""
+        self._discard_removed(self._lower_bound_heap)
+        if self._lower_bound_heap:
+            return self._lower_bound_heap[0][0]
+        else:
+            return np.inf
+
+    @property
+    def best_upper_bound(self):
+        """The lowest upper bound among all nodes pushed so far."""
+        if self.incumbent is not None:
+            return self.incumbent.upper_bound
+        else:
+            return np.inf
+
+    def update_incumbent(self, node):
+        """Makes node the incumbent if it has a better upper bound.
+
+        Returns:
+            improved: True if node became the incumbent
+        """
+        if self.incumbent is None or node.upper_bound < self.incumbent.upper_bound:
+            self.incumbent = node
+            return True
+        return False
+
+    def push(self, node):
+        """Adds an unexplored node."""
+        self._pushed_count += 1
+        if self.track_bytes:
+            self.nbytes += node.nbytes
+            self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+        order = -self._pushed_count
+        heapq.heappush(self._lower_bound_heap, (node.lower_bound, order, node))
+        if self.strategy in {"depth_first", "hybrid"}:
+            heapq.heappush(
+                self._strategy_heap, (-node.depth, node.lower_bound, order, node)
+            )
+        elif self.strategy == "best_estimate":
+            estimate = (node.lower_bound + node.upper_bound) / 2.0
+            heapq.heappush(
+                self._strategy_heap, (estimate, node.lower_bound, order, node)
+            )
+
+    def pop(self):
+        """Removes and returns the next node according to the search strategy."""
+        assert len(self), "no unexplored nodes"
+        if self._pops_best_first():
+            heap = self._lower_bound_heap
+        else:
+            heap = self._strategy_heap
+        self._discard_removed(heap)
+        entry = heapq.heappop(heap)
+        self._popped_count += 1
+        if self.strategy != "best_first":
+            # NB: the node remains in the other heap until it reaches the top
+            self._removed.add(entry[-2])
+        if self.track_bytes:
+            self.nbytes -= entry[-1].nbytes
+        return entry[-1]
+
+    def prune(self, upper_bound=np.inf):
+        """Removes every unexplored node which cannot improve on the incumbent.
+
+        Args:
+            upper_bound: an upper bound known elsewhere (e.g. in another
+                process), used if it is better than the incumbent's
+
+        Returns:
+            pruned_count: the number of nodes removed
+        """
+        upper_bound = min(self.best_upper_bound, upper_bound)
+
+        def is_live(entry):
+            # NB: entries end with (..., lower_bound, order, node)
+            return entry[-2] not in self._removed and entry[-3] < upper_bound
+
+        lower_bound_heap = [entry for entry in self._lower_bound_heap if is_live(entry)]
+        strategy_heap = [entry for entry in self._strategy_heap if is_live(entry)]
+        heapq.heapify(lower_bound_heap)
+        heapq.heapify(strategy_heap)
+        pruned_count = len(self) - len(lower_bound_heap)
+        self._lower_bound_heap = lower_bound_heap
+        self._strategy_heap = strategy_heap
+        self._removed = set()
+        self._pruned_count += pruned_count
+        if self.track_bytes:
+            self.nbytes = sum(entry[-1].nbytes for entry in lower_bound_heap)
+        return pruned_count
+
+    def _pops_best_first(self):
+        if self.strategy == "best_first":
+            return True
+        elif self.strategy == "hybrid":
+            return self._popped_count % (self.dive_length + 1) == 0
+        else:
+            return False
+
+    def _discard_removed(self, heap):
+        while heap and heap[0][-2] in self._removed:
+            self._removed.discard(heapq.heappop(heap)[-2])
@@ -1,83 +1,198 @@
 """Defines the overall Branch and Bound Tree for Isolation Branching."""
-import networkx as nx
 import numpy as np
-from typing import List
+from ktcut.branching_rules import get_branching_rule
+from ktcut.deadline import Deadline
+from ktcut.deadline import DeadlineExceeded
 from ktcut.isolation_branching_node import IsolationBranchingNode
+from ktcut.isolation_branching_pool import ChildNodePool
 from ktcut.isolation_branching_root import IsolationBranchingRoot
+from ktcut.isolation_branching_scheduler import NodeScheduler
+from ktcut.isolation_branching_workers import ParallelSearch
+from ktcut.isolating_cut_backends import get_backend
+from ktcut.local_search import local_search_partition
+from ktcut.lp_algorithm import lp_algorithm
+from ktcut.solver_profile import SolverProfile
+from ktcut.solver_profile import phase
+from collections import namedtuple
 import time
 
+# the seconds between progress snapshots of solve_iter, if nothing else changes
+PROGRESS_INTERVAL = 1.0
+
+# what solve_iter yields
+SolveProgress = namedtuple(
+    "SolveProgress",
+    [
+        "event",
+        "upper_bound",
+        "lower_bound",
+        "gap",
+        "nodes_explored",
+        "nodes_unexplored",
+        "time_elapsed",
+    ],
+)
+
 
 class IsolationBranchingTree:
     """Tree for isolation branching for k-terminal cut.
 
     Attributes:
-        terminals: the set of terminals
+        graph: the CompactGraph in which to find the k-terminal cut
+        terminals: the terminal vertex ids
+        terminals_by_vertex: the terminals allowed for each vertex id
+        backend: the isolating cut backend (or its name, or 'auto')
+        warm_start: if isolating cuts are warm started from the parent's flows
+            (the root cuts leave no flows, so the children of the first node
+            compute theirs from scratch)
+        strategy: the search strategy of the NodeScheduler
+        processes: the number of processes which construct children
+            concurrently (1 constructs them in this process)
+        workers: the number of processes which explore the tree concurrently,
+            each with its own frontier (1 explores it in this process)
+        local_search: if the partial assignment of the node being explored
+            is completed by local search, to improve the incumbent. It runs
+            on the first node, and then after 1, 2, 4, ... explored nodes.
+        branching: the BranchingRule which chooses the vertex to branch on
+            (or its name)
+        persistence: 'strong' or 'weak' to restrict terminals_by_vertex
+            by the LP relaxation of the graph left by the root isolating cuts.
+            Vertices left with a single terminal are contracted into it
+            before branching.
+        profile: if the phases of the solve are timed in a SolverProfile,
+            which the report then includes
+        deadline: a Deadline which stops the solve when it expires or is
+            cancelled, in addition to the time limit (or None)
         _root_node: the root node of the branch and bound tree
-        _unexplored_nodes: a list of the unexplored nodes in the tree
-        _all_nodes: a list of all nodes in the tree
+        _unexplored_nodes: a NodeScheduler of the unexplored nodes in the tree,
+            which also retains the incumbent node
         _done: if the algorithm terminated
+        _status: why the search stopped (None while it goes on)
         _active_node: the node which is currently being considered
         _start_time: when the branch and bound tree was initialized
+        _worker_reports: the report of each worker (if workers > 1)
+        _outside_lower_bound: the best lower bound left unexplored outside the
+            frontier: by the workers, or anywhere if the root isolating cuts
+            were cut short by the deadline
+        _deadline: the Deadline of the current solve, which expires at the
+            time limit or with the deadline given
     """
 
-    def __init__(self, graph, terminals, terminals_by_vertex):
-        self._root_node = IsolationBranchingRoot(graph, terminals)
+    def __init__(
+        self,
+        graph,
+        terminals,
+        terminals_by_vertex,
+        backend="auto",
+        warm_start=True,
+        strategy="best_first",
+        processes=1,
+        workers=1,
+        local_search=True,
+        branching="highest_degree",
+        persistence=None,
+        profile=False,
+        deadline=None,
+    ):
+        self._graph = graph
+        self._backend = get_backend(backend, graph)
+        self._warm_start = warm_start
+        self._strategy = strategy
+        self._processes = processes
+        self._workers = workers
+        self._local_search = local_search
+        self._branching_rule = get_branching_rule(branching)
+        self._persistence = persistence
+        self._persistence_fixed_count = 0
+        self._next_local_search = 1
+        self._pool: ChildNodePool = None
+        self._root_node: IsolationBranchingRoot = None
+        self._cancellation = deadline
+        self._deadline = Deadline(parent=deadline)
         self._terminals = terminals
         self._terminals_by_vertex = terminals_by_vertex
         self._done: bool = False
-        self._unexplored_nodes: List[IsolationBranchingNode] = None
-        self._all_nodes: List[IsolationBranchingNode] = None
+        self._profile = SolverProfile() if profile else None
+        self._unexplored_nodes: NodeScheduler = NodeScheduler(
+            strategy, track_bytes=profile
+        )
         self._active_node: IsolationBranchingNode = None
+        self._nodes_created_count: int = 0
         self._nodes_explored_count: int = 0
+        self._nodes_pruned_count: int = 0
         self._start_time = time.time()
-        self._reporting = None
+        self._status = None
+        self._worker_reports = []
+        self._outside_lower_bound = np.inf
 
     @property
     def best_unexplored_lower_bound(self):
         """The lowest lower bound among all unexplored nodes."""
-        if self._unexplored_nodes:
-            return min(node.lower_bound for node in self._unexplored_nodes)
-        else:
-            return 0.0
+        return min(self._unexplored_nodes.best_lower_bound, self._outside_lower_bound)
 
     @property
     def best_upper_bound(self):
         """The lowest upper bound among all nodes."""
-        if self._all_nodes:
-            return min(node.upper_bound for node in self._all_nodes)
-        else:
-            return np.inf
+        return self._unexplored_nodes.best_upper_bound
+
+    @property
+    def best_lower_bound(self):
+        """The lowest lower bound of any completion, at most the best upper bound."""
+        return min(self.best_unexplored_lower_bound, self.best_upper_bound)
 
     @property
     def unexplored_nodes_count(self):
-        return len(self._unexplored_nodes)
+        return len(self._unexplored_nodes) + sum(
+            report["Nodes Unexplored"] for report in self._worker_reports
+        )
 
     @property
     def total_nodes_count(self):
-        return len(self._all_nodes)
-
-    def _pop_node_with_best_lower_bound(self) -> IsolationBranchingNode:
-        self._unexplored_nodes.sort(key=lambda x: x.lower_bound, reverse=True)
-        # NB: pop() will return the last element of the list
-        return self._unexplored_nodes.pop()
-
-    def _pop_node_with_maximum_depth(self) -> IsolationBranchingNode:
-        self._unexplored_nodes.sort(key=lambda x: (x.depth, -x.lower_bound))
-        # NB: pop() will return the last element of the list
-        return self._unexplored_nodes.pop()
-
-    def _node_with_best_upper_bound(self) -> IsolationBranchingNode:
-        self._all_nodes.sort(key=lambda x: x.upper_bound)
-        return self._all_nodes[0]
-
-    def _choose_unassigned_vertex_highest_degree(self):
-        degrees = dict(nx.degree(self._active_node.graph, weight="capacity"))
-        degrees_restricted = {
-            node: node_degree
-            for node, node_degree in degrees.items()
-            if node in self._active_node.unassigned_vertices
-        }
-        return max(degrees_restricted, key=degrees_restricted.get)
+        return self._nodes_created_count
+
+    def _add_nodes(self, nodes):
+        """Updates the incumbent, then schedules the nodes which can improve on it."""
+        improved = False
+        for node in nodes:
+            improved |= self._unexplored_nodes.update_incumbent(node)
+        if improved:
+            self._nodes_pruned_count += self._unexplored_nodes.prune()
+
+        self._nodes_created_count += len(nodes)
+        if self._profile is not None:
+            self._profile.record_depths(nodes)
+        for node in nodes:
+            if node.lower_bound < self.best_upper_bound:
+                self._unexplored_nodes.push(node)
+            else:
+                self._nodes_pruned_count += 1
+
+    def _improve_incumbent(self, node):
+        """Completes the partial assignment of node by local search.
+
+        A better partition becomes the incumbent as a leaf node, in which
+            every vertex has been contracted into its terminal.
+        """
+        sides, cut_weight = local_search_partition(node.graph, self._terminals)
+        if cut_weight >= self.best_upper_bound:
+            return
+        contractions = [
+            (terminal, np.flatnonzero(sides == terminal))
+            for terminal in self._terminals
+        ]
+        leaf = IsolationBranchingNode(
+            node.graph.contract_groups(contractions),
+            self._terminals,
+            None,
+            None,
+            depth=node.depth,
+            backend=self._backend,
+            path=node.path() + contractions,
+            profile=self._profile,
+            deadline=self._deadline,
+        )
+        if self._unexplored_nodes.update_incumbent(leaf):
+            self._nodes_pruned_count += self._unexplored_nodes.prune()
 
     def _step(self):
         """One step of the branch-and-bound algorithm.
@@ -89,85 +204,459 @@ class IsolationBranchingTree:
         if self.best_unexplored_lower_bound < self.best_upper_bound:
 
             # Select a Node
-            self._active_node = self._pop_node_with_best_lower_bound()
+            with phase(self._profile, "Node Selection"):
+                self._active_node = self._unexplored_nodes.pop()
+
+            # NB: strategies other than best-first may pop a node
+            # which can no longer improve on the incumbent
+            if self._active_node.lower_bound >= self.best_upper_bound:
+                self._nodes_pruned_count += 1
+                return
 
-            # Reporting
-            if self._reporting:
-                print(self.report)
+            # Improve the Incumbent
+            if (
+                self._local_search
+                and self._nodes_explored_count >= self._next_local_search
+            ):
+                with phase(self._profile, "Local Search"):
+                    self._improve_incumbent(self._active_node)
+                self._next_local_search *= 2
+                if self._active_node.lower_bound >= self.best_upper_bound:
+                    self._nodes_pruned_count += 1
+                    return
 
-            # Select a Vertex
-            unassigned_vertex_chosen = self._choose_unassigned_vertex_highest_degree()
+            try:
+                # Select a Vertex
+                with phase(self._profile, "Vertex Selection"):
+                    unassigned_vertex_chosen = self._branching_rule.choose_vertex(
+                        self._active_node, self._terminals_by_vertex
+                    )
 
-            # Branch
-            self._active_node.construct_children_nodes(
-                unassigned_vertex_chosen,
-                self._terminals_by_vertex[unassigned_vertex_chosen],
+                # Branch
+                with phase(self._profile, "Child Expansion"):
+                    self._active_node.construct_children_nodes(
+                        unassigned_vertex_chosen,
+                        self._terminals_by_vertex[unassigned_vertex_chosen],
+                        pool=self._pool,
+                        expansions=self._branching_rule.expansions(
+                            self._active_node, unassigned_vertex_chosen
+                        ),
+                    )
+            except DeadlineExceeded:
+                # NB: the node remains unexplored, so its lower bound still counts
+                self._unexplored_nodes.push(self._active_node)
+                return
+            self._branching_rule.record(
+                self._active_node, unassigned_vertex_chosen, self._active_node.children
             )
 
             # NB: we do not need to worry about duplicate nodes
             # the nodes are constructed by forcing an assignment of
             # vertices to terminals. Thus, the resulting partitions
             # can never be identical
-            self._unexplored_nodes += self._active_node.children
-            self._all_nodes += self._active_node.children
+            self._add_nodes(self._active_node.children)
+            self._nodes_explored_count += 1
+
+            # the explored node is only kept as the parent of its children
+            self._active_node.release_explored()
 
         else:
             # if there are no unassigned vertices, we are at a leaf node
             self._done = True
 
-    def solve(self, reporting, time_limit=600):
+    def solve(
+        self,
+        reporting,
+        time_limit=600,
+        absolute_gap=0.0,
+        relative_gap=0.0,
+        node_limit=None,
+    ):
         """Solves k-terminal cut using Isolation Branching.
 
         Args:
-            reporting: True if reports should be printed at every step of the
-                Isolation Branching algorithm.
+            reporting: True if the progress of the Isolation Branching
+                algorithm should be printed as it goes (see solve_iter),
+                followed by the final report.
             time_limit: the time limit, in seconds, after which the algorithm
                 will terminate even if it does not reach an optimal solution.
+            absolute_gap: the algorithm terminates once the best upper bound
+                is within absolute_gap of the best lower bound.
+            relative_gap: the algorithm terminates once the best upper bound
+                is within relative_gap (a fraction of the best upper bound)
+                of the best lower bound.
+            node_limit: the number of explored nodes after which the
+                algorithm terminates (None for no limit).
 
         Returns:
-            source_sets: the nodes that remain connected to each terminal
+            source_sets: the vertex ids that remain connected to each terminal
             cut_value: the cost of the multi-terminal cut
         """
-        self._reporting = reporting
-        self._root_node.initial_isolating_cuts()
+        for progress in self.solve_iter(
+            time_limit, absolute_gap, relative_gap, node_limit
+        ):
+            if reporting:
+                print(progress)
+        if reporting:
+            print(self.report)
+        return self.result()
+
+    def solve_iter(
+        self,
+        time_limit=600,
+        absolute_gap=0.0,
+        relative_gap=0.0,
+        node_limit=None,
+        progress_interval=PROGRESS_INTERVAL,
+    ):
+        """Solves k-terminal cut, yielding its progress as it goes.
+
+        A SolveProgress is yielded whenever the best upper bound improves
+            ('incumbent') or the best lower bound rises ('lower_bound'), and
+            otherwise at most every progress_interval seconds ('progress').
+            Each is built from counters, so it is cheap. The last is 'done',
+            after which report["Status"] tells why the search stopped
+            [optimal, gap, node_limit, time_limit, cancelled], and result()
+            returns the best partition found.
+
+        The time limit (and the deadline of the tree) is enforced inside the
+            root isolating cuts, the construction of children, the maximum
+            flows and the LP of persistence. A phase cut short leaves the
+            node it was working on unexplored, so the gap remains valid.
+
+        If workers > 1, the workers search until the tree is explored or
+            the time limit expires, and their progress is yielded once they
+            return. The gaps and the node limit are not checked by workers.
+
+        Args:
+            time_limit: as in solve
+            absolute_gap: as in solve
+            relative_gap: as in solve
+            node_limit: as in solve
+            progress_interval: the seconds between 'progress' snapshots
+
+        Yields:
+            progress: a SolveProgress
+        """
+        self._deadline = Deadline(
+            self._start_time + time_limit - time.time(), parent=self._cancellation
+        )
+        first_node = self._start()
+        upper_bound, lower_bound = self.best_upper_bound, self.best_lower_bound
+        yield self._progress("incumbent")
+        if self._deadline.expired:
+            self._status = self._stop_status(absolute_gap, relative_gap, node_limit)
+        elif self._workers > 1:
+            self._search_with_workers(first_node)
+            # NB: workers stop only when the tree is explored or at the deadline
+            self._status = (
+                self._stop_status(absolute_gap, relative_gap, node_limit)
+                or "time_limit"
+            )
+        else:
+            last_progress_time = time.time()
+            for _ in self._search(absolute_gap, relative_gap, node_limit):
+                if self.best_upper_bound < upper_bound:
+                    event = "incumbent"
+                elif self.best_lower_bound > lower_bound:
+                    event = "lower_bound"
+                elif time.time() - last_progress_time >= progress_interval:
+                    event = "progress"
+                else:
+                    continue
+                upper_bound, lower_bound = self.best_upper_bound, self.best_lower_bound
+                last_progress_time = time.time()
+                yield self._progress(event)
+        yield self._progress("done")
+
+    def result(self):
+        """The best partition found by the search.
+
+        An incumbent with unassigned vertices (left by an early stop) is
+            completed by assigning them all to the terminal with the most
+            capacity towards them, which cuts no more than its upper bound.
+
+        Returns:
+            source_sets: the vertex ids that remain connected to each terminal
+            cut_value: the cost of the multi-terminal cut
+        """
+        self._active_node = self._completed_incumbent()
+        final_node_source_sets = {
+            terminal: set(self._active_node.graph.members(terminal).tolist())
+            for terminal in self._terminals
+        }
+
+        return final_node_source_sets, round(self._active_node.lower_bound, 8)
+
+    def _start(self):
+        """Finds the root isolating cuts, and schedules the first node.
+
+        If the deadline expires during the root isolating cuts, the first
+            node is the input graph, kept only as the incumbent. If it expires
+            during persistence, the terminals are restricted no further.
+
+        Returns:
+            first_node: the node left by the root isolating cuts
+        """
+        self._root_node = IsolationBranchingRoot(
+            self._graph, self._terminals, self._backend, self._deadline
+        )
+        try:
+            with phase(self._profile, "Root Cuts"):
+                self._root_node.initial_isolating_cuts()
+        except DeadlineExceeded:
+            return self._start_without_root_cuts()
         graph = self._root_node.get_graph()
-        first_node = IsolationBranchingNode(graph, self._terminals, None, None)
-        self._all_nodes = [first_node]
-        self._unexplored_nodes = [first_node]
+        if self._persistence in {"strong", "weak"}:
+            try:
+                with phase(self._profile, "Persistence"):
+                    self._restrict_terminals_by_persistence(graph)
+                graph = self._contract_persistent_vertices(graph)
+            except DeadlineExceeded:
+                pass
+        first_node = IsolationBranchingNode(
+            graph,
+            self._terminals,
+            None,
+            None,
+            backend=self._backend,
+            flows={} if self._warm_start else None,
+            profile=self._profile,
+            deadline=self._deadline,
+        )
+        self._add_nodes([first_node])
+        if self._local_search and not self._deadline.expired:
+            with phase(self._profile, "Local Search"):
+                self._improve_incumbent(first_node)
+        self._active_node = first_node
+        return first_node
 
-        while not self._done and time.time() - self._start_time < time_limit:
-            self._step()
+    def _start_without_root_cuts(self):
+        """Makes the input graph the incumbent, with no lower bound but 0.
 
-        # done
-        self._active_node = self._node_with_best_upper_bound()
-        print(self.report)
-        final_node_source_sets = {}
+        The bounds of a node are only valid once the isolating cuts of its
+            terminals have been contracted, but its upper bound is the cut
+            of one of its completions, so it still bounds the optimum.
+        """
+        first_node = IsolationBranchingNode(
+            self._graph,
+            self._terminals,
+            None,
+            None,
+            backend=self._backend,
+            profile=self._profile,
+            deadline=self._deadline,
+        )
+        self._nodes_created_count += 1
+        self._unexplored_nodes.update_incumbent(first_node)
+        self._outside_lower_bound = 0.0
+        self._active_node = first_node
+        return first_node
+
+    def _progress(self, event):
+        return SolveProgress(
+            event,
+            self.best_upper_bound,
+            self.best_lower_bound,
+            self.best_upper_bound - self.best_lower_bound,
+            self._nodes_explored_count,
+            self.unexplored_nodes_count,
+            time.time() - self._start_time,
+        )
+
+    def _completed_incumbent(self):
+        """The incumbent, with any unassigned vertices contracted into one terminal."""
+        incumbent = self._unexplored_nodes.incumbent
+        unassigned_vertices = incumbent.unassigned_vertices
+        if not len(unassigned_vertices):
+            return incumbent
+        unassigned_mask = np.zeros(incumbent.graph.vertex_count, dtype=bool)
+        unassigned_mask[unassigned_vertices] = True
+        capacities_towards = []
         for terminal in self._terminals:
-            if "combined" in self._active_node.graph.node[terminal]:
-                final_node_source_sets[terminal] = self._active_node.graph.node[
-                    terminal
-                ]["combined"] | {terminal}
-            else:
-                final_node_source_sets[terminal] = {terminal}
+            neighbors, capacities = incumbent.graph.adjacency(terminal)
+            capacities_towards.append(
+                float(capacities[unassigned_mask[neighbors]].sum())
+            )
+        heaviest_terminal = self._terminals[int(np.argmax(capacities_towards))]
+        contractions = [(heaviest_terminal, unassigned_vertices)]
+        return IsolationBranchingNode(
+            incumbent.graph.contract_groups(contractions),
+            self._terminals,
+            None,
+            None,
+            depth=incumbent.depth,
+            backend=self._backend,
+            path=incumbent.path() + contractions,
+            profile=self._profile,
+        )
 
-        return final_node_source_sets, round(self._active_node.lower_bound, 8)
+    def _restrict_terminals_by_persistence(self, graph):
+        """Restricts the terminals of each vertex by the LP relaxation of graph.
+
+        Every vertex in a root isolating cut is already assigned, so the LP
+            only needs the vertices which remain. The vertex ids of graph
+            are those of the input graph, so no mapping is needed.
+        """
+        terminals_by_node = lp_algorithm(
+            graph.to_networkx(),
+            self._terminals,
+            persistence=self._persistence,
+            deadline=self._deadline,
+        )
+        self._terminals_by_vertex = list(self._terminals_by_vertex)
+        for vertex, terminals in terminals_by_node.items():
+            self._terminals_by_vertex[vertex] = [
+                terminal for terminal in self._terminals_by_vertex[vertex]
+                if terminal in terminals
+            ]
+
+    def _contract_persistent_vertices(self, graph):
+        """Contracts every vertex with a single allowed terminal into it.
+
+        The isolating cuts are then recomputed in the smaller graph, so that
+            only vertices with several allowed terminals are branched on.
+        """
+        terminal_mask = np.zeros(graph.vertex_count, dtype=bool)
+        terminal_mask[self._terminals] = True
+        active_vertices = graph.active_vertices
+        unassigned_vertices = active_vertices[~terminal_mask[active_vertices]]
+        contractions = {terminal: [] for terminal in self._terminals}
+        for vertex in unassigned_vertices.tolist():
+            if len(self._terminals_by_vertex[vertex]) == 1:
+                contractions[self._terminals_by_vertex[vertex][0]].append(vertex)
+        self._persistence_fixed_count = sum(
+            len(vertices) for vertices in contractions.values()
+        )
+        if self._persistence_fixed_count == 0:
+            return graph
+
+        root_node = IsolationBranchingRoot(
+            graph.contract_groups(contractions.items()),
+            self._terminals,
+            self._backend,
+            self._deadline,
+        )
+        with phase(self._profile, "Root Cuts"):
+            root_node.initial_isolating_cuts()
+        self._root_node = root_node
+        return root_node.get_graph()
+
+    def _search(self, absolute_gap, relative_gap, node_limit):
+        """Explores the tree in this process, yielding after each step."""
+        if self._processes > 1:
+            self._pool = ChildNodePool(self._processes)
+        try:
+            while True:
+                self._status = self._stop_status(absolute_gap, relative_gap, node_limit)
+                if self._status is not None:
+                    break
+                self._step()
+                yield
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _stop_status(self, absolute_gap, relative_gap, node_limit):
+        """Why the search should stop now (None if it should go on)."""
+        gap = self.best_upper_bound - self.best_lower_bound
+        if self._done or gap <= 0:
+            return "optimal"
+        if gap <= absolute_gap or gap <= relative_gap * self.best_upper_bound:
+            return "gap"
+        if node_limit is not None and self._nodes_explored_count >= node_limit:
+            return "node_limit"
+        if self._deadline.expired:
+            return "cancelled" if self._deadline.cancelled else "time_limit"
+        return None
+
+    def _search_with_workers(self, first_node):
+        """Explores the tree in worker processes, keeping only the incumbent."""
+        # NB: the workers explore the first node, if it was scheduled
+        while len(self._unexplored_nodes):
+            self._unexplored_nodes.pop()
+        search = ParallelSearch(
+            first_node,
+            self._terminals_by_vertex,
+            self._branching_rule,
+            self._workers,
+            strategy=self._strategy,
+            deadline=self._deadline,
+            incumbent=self._unexplored_nodes.incumbent,
+        )
+        incumbent, self._outside_lower_bound, self._worker_reports = search.run()
+        self._unexplored_nodes.update_incumbent(
+            IsolationBranchingNode(
+                first_node.graph.contract_groups(incumbent.path),
+                self._terminals,
+                None,
+                None,
+                depth=incumbent.depth,
+                backend=self._backend,
+                path=incumbent.path,
+                profile=self._profile,
+            )
+        )
+        self._nodes_created_count += sum(
+            report["Nodes Created"] for report in self._worker_reports
+        )
+        self._nodes_explored_count += sum(
+            report["Nodes Explored"] for report in self._worker_reports
+        )
+        self._nodes_pruned_count += sum(
+            report["Nodes Pruned"] for report in self._worker_reports
+        )
+        if self._profile is not None:
+            for report in self._worker_reports:
+                self._profile.merge(report["Profile"])
+        self._done = search.done
 
     @property
     def report(self):
-        return {
+        report = {
             "Source Set Sizes": {
-                terminal: len(self._active_node.graph.nodes[terminal]["combined"])
+                self._graph.names[terminal]: (
+                    len(self._active_node.graph.members(terminal)) - 1
+                )
                 for terminal in self._terminals
             },
             "Active Node Depth": self._active_node.depth,
             "Active Node Lower Bound": self._active_node.lower_bound,
             "Active Node Upper Bound": self._active_node.upper_bound,
-            "Active Node Total Unassigned Vertices": len(
-                set(self._active_node.graph.nodes()) - set(self._terminals)
-            ),
+            "Active Node Total Unassigned Vertices": self._active_node.unassigned_count,
             "Best Unexplored Lower Bound": self.best_unexplored_lower_bound,
             "Best Upper Bound": self.best_upper_bound,
+            "Best Lower Bound": self.best_lower_bound,
+            "Gap": self.best_upper_bound - self.best_lower_bound,
             "Nodes Unexplored": self.unexplored_nodes_count,
             "Nodes Total": self.total_nodes_count,
-            "Time Elapsed": time.time() - self._start_time
+            "Nodes Explored": self._nodes_explored_count,
+            "Nodes Pruned": self._nodes_pruned_count,
+            "Time Elapsed": time.time() - self._start_time,
+            "Status": self._status,
         }
+        # NB: the work of the worker processes counts as the tree's own
+        report["Branching"] = sum_statistics(
+            [self._branching_rule.statistics]
+            + [worker_report["Branching"] for worker_report in self._worker_reports]
+        )
+        if self._persistence in {"strong", "weak"}:
+            report["Persistence"] = {"Vertices Fixed": self._persistence_fixed_count}
+        if self._profile is not None:
+            # NB: the frontiers of the workers were merged into the profile
+            if not self._worker_reports:
+                self._profile.record_frontier(self._unexplored_nodes)
+            report["Profile"] = self._profile.report
+        if self._worker_reports:
+            report["Workers"] = self._worker_reports
+        return report
+
+
+def sum_statistics(statistics):
+    """The total of each counter over several dictionaries of counters."""
+    totals = {}
+    for counters in statistics:
+        for key, count in counters.items():
+            totals[key] = totals.get(key, 0) + count
+    return totals
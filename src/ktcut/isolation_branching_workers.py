@@ -0,0 +1,327 @@
+"""Explores the Branch and Bound Tree for Isolation Branching with several processes."""
+from collections import namedtuple
+import multiprocessing
+import queue
+import time
+import numpy as np
+from ktcut.deadline import CANCEL_POLL_INTERVAL
+from ktcut.deadline import Deadline
+from ktcut.deadline import DeadlineExceeded
+from ktcut.deadline import SharedDeadline
+from ktcut.isolation_branching_node import IsolationBranchingNode
+from ktcut.isolation_branching_scheduler import NodeScheduler
+from ktcut.solver_profile import SolverProfile
+from ktcut.solver_profile import phase
+
+# the seconds an idle worker waits for an answer before serving its own requests
+STEAL_POLL_INTERVAL = 0.01
+
+# a node as it travels between processes
+PortableNode = namedtuple(
+    "PortableNode", ["path", "depth", "lower_bound", "upper_bound", "flows"]
+)
+
+# what each worker sends back once the search is over
+WorkerResult = namedtuple(
+    "WorkerResult", ["worker", "incumbent", "unexplored_lower_bound", "report"]
+)
+
+
+class ParallelSearch:
+    """Explores the frontier of the branch and bound tree with several workers.
+
+    Each worker process explores its own frontier with its own NodeScheduler.
+        A worker whose frontier is empty asks the others in turn for a node
+        (work stealing). A node travels as its path of contractions from the
+        first node, and the thief rebuilds its graph from the first node.
+
+    The best upper bound is shared by all workers, so each worker prunes
+        against the best incumbent found by any of them. The count of nodes
+        not yet explored by any worker is shared as well: the search ends
+        when it reaches zero, so it always proves the same optimal value as
+        the search in a single process.
+
+    A node on its way to a thief keeps its lower bound in a shared slot
+        of the thief until it arrives, so a search stopped by the deadline
+        never loses the lower bound of a node in transit.
+
+    The workers stop once the deadline expires. Cancelling the deadline in
+        the parent process sets a flag shared with the workers, whose own
+        deadlines read it, so that it reaches their phases as well.
+
+    If the first node has a SolverProfile, each worker times its own phases
+        in a profile of its own, which its report includes.
+
+    Attributes:
+        workers: the number of worker processes
+        strategy: the search strategy of each worker's NodeScheduler
+    """
+
+    def __init__(
+        self,
+        first_node,
+        terminals_by_vertex,
+        branching_rule,
+        workers,
+        strategy="best_first",
+        deadline=None,
+        incumbent=None,
+    ):
+        self.workers = workers
+        self.strategy = strategy
+        self._first_node = first_node
+        self._incumbent = incumbent if incumbent is not None else first_node
+        self._terminals_by_vertex = terminals_by_vertex
+        self._branching_rule = branching_rule
+        self._deadline = deadline if deadline is not None else Deadline()
+        # NB: the workers are forked, so they inherit the first node's graph
+        self._context = multiprocessing.get_context("fork")
+        self._cancelled = self._context.Value("b", 0)
+        self._upper_bound = self._context.Value("d", self._incumbent.upper_bound)
+        # the shared upper bound when this worker last pruned its frontier
+        self._pruned_upper_bound = self._incumbent.upper_bound
+        self._outstanding = self._context.Value("q", 0)
+        # the lower bound of the node on its way to each worker (inf if none)
+        self._in_transit = self._context.Array("d", [np.inf] * workers)
+        self._requests = [self._context.Queue() for _ in range(workers)]
+        self._inboxes = [self._context.Queue() for _ in range(workers)]
+        self._results = self._context.Queue()
+
+    def run(self):
+        """Explores the tree below the first node until no node is left.
+
+        Returns:
+            incumbent: the PortableNode with the best upper bound
+            unexplored_lower_bound: the best lower bound left unexplored
+                (inf if the search is done)
+            reports: the report of each worker
+        """
+        if self._first_node.lower_bound < self._incumbent.upper_bound:
+            self._outstanding.value = 1
+        processes = [
+            self._context.Process(target=self._work, args=(worker,))
+            for worker in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        results = []
+        while len(results) < len(processes):
+            try:
+                results.append(self._results.get(timeout=CANCEL_POLL_INTERVAL))
+            except queue.Empty:
+                if self._deadline.cancelled:
+                    self._cancelled.value = 1
+        results.sort(key=lambda result: result.worker)
+        for process in processes:
+            process.join()
+
+        # NB: ties between workers are broken by bounds only,
+        # so the result does not depend on which worker found it
+        incumbent = min(
+            (result.incumbent for result in results),
+            key=lambda node: (node.upper_bound, -node.lower_bound),
+        )
+        unexplored_lower_bound = min(
+            min(result.unexplored_lower_bound for result in results),
+            min(self._in_transit),
+        )
+        if not self.done and unexplored_lower_bound == np.inf:
+            # NB: the first node bounds every node below it
+            unexplored_lower_bound = self._first_node.lower_bound
+        return incumbent, unexplored_lower_bound, [result.report for result in results]
+
+    @property
+    def done(self):
+        """True if no node is left unexplored by the workers."""
+        return self._outstanding.value == 0
+
+    def _work(self, worker):
+        """The loop of one worker process."""
+        for inbox in self._inboxes:
+            # NB: answers left over when the search ends are discarded
+            inbox.cancel_join_thread()
+        # NB: the nodes of this worker descend from the first node,
+        # and share its deadline, which also reads the shared flag
+        deadline = SharedDeadline(self._deadline, self._cancelled)
+        self._first_node.deadline = deadline
+        profile = None
+        if self._first_node.profile is not None:
+            # NB: the nodes of this worker descend from the first node,
+            # and share its profile, which is replaced by a fresh one
+            profile = self._first_node.profile = SolverProfile()
+        scheduler = NodeScheduler(self.strategy, track_bytes=profile is not None)
+        scheduler.update_incumbent(self._incumbent)
+        if worker == 0 and self._outstanding.value:
+            scheduler.push(self._first_node)
+        report = {
+            "Nodes Created": 0,
+            "Nodes Explored": 0,
+            "Nodes Pruned": 0,
+            "Nodes Stolen": 0,
+            "Idle Time": 0.0,
+        }
+        # NB: the branching rule was forked with the counts of the parent,
+        # so the worker reports only what it adds to them
+        inherited_statistics = dict(self._branching_rule.statistics)
+        victims = [(worker + shift) % self.workers for shift in range(1, self.workers)]
+        steals = 0
+
+        while not deadline.expired:
+            self._answer_requests(worker, scheduler)
+            if len(scheduler):
+                with phase(profile, "Node Selection"):
+                    node = scheduler.pop()
+                try:
+                    self._explore(node, scheduler, report)
+                except DeadlineExceeded:
+                    # NB: the node remains unexplored, so its lower bound still counts
+                    scheduler.push(node)
+            elif self._outstanding.value == 0:
+                break
+            else:
+                idle_start = time.time()
+                node = self._steal(worker, victims[steals % len(victims)], scheduler)
+                steals += 1
+                if node is not None:
+                    self._receive(worker, node, scheduler)
+                    report["Nodes Stolen"] += 1
+                report["Idle Time"] += time.time() - idle_start
+
+        # NB: a node which arrives later still counts through its shared slot
+        for node in self._drain_inbox(worker):
+            self._receive(worker, node, scheduler)
+            report["Nodes Stolen"] += 1
+        report["Nodes Unexplored"] = len(scheduler)
+        report["Branching"] = {
+            key: count - inherited_statistics.get(key, 0)
+            for key, count in self._branching_rule.statistics.items()
+        }
+        if profile is not None:
+            profile.record_frontier(scheduler)
+            report["Profile"] = profile.report
+        self._results.put(
+            WorkerResult(
+                worker,
+                self._export(scheduler.incumbent),
+                scheduler.best_lower_bound,
+                report,
+            )
+        )
+
+    def _explore(self, node, scheduler, report):
+        """Branches on node, keeping its children which can improve on the incumbent."""
+        if node.lower_bound >= self._upper_bound.value:
+            report["Nodes Pruned"] += 1
+            self._add_outstanding(-1)
+            return
+
+        with phase(node.profile, "Vertex Selection"):
+            vertex = self._branching_rule.choose_vertex(node, self._terminals_by_vertex)
+        with phase(node.profile, "Child Expansion"):
+            node.construct_children_nodes(
+                vertex,
+                self._terminals_by_vertex[vertex],
+                expansions=self._branching_rule.expansions(node, vertex),
+            )
+        self._branching_rule.record(node, vertex, node.children)
+        children = node.children
+        if node.profile is not None:
+            node.profile.record_depths(children)
+        report["Nodes Created"] += len(children)
+        report["Nodes Explored"] += 1
+
+        improved = False
+        for child in children:
+            improved |= scheduler.update_incumbent(child)
+        if improved:
+            with self._upper_bound.get_lock():
+                if scheduler.best_upper_bound < self._upper_bound.value:
+                    self._upper_bound.value = scheduler.best_upper_bound
+        upper_bound = self._upper_bound.value
+        pruned_count = 0
+        if upper_bound < self._pruned_upper_bound:
+            pruned_count = scheduler.prune(upper_bound)
+            self._pruned_upper_bound = upper_bound
+
+        pushed_count = 0
+        for child in children:
+            if child.lower_bound < upper_bound:
+                scheduler.push(child)
+                pushed_count += 1
+        report["Nodes Pruned"] += pruned_count + len(children) - pushed_count
+        # NB: the children are counted in the same update which discounts
+        # the node, so the count cannot reach zero while nodes remain
+        self._add_outstanding(pushed_count - pruned_count - 1)
+        node.release_explored()
+
+    def _answer_requests(self, worker, scheduler):
+        """Gives a node to each worker which asked for one, keeping at least one."""
+        while True:
+            try:
+                thief = self._requests[worker].get_nowait()
+            except queue.Empty:
+                return
+            node = scheduler.pop() if len(scheduler) > 1 else None
+            if node is not None:
+                self._in_transit[thief] = node.lower_bound
+            self._inboxes[thief].put(self._export(node) if node is not None else None)
+
+    def _steal(self, worker, victim, scheduler):
+        """Asks victim for a node, and waits for the answer.
+
+        Returns:
+            node: the stolen node (or None)
+        """
+        self._requests[victim].put(worker)
+        while True:
+            try:
+                portable_node = self._inboxes[worker].get(timeout=STEAL_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                # NB: the victim may be waiting on an answer from this worker
+                self._answer_requests(worker, scheduler)
+                if self._outstanding.value == 0 or self._first_node.deadline.expired:
+                    return None
+        if portable_node is None:
+            return None
+        return self._import(portable_node)
+
+    def _drain_inbox(self, worker):
+        """The nodes already sent to worker, whose requests it stopped waiting on."""
+        nodes = []
+        while True:
+            try:
+                portable_node = self._inboxes[worker].get_nowait()
+            except queue.Empty:
+                return nodes
+            if portable_node is not None:
+                nodes.append(self._import(portable_node))
+
+    def _receive(self, worker, node, scheduler):
+        """Schedules a node sent to worker, which is then no longer in transit."""
+        scheduler.push(node)
+        self._in_transit[worker] = np.inf
+
+    def _export(self, node):
+        return PortableNode(
+            node.path(), node.depth, node.lower_bound, node.upper_bound, node.flows
+        )
+
+    def _import(self, portable_node):
+        return IsolationBranchingNode(
+            self._first_node.graph.contract_groups(portable_node.path),
+            self._first_node.terminals,
+            None,
+            None,
+            depth=portable_node.depth,
+            backend=self._first_node.backend,
+            flows=portable_node.flows,
+            path=portable_node.path,
+            profile=self._first_node.profile,
+            deadline=self._first_node.deadline,
+        )
+
+    def _add_outstanding(self, change):
+        with self._outstanding.get_lock():
+            self._outstanding.value += change
+
@@ -0,0 +1,145 @@
+"""Local Search for good k-Terminal Cuts, used as a Primal Heuristic."""
+import heapq
+import numpy as np
+import scipy.sparse as sp
+
+# the refinement passes after the greedy completion
+REFINEMENT_PASSES = 4
+
+# a pass stops after this many moves without a new best cut
+NON_IMPROVING_MOVES = 64
+
+# gains below this are rounding errors
+_GAIN_TOLERANCE = 1e-9
+
+
+def local_search_partition(graph, terminals, passes=REFINEMENT_PASSES):
+    """Completes the partial assignment of a node and refines it.
+
+    The greedy completion repeatedly assigns the unassigned vertex with the
+        heaviest connection to a terminal's side, to that side. Vertices
+        which never connect to a side join the first terminal.
+
+    The refinement is Fiduccia-Mattheyses generalized to k sides. Each free
+        vertex has a gain, the cut weight saved by moving it to its best
+        other side. A pass moves the vertex of highest gain (even if it is
+        negative) and locks it, until no vertex is left or many moves bring
+        no new best cut. The moves after the best cut of the pass are then
+        undone. The gains are kept in a heap, because capacities need not
+        be integers.
+
+    Args:
+        graph: a CompactGraph in which the terminals are the supervertices
+            of the vertices assigned so far
+        terminals: the terminal vertex ids
+        passes: the maximum number of refinement passes
+
+    Returns:
+        sides: the terminal of each active vertex of graph (-1 elsewhere)
+        cut_weight: the weight of the k-terminal cut
+    """
+    active_vertices = graph.active_vertices
+    local_index = np.full(graph.vertex_count, -1, dtype=np.int64)
+    local_index[active_vertices] = np.arange(len(active_vertices))
+    adjacency = sp.csr_matrix(
+        (graph.capacities, graph.neighbors, graph.offsets),
+        shape=(graph.vertex_count, graph.vertex_count),
+    )[active_vertices][:, active_vertices].tocsr()
+
+    local_terminals = local_index[terminals]
+    sides = np.full(len(active_vertices), -1, dtype=np.int64)
+    sides[local_terminals] = np.arange(len(terminals))
+    free = sides < 0
+
+    _greedy_completion(adjacency, sides)
+    _refine(adjacency, sides, free, len(terminals), passes)
+
+    global_sides = np.full(graph.vertex_count, -1, dtype=np.int64)
+    global_sides[active_vertices] = np.asarray(terminals)[sides]
+    return global_sides, _cut_weight(adjacency, sides)
+
+
+def _greedy_completion(adjacency, sides):
+    """Assigns every unassigned vertex, the most connected first."""
+    side_count = sides.max() + 1
+    connections = np.zeros((len(sides), side_count))
+    heap = []
+
+    def assign(v, side):
+        sides[v] = side
+        start, stop = adjacency.indptr[v], adjacency.indptr[v + 1]
+        for w, capacity in zip(
+            adjacency.indices[start:stop], adjacency.data[start:stop]
+        ):
+            if sides[w] < 0:
+                connections[w, side] += capacity
+                heapq.heappush(heap, (-connections[w].max(), int(w)))
+
+    for v in np.flatnonzero(sides >= 0):
+        assign(v, sides[v])
+    while heap:
+        connection, v = heapq.heappop(heap)
+        # NB: stale entries are skipped; the latest entry has the largest connection
+        if sides[v] < 0 and -connection == connections[v].max():
+            assign(v, int(np.argmax(connections[v])))
+    sides[sides < 0] = 0
+
+
+def _refine(adjacency, sides, free, side_count, passes):
+    """Moves free vertices between sides while the cut improves."""
+    one_hot = sp.csr_matrix(
+        (np.ones(len(sides)), (np.arange(len(sides)), sides)),
+        shape=(len(sides), side_count),
+    )
+    connections = np.asarray((adjacency @ one_hot).todense())
+
+    def best_move(v):
+        gains = connections[v] - connections[v, sides[v]]
+        gains[sides[v]] = -np.inf
+        target = int(np.argmax(gains))
+        return gains[target], target
+
+    def move(v, target):
+        source, sides[v] = sides[v], target
+        start, stop = adjacency.indptr[v], adjacency.indptr[v + 1]
+        neighbors = adjacency.indices[start:stop]
+        connections[neighbors, source] -= adjacency.data[start:stop]
+        connections[neighbors, target] += adjacency.data[start:stop]
+        return neighbors
+
+    for _ in range(passes):
+        locked = ~free
+        versions = np.zeros(len(sides), dtype=np.int64)
+        heap = []
+        for v in np.flatnonzero(free).tolist():
+            gain, target = best_move(v)
+            heap.append((-gain, v, 0, target))
+        heapq.heapify(heap)
+
+        moves, total_gain, best_gain, best_length = [], 0.0, 0.0, 0
+        while heap and len(moves) - best_length < NON_IMPROVING_MOVES:
+            gain, v, version, target = heapq.heappop(heap)
+            if locked[v] or version != versions[v]:
+                continue
+            moves.append((v, sides[v]))
+            locked[v] = True
+            total_gain -= gain
+            for w in move(v, target).tolist():
+                if not locked[w]:
+                    versions[w] += 1
+                    w_gain, w_target = best_move(w)
+                    heapq.heappush(heap, (-w_gain, w, versions[w], w_target))
+            if total_gain > best_gain + _GAIN_TOLERANCE:
+                best_gain, best_length = total_gain, len(moves)
+
+        for v, source in reversed(moves[best_length:]):
+            move(v, source)
+        if best_length == 0:
+            return
+
+
+def _cut_weight(adjacency, sides):
+    """The weight of the edges between different sides."""
+    adjacency = adjacency.tocoo()
+    crossing = sides[adjacency.row] != sides[adjacency.col]
+    return float(adjacency.data[crossing].sum()) / 2.0
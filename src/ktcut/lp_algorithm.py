@@ -3,7 +3,7 @@
 from ktcut.ip_formulation import IPFormulation
 
 
-def lp_algorithm(graph, terminals, persistence=None, solver=None):
+def lp_algorithm(graph, terminals, persistence=None, solver=None, deadline=None):
     """Solves the LP formulation of the k-Terminal Cut Problem.
 
     minimize (1/2) sum_{i,j,k}{z_{ij}^k}
@@ -17,13 +17,15 @@ def lp_algorithm(graph, terminals, persistence=None, solver=None):
         terminals: The vertices which are terminals in the k-Terminal Cut problem.
         persistence: If `strong', assumes that 0s and 1s are persistent. If
             'weak', assumes only 0s are persistent.
-        solver: which solver to use to solve the LP.
+        solver: which solver to use to solve the LP: None for HiGHS, or
+            a PuLP solver (or 'pulp' for its default solver).
+        deadline: a Deadline, after which DeadlineExceeded is raised (or None).
 
     Returns:
         dictionary of possible_terminals_by_node.
         value of the IP or LP cut.
     """
-    ip_formulation = IPFormulation(graph, terminals, solver)
+    ip_formulation = IPFormulation(graph, terminals, solver, deadline)
     ip_formulation.solve_lp()
 
     if persistence == "strong":
@@ -1,66 +1,254 @@
+"""Readers for graphs in DIMACS and KONECT format."""
+import bz2
+import gzip
 import networkx as nx
+import numpy as np
+from ktcut.compact_graph import CompactGraph
+from ktcut.graph_cache import DEFAULT_MAX_BYTES
+from ktcut.graph_cache import GraphCache
 
+# the number of bytes parsed at once
+CHUNK_BYTES = 1 << 24
 
-def read_dimacs_graph(filename):
+# marks the end of a line in the DIMACS tokens, which are all positive
+_END_OF_LINE = -1
+
+
+def read_dimacs_graph(
+    filename, compact=False, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES
+):
     """Read a graph from DIMACS format.
 
-    Row 0: node_count, edge_count, _
+    Row 0: node_count, edge_count, [fmt]
     Row 1+: adjacency list
 
+    If fmt ends in 1, each neighbor is followed by the weight of the edge.
+        If fmt has a second-to-last digit of 1, each row starts with a
+        vertex weight, which is skipped. Lines starting with '%' are comments.
+
     Args:
-        filename: The path of the file to be read.
+        filename: The path of the file to be read (.gz and .bz2 are decompressed).
+        compact: If the graph should be returned as a CompactGraph.
+        cache_dir: A directory in which to cache the graph (see GraphCache).
+        cache_max_bytes: The size to which the cache directory is trimmed.
 
     Returns:
-        graph: The undirected, unweighted graph.
+        graph: The undirected graph on vertices 1, ..., node_count, with
+            'capacity' along each edge (1.0 if unweighted).
     """
-    graph = nx.Graph()
-    f = open(filename)
-    count = 0
-    for line in f:
-        if count:
-            for neighbor in line.split():
-                graph.add_edge(count, int(neighbor), capacity=1.0)
-        else:
-            node_count, edge_count, _ = line.split()
-            graph.add_nodes_from(range(1, int(node_count) + 1))
-        count += 1
-    return graph
-
-
-def read_konect_graph(filename):
+    return _read(
+        filename,
+        "dimacs",
+        _read_dimacs_compact_graph,
+        compact,
+        cache_dir,
+        cache_max_bytes,
+    )
+
+
+def read_konect_graph(
+    filename, compact=False, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES
+):
     """Read a graph from KONECT format.
 
     The KONECT format is as follows:
         % sym unweighted
-        node_1 node_2
+        node_1 node_2 [weight [timestamp]]
+
+    For weighted graphs, the weights of repeated edges are summed.
+        Otherwise, repeated edges are kept once with capacity 1.0.
+        Self-loops are removed, but their vertices are kept.
 
     Args:
-        filename: The path of the file to be read.
+        filename: The path of the file to be read (.gz and .bz2 are decompressed).
+        compact: If the graph should be returned as a CompactGraph.
+        cache_dir: A directory in which to cache the graph (see GraphCache).
+        cache_max_bytes: The size to which the cache directory is trimmed.
 
     Returns:
-        graph: The undirected, unweighted graph.
-    """
-
-    # reading phase
-    filereader = open(filename)
+        graph: The undirected graph, with 'capacity' along each edge.
 
-    # graph properties
-    graph_info = filereader.readline().strip("\n").split(" ")
-    assert graph_info[0] == "%"
-    assert graph_info[1] == "sym"
-    assert graph_info[2] == "unweighted"
-
-    graph = nx.Graph()
-
-    for line_edge in filereader:
-        line_edge = (
-            line_edge.strip("\n")
-            .replace("  ", " ")
-            .replace("\t", " ")
-            .split(" ")
-        )
-        graph.add_edge(int(line_edge[0]), int(line_edge[1]), capacity=1.0)
+    Raises:
+        ValueError: if the graph has negative weights
+    """
+    return _read(
+        filename,
+        "konect",
+        _read_konect_compact_graph,
+        compact,
+        cache_dir,
+        cache_max_bytes,
+    )
+
+
+def _read(filename, graph_format, reader, compact, cache_dir, cache_max_bytes):
+    if cache_dir is None:
+        graph = reader(filename)
+    else:
+        cache = GraphCache(cache_dir, cache_max_bytes)
+        graph = cache.read(filename, graph_format, reader)
+    return graph if compact else _to_networkx(graph)
+
+
+def _read_dimacs_compact_graph(filename):
+    with _open(filename) as f:
+        header = f.readline()
+        while header.startswith(b"%"):
+            header = f.readline()
+        fields = header.split()
+        node_count = int(fields[0])
+        fmt = fields[2].decode().zfill(3) if len(fields) > 2 else "000"
+        edge_weights, vertex_weights = fmt[-1] == "1", fmt[-2] == "1"
+
+        tails, heads, capacities = [], [], []
+        line_count = 0
+        for chunk in _chunks(f):
+            if b"%" in chunk:
+                chunk = b"".join(
+                    line for line in chunk.splitlines(True) if not line.startswith(b"%")
+                )
+            tokens = np.fromstring(
+                chunk.replace(b"\n", b" %d\n" % _END_OF_LINE), dtype=np.int64, sep=" "
+            )
+            ends = tokens == _END_OF_LINE
+            # NB: the vertex of each token is one more than the number of
+            # lines before it
+            lines = line_count + 1 + np.cumsum(ends) - ends
+            line_count += int(ends.sum())
+            keep = ~ends
+            tokens, lines = tokens[keep], lines[keep]
+            if vertex_weights:
+                first = np.ones(len(lines), dtype=bool)
+                first[1:] = lines[1:] != lines[:-1]
+                tokens, lines = tokens[~first], lines[~first]
+            if edge_weights:
+                tails.append(lines[0::2])
+                heads.append(tokens[0::2])
+                capacities.append(tokens[1::2].astype(np.float64))
+            else:
+                tails.append(lines)
+                heads.append(tokens)
+                capacities.append(np.ones(len(tokens)))
+
+    tails, heads, capacities = _edges(tails, heads, capacities, node_count)
+    tails, heads, capacities = _unique_edges(tails - 1, heads - 1, capacities, False)
+    return CompactGraph.from_edges(
+        node_count, tails, heads, capacities, names=list(range(1, node_count + 1))
+    )
+
+
+def _read_konect_compact_graph(filename):
+    with _open(filename) as f:
+        graph_info = f.readline().split()
+        assert graph_info[0] == b"%"
+        assert graph_info[1] == b"sym"
+        weighted = graph_info[2] != b"unweighted"
+
+        tails, heads, capacities = [], [], []
+        column_count = None
+        for chunk in _chunks(f):
+            if chunk.startswith(b"%") or b"\n%" in chunk:
+                chunk = b"".join(
+                    line for line in chunk.splitlines(True) if not line.startswith(b"%")
+                )
+            if column_count is None:
+                first_line = chunk.split(b"\n", 1)[0]
+                if not first_line.strip():
+                    continue
+                column_count = len(first_line.split())
+            values = np.fromstring(chunk, dtype=np.float64, sep=" ")
+            values = values.reshape(-1, column_count)
+            tails.append(values[:, 0].astype(np.int64))
+            heads.append(values[:, 1].astype(np.int64))
+            if weighted and column_count > 2:
+                capacities.append(values[:, 2])
+            else:
+                capacities.append(np.ones(len(values)))
+
+    tails, heads, capacities = _edges(tails, heads, capacities)
+    if (capacities < 0).any():
+        raise ValueError("negative weights cannot be capacities: %s" % filename)
+    vertices, inverse = np.unique(np.concatenate((tails, heads)), return_inverse=True)
+    tails, heads = np.split(inverse, 2)
+    tails, heads, capacities = _unique_edges(tails, heads, capacities, weighted)
+    return CompactGraph.from_edges(
+        len(vertices), tails, heads, capacities, names=vertices.tolist()
+    )
+
+
+def _open(filename):
+    """Opens a file for reading bytes, decompressing .gz and .bz2 files."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rb")
+    if filename.endswith(".bz2"):
+        return bz2.open(filename, "rb")
+    return open(filename, "rb")
+
+
+def _chunks(f):
+    """Reads the rest of f in blocks of whole lines, each ending in a newline."""
+    remainder = b""
+    while True:
+        block = f.read(CHUNK_BYTES)
+        if not block:
+            break
+        block = remainder + block
+        cut = block.rfind(b"\n") + 1
+        remainder = block[cut:]
+        if cut:
+            yield block[:cut]
+    if remainder.strip():
+        yield remainder + b"\n"
+
+
+def _edges(tails, heads, capacities, node_count=None):
+    """Concatenates the edge arrays of each chunk."""
+    tails = np.concatenate(tails) if tails else np.empty(0, dtype=np.int64)
+    heads = np.concatenate(heads) if heads else np.empty(0, dtype=np.int64)
+    capacities = np.concatenate(capacities) if capacities else np.empty(0)
+    if node_count is not None:
+        keep = tails <= node_count
+        tails, heads, capacities = tails[keep], heads[keep], capacities[keep]
+    return tails, heads, capacities
+
+
+def _unique_edges(tails, heads, capacities, summed):
+    """Removes self-loops and repeated edges.
 
-    graph.remove_edges_from(nx.selfloop_edges(graph))
+    Args:
+        summed: if the capacities of repeated edges are summed (otherwise,
+            the first capacity is kept)
 
-    return graph
+    Returns:
+        tails: the smaller endpoint of each edge
+        heads: the larger endpoint of each edge
+        capacities: the capacity of each edge
+    """
+    keep = tails != heads
+    tails, heads, capacities = tails[keep], heads[keep], capacities[keep]
+    low, high = np.minimum(tails, heads), np.maximum(tails, heads)
+    keys = low * (int(high.max(initial=0)) + 1) + high
+    keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    if summed:
+        capacities = np.bincount(inverse, weights=capacities, minlength=len(keys))
+    else:
+        capacities = capacities[first]
+    return low[first], high[first], capacities
+
+
+def _to_networkx(graph):
+    """Builds the networkx graph of a CompactGraph in bulk, with its names."""
+    names = np.asarray(graph.names)
+    tails = graph.entry_tails()
+    upper = tails < graph.neighbors
+    networkx_graph = nx.Graph()
+    networkx_graph.add_nodes_from(graph.names)
+    networkx_graph.add_weighted_edges_from(
+        zip(
+            names[tails[upper]].tolist(),
+            names[graph.neighbors[upper]].tolist(),
+            graph.capacities[upper].tolist(),
+        ),
+        weight="capacity",
+    )
+    return networkx_graph
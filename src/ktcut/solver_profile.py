@@ -0,0 +1,111 @@
+"""Low-overhead timers and counters of the phases of Isolation Branching."""
+import contextlib
+import time
+
+# the phase timer of a solve without a profile
+_NO_PHASE = contextlib.nullcontext()
+
+
+class SolverProfile:
+    """Cumulative time and call count of each phase of a solve.
+
+    The tree and its nodes share one profile, and time their phases with
+        phase(profile, name), which does nothing if the profile is None.
+        The profile also counts the nodes created at each depth, and keeps
+        the bytes held by the frontier as reported by the NodeScheduler.
+
+    Phases:
+        Root Cuts: the initial isolating cuts, before branching
+        Persistence: the LP relaxation which restricts the terminals
+        Graph Copy: rebuilding the graph of a node from an ancestor
+        Contraction: contracting vertices into a terminal
+        Max Flow: the isolating cut of a child, in the backend
+        Cut Extraction: turning the source set of a cut into the
+            vertices contracted by the child
+        Bound Computation: the lower and upper bounds of a node
+        Node Selection: popping the next node from the frontier
+        Vertex Selection: choosing the vertex to branch on
+        Child Expansion: constructing the children of a node (which
+            includes the phases of the children, unless expanded in a pool)
+        Local Search: improving the incumbent by local search
+
+    Attributes:
+        phases: the [calls, seconds] of each phase, by name
+        depths: the number of nodes created at each depth
+        frontier_bytes: the bytes held by the frontier
+        peak_frontier_bytes: the most bytes held by the frontier
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.depths = {}
+        self.frontier_bytes = 0
+        self.peak_frontier_bytes = 0
+
+    def record_depths(self, nodes):
+        for node in nodes:
+            self.depths[node.depth] = self.depths.get(node.depth, 0) + 1
+
+    def record_frontier(self, scheduler):
+        self.frontier_bytes = scheduler.nbytes
+        self.peak_frontier_bytes = max(self.peak_frontier_bytes, scheduler.peak_nbytes)
+
+    def merge(self, report):
+        """Adds the report of a profile kept elsewhere (e.g. in a worker process)."""
+        for name, totals in report["Phases"].items():
+            phase_totals = self.phases.setdefault(name, [0, 0.0])
+            phase_totals[0] += totals["Calls"]
+            phase_totals[1] += totals["Time"]
+        for depth, count in report["Depth Histogram"].items():
+            self.depths[depth] = self.depths.get(depth, 0) + count
+        self.frontier_bytes += report["Frontier Bytes"]
+        self.peak_frontier_bytes = max(
+            self.peak_frontier_bytes, report["Peak Frontier Bytes"]
+        )
+
+    @property
+    def report(self):
+        return {
+            "Phases": {
+                name: {"Calls": calls, "Time": seconds}
+                for name, (calls, seconds) in self.phases.items()
+            },
+            "Depth Histogram": dict(sorted(self.depths.items())),
+            "Frontier Bytes": self.frontier_bytes,
+            "Peak Frontier Bytes": self.peak_frontier_bytes,
+        }
+
+
+class _PhaseTimer:
+    """Adds the time spent inside a with block to the totals of a phase."""
+
+    __slots__ = ["_totals", "_start"]
+
+    def __init__(self, totals):
+        self._totals = totals
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._totals[0] += 1
+        self._totals[1] += time.perf_counter() - self._start
+
+
+def phase(profile, name):
+    """A context manager which times the phase name in profile (if not None)."""
+    if profile is None:
+        return _NO_PHASE
+    totals = profile.phases.get(name)
+    if totals is None:
+        totals = profile.phases[name] = [0, 0.0]
+    return _PhaseTimer(totals)
+
+
+def combine_profiles(reports):
+    """The profile report of several subproblems: totals, and the largest peak."""
+    profile = SolverProfile()
+    for report in reports:
+        profile.merge(report)
+    return profile.report
@@ -1,11 +1,22 @@
 import numpy as np
-import networkx as nx
-from sklearn.cluster import SpectralClustering
-from sklearn.cluster import AffinityPropagation
-from sklearn import metrics
+import scipy.sparse as sp
+from scipy.cluster.vq import kmeans2
+from scipy.sparse.csgraph import shortest_path
+from scipy.sparse.linalg import eigsh
+from ktcut.compact_graph import CompactGraph
 
+# graphs with at most this many vertices are embedded with a dense eigensolver
+DENSE_EIGENSOLVER_VERTICES = 64
 
-def suggested_terminals_spectral(graph, terminal_count):
+# the damping factor of personalized PageRank
+PAGERANK_ALPHA = 0.85
+
+# personalized PageRank stops after this many iterations, or at this change
+PAGERANK_ITERATIONS = 100
+PAGERANK_TOLERANCE = 1e-8
+
+
+def suggested_terminals_spectral(graph, terminal_count, seed=0):
     """Suggests a set of terminal vertices for the given graph.
 
     The terminals are suggested according to a two-step procedure.
@@ -13,37 +24,139 @@ def suggested_terminals_spectral(graph, terminal_count):
         terminal_count clusters. Then, within each cluster, we suggest
         the vertex which has the highest degree.
 
+    The clustering embeds the vertices by the leading eigenvectors of the
+        normalized sparse adjacency matrix (found by ARPACK), and clusters
+        the normalized embedding by k-means. If a cluster is empty, the
+        vertices of highest degree not yet suggested make up the difference.
+
     Args:
         graph: the graph in which to suggest the terminals.
         terminal_count: the number of terminals to suggest.
+        seed: the seed of the k-means initialization.
 
     Returns:
         terminals: the suggested terminal vertices in the graph.
         total_degree: total degree of the terminal vertices in the graph.
     """
-    adj_matrix = nx.to_numpy_matrix(graph)
-
-    sc = SpectralClustering(n_clusters=terminal_count, affinity="precomputed")
-    sc.fit(adj_matrix)
+    names, adjacency = _adjacency(graph)
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
 
-    deg = graph.degree()
+    scaling = np.zeros(len(degrees))
+    scaling[degrees > 0] = 1.0 / np.sqrt(degrees[degrees > 0])
+    normalized = sp.diags(scaling) @ adjacency @ sp.diags(scaling)
+    if len(degrees) <= max(DENSE_EIGENSOLVER_VERTICES, terminal_count + 1):
+        _, vectors = np.linalg.eigh(normalized.toarray())
+        embedding = vectors[:, -terminal_count:]
+    else:
+        _, embedding = eigsh(normalized, k=terminal_count, which="LA")
+    lengths = np.linalg.norm(embedding, axis=1)
+    embedding[lengths > 0] /= lengths[lengths > 0, None]
 
-    terminals = []
-    total_degree = 0
+    _, labels = kmeans2(embedding, terminal_count, minit="++", seed=seed)
 
-    for c in range(terminal_count):
-        restricted_nodes = [
-            (degree, node)
-            for node, degree in deg
-            if sc.labels_[list(graph).index(node)] == c
-        ]
-        maximizer = max(restricted_nodes)
-        total_degree += maximizer[0]
-        terminals.append(maximizer[1])
-
-    return terminals, total_degree
+    # NB: within each label, the vertex of highest degree comes first
+    order = np.lexsort((-degrees, labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = labels[order[1:]] != labels[order[:-1]]
+    vertices = order[first].tolist()
+    if len(vertices) < terminal_count:
+        chosen = set(vertices)
+        vertices += [
+            v for v in np.argsort(-degrees, kind="stable").tolist() if v not in chosen
+        ][: terminal_count - len(vertices)]
+    return _suggestion(names, degrees, vertices)
 
 
 def suggested_terminals_degree(graph, terminal_count):
     degree_node = sorted([(d, n) for n, d in graph.degree()], reverse=True)
     return [p[1] for p in degree_node[:terminal_count]], sum([p[0] for p in degree_node[:terminal_count]])
+
+
+def suggested_terminals_k_center(graph, terminal_count):
+    """Suggests terminals which are spread out by hop distance.
+
+    The first terminal is the vertex of highest degree. Each next terminal
+        is the vertex farthest (by breadth-first search) from the terminals
+        suggested so far, with ties going to the highest degree. Another
+        connected component is farther than any vertex.
+
+    Args:
+        graph: the graph in which to suggest the terminals.
+        terminal_count: the number of terminals to suggest.
+
+    Returns:
+        terminals: the suggested terminal vertices in the graph.
+        total_degree: total degree of the terminal vertices in the graph.
+    """
+    names, adjacency = _adjacency(graph)
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    vertices = [int(np.argmax(degrees))]
+    distances = np.full(len(degrees), np.inf)
+    while len(vertices) < min(terminal_count, len(degrees)):
+        distances = np.minimum(
+            distances,
+            shortest_path(adjacency, unweighted=True, indices=vertices[-1]),
+        )
+        vertices.append(int(np.lexsort((-degrees, -distances))[0]))
+    return _suggestion(names, degrees, vertices)
+
+
+def suggested_terminals_pagerank(graph, terminal_count, alpha=PAGERANK_ALPHA):
+    """Suggests high-degree terminals which a random walk rarely connects.
+
+    The first terminal is the vertex of highest degree. The next terminal
+        maximizes its degree divided by its bias (if more than 1), the ratio
+        of its personalized PageRank from the terminals suggested so far to
+        its share of the total degree (its PageRank in an unbiased walk).
+
+    Args:
+        graph: the graph in which to suggest the terminals.
+        terminal_count: the number of terminals to suggest.
+        alpha: the probability that the random walk continues at each step.
+
+    Returns:
+        terminals: the suggested terminal vertices in the graph.
+        total_degree: total degree of the terminal vertices in the graph.
+    """
+    names, adjacency = _adjacency(graph)
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    scaling = np.zeros(len(degrees))
+    scaling[degrees > 0] = 1.0 / degrees[degrees > 0]
+    # NB: a walk at a vertex without neighbors stays there
+    isolated = sp.diags((degrees == 0).astype(np.float64))
+    transition = (sp.diags(scaling) @ adjacency + isolated).T.tocsr()
+
+    vertices = [int(np.argmax(degrees))]
+    while len(vertices) < min(terminal_count, len(degrees)):
+        restart = np.zeros(len(degrees))
+        restart[vertices] = 1.0 / len(vertices)
+        pagerank = restart
+        for _ in range(PAGERANK_ITERATIONS):
+            update = alpha * (transition @ pagerank) + (1 - alpha) * restart
+            converged = np.abs(update - pagerank).sum() < PAGERANK_TOLERANCE
+            pagerank = update
+            if converged:
+                break
+        bias = pagerank * scaling * max(degrees.sum(), 1.0)
+        scores = degrees / np.maximum(bias, 1.0)
+        scores[vertices] = -np.inf
+        vertices.append(int(np.argmax(scores)))
+    return _suggestion(names, degrees, vertices)
+
+
+def _adjacency(graph):
+    """The vertex names and the unweighted sparse adjacency matrix of graph."""
+    compact_graph = CompactGraph.from_networkx(graph)
+    adjacency = sp.csr_matrix(
+        (
+            np.ones(len(compact_graph.neighbors)),
+            compact_graph.neighbors,
+            compact_graph.offsets,
+        ),
+        shape=(compact_graph.vertex_count, compact_graph.vertex_count),
+    )
+    return compact_graph.names, adjacency
+
+
+def _suggestion(names, degrees, vertices):
+    return [names[v] for v in vertices], int(degrees[vertices].sum())
@@ -0,0 +1,35 @@
+"""Guarantees of the approximation algorithms."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+@pytest.mark.parametrize('method', ['isolating_cuts', 'lp_rounding'])
+@pytest.mark.parametrize('index', [1, 2, 3, 4, 6, 7])
+def test_approximation_guarantee(index, method):
+    from ktcut.approximation_algorithm import approximation_algorithm
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, optimal_value, _ = isolation_branching(graph, terminals, reporting=False)
+    source_sets, cut_value, lower_bound = approximation_algorithm(
+        graph, terminals, method=method)
+    terminal_count = len(terminals)
+    assert lower_bound <= optimal_value <= cut_value
+    assert cut_value <= (2 - 2 / terminal_count) * optimal_value + 1e-9
+    sides = {v: t for t, source_set in source_sets.items() for v in source_set}
+    assert set(sides) == set(graph.nodes())
+    assert all(sides[terminal] == terminal for terminal in terminals)
+    assert cut_value == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
+
+
+def test_unknown_approximation_method():
+    from ktcut.approximation_algorithm import approximation_algorithm
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(1)
+    with pytest.raises(ValueError):
+        approximation_algorithm(
+            test_graphs.get_graph(), test_graphs.get_terminals(), method='greedy')
@@ -0,0 +1,40 @@
+"""Branching rules choose different vertices, but find the same cut."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+@pytest.mark.parametrize('rule', ['strong', 'pseudo_cost', 'reliability'])
+@pytest.mark.parametrize('index', [1, 2, 3, 4, 6, 7])
+def test_branching_rule_value(index, rule):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, value, _ = isolation_branching(graph, terminals, reporting=False)
+    _, rule_value, report = isolation_branching(
+        graph, terminals, reporting=False, branching=rule)
+    assert rule_value == value
+    assert 'Choices' in report['Branching']
+
+
+def test_strong_branching_evaluates_candidates():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(7)
+    _, _, report = isolation_branching(
+        test_graphs.get_graph(), test_graphs.get_terminals(), reporting=False,
+        reduce=False, decompose=False, local_search=False, branching='strong')
+    statistics = report['Branching']
+    assert statistics['Choices'] > 0
+    assert statistics['Candidates Evaluated'] >= statistics['Choices']
+
+
+def test_unknown_branching_rule():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(1)
+    with pytest.raises(ValueError):
+        isolation_branching(
+            test_graphs.get_graph(), test_graphs.get_terminals(),
+            reporting=False, branching='random')
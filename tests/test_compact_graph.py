@@ -0,0 +1,45 @@
+"""Compact graph."""
+import networkx as nx
+
+
+def _example_graph():
+    graph = nx.Graph()
+    graph.add_edges_from([(1, 5), (5, 6), (6, 7), (7, 8), (8, 5)], capacity=2)
+    graph.add_edge(1, 6, capacity=3)
+    return graph
+
+
+def test_from_networkx():
+    from ktcut.compact_graph import CompactGraph
+    graph = CompactGraph.from_networkx(_example_graph())
+    assert graph.vertex_count == 5
+    assert graph.neighbors.size == 12
+    assert graph.vertex_ids([1, 8]) == [0, 4]
+    degrees = dict(zip(graph.names, graph.weighted_degrees()))
+    assert degrees == dict(_example_graph().degree(weight='capacity'))
+
+
+def test_contract_vertices():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.contract_vertices import contract_vertices
+    graph = CompactGraph.from_networkx(_example_graph())
+    u, v, w, x = graph.vertex_ids([1, 5, 7, 8])
+    contracted = contract_vertices(graph, u, {v, w, x})
+    assert sorted(contracted.vertex_names(contracted.members(u))) == [1, 5, 7, 8]
+    assert contracted.vertex_names(contracted.active_vertices) == [1, 6]
+    neighbors, capacities = contracted.adjacency(u)
+    assert contracted.vertex_names(neighbors) == [6]
+    assert capacities.tolist() == [7.0]
+    # the original graph is not modified
+    assert graph.active_vertices.size == 5
+
+
+def test_to_networkx():
+    from ktcut.compact_graph import CompactGraph
+    graph = CompactGraph.from_networkx(_example_graph())
+    contracted = graph.contract_vertex(*graph.vertex_ids([6, 7]))
+    nx_graph = contracted.to_networkx()
+    assert len(nx_graph.nodes) == 4
+    assert len(nx_graph.edges) == 5
+    u, v = contracted.vertex_ids([6, 8])
+    assert nx_graph[u][v]['capacity'] == 2.0
@@ -0,0 +1,156 @@
+"""A deadline stops the solve inside its phases, with a valid gap."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+from test_solve_iter import _cut_weight
+
+
+def _countdown(checks):
+    """A Deadline which is cancelled once it has been checked checks times."""
+    from ktcut.deadline import Deadline
+
+    class Countdown(Deadline):
+
+        def __init__(self):
+            super().__init__()
+            self.checks = 0
+
+        @property
+        def cancelled(self):
+            self.checks += 1
+            return self.checks > checks
+
+    return Countdown()
+
+
+def test_cancelled_deadline_stops_phases():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.deadline import Deadline
+    from ktcut.deadline import DeadlineExceeded
+    from ktcut.isolation_branching_root import IsolationBranchingRoot
+    from ktcut.lp_algorithm import lp_algorithm
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    deadline = Deadline()
+    deadline.cancel()
+    assert Deadline(10, parent=deadline).expired
+    compact_graph = CompactGraph.from_networkx(graph)
+    root = IsolationBranchingRoot(
+        compact_graph, compact_graph.vertex_ids(terminals), deadline=deadline)
+    with pytest.raises(DeadlineExceeded):
+        root.initial_isolating_cuts()
+    assert root.get_graph() is compact_graph
+    with pytest.raises(DeadlineExceeded):
+        lp_algorithm(graph, terminals, deadline=deadline)
+
+
+def test_cancelled_solve_returns_partition():
+    from ktcut.deadline import Deadline
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    deadline = Deadline()
+    deadline.cancel()
+    source_sets, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, decompose=False, deadline=deadline)
+    assert report['Status'] == 'cancelled'
+    assert report['Best Lower Bound'] == 0.0
+    assert _cut_weight(graph, source_sets) == cut_value
+
+
+@pytest.mark.parametrize('persistence', [None, 'strong'])
+@pytest.mark.parametrize('checks', [1, 4, 16, 32, 64, 128, 256])
+def test_deadline_keeps_gap_valid(checks, persistence):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(4)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, optimal_cut_value, _ = isolation_branching(graph, terminals, reporting=False)
+    source_sets, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, decompose=False, persistence=persistence,
+        deadline=_countdown(checks))
+    assert report['Status'] in {'cancelled', 'optimal'}
+    assert _cut_weight(graph, source_sets) == cut_value
+    assert report['Best Lower Bound'] <= optimal_cut_value <= cut_value
+    assert cut_value - report['Best Lower Bound'] <= report['Gap'] + 1e-9
+
+
+def test_cancelling_reaches_workers():
+    import random
+    import threading
+    import time
+    import networkx as nx
+    from ktcut.deadline import Deadline
+    from ktcut.isolation_branching import isolation_branching
+    random.seed(3)
+    graph = nx.gnm_random_graph(120, 300, seed=3)
+    for u, v in graph.edges:
+        graph[u][v]['capacity'] = random.randint(1, 3)
+    terminals = list(range(0, 120, 15))
+    deadline = Deadline()
+    timer = threading.Timer(0.2, deadline.cancel)
+    timer.start()
+    start_time = time.time()
+    try:
+        source_sets, cut_value, report = isolation_branching(
+            graph, terminals, reporting=False, decompose=False, local_search=False,
+            workers=2, deadline=deadline)
+    finally:
+        timer.cancel()
+    assert time.time() - start_time < 1.5
+    assert report['Status'] in {'cancelled', 'optimal'}
+    assert _cut_weight(graph, source_sets) == cut_value
+    # NB: 81 is the minimum cut, as found without a deadline
+    assert report['Best Lower Bound'] <= 81.0 <= cut_value
+
+
+@pytest.mark.parametrize('reduce', [False, True])
+@pytest.mark.parametrize('checks', [0, 4, 16, 64])
+def test_deadline_covers_preprocessing(checks, reduce):
+    import networkx as nx
+    from ktcut.isolation_branching import isolation_branching
+    graph = nx.Graph()
+    for i in range(12):
+        graph.add_edges_from(
+            [(2 * i, 2 * i + 1), (2 * i + 1, 2 * i + 2), (2 * i, 2 * i + 2)],
+            capacity=1.0 + i % 3)
+    terminals = [0, 12, 24]
+    _, optimal_cut_value, _ = isolation_branching(graph, terminals, reporting=False)
+    source_sets, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, reduce=reduce, deadline=_countdown(checks))
+    assert report['Status'] in {'cancelled', 'optimal'}
+    assert _cut_weight(graph, source_sets) == cut_value
+    assert report['Best Lower Bound'] <= optimal_cut_value <= cut_value
+
+
+def test_cancelling_reaches_pool_tasks():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.deadline import Deadline
+    from ktcut.deadline import DeadlineExceeded
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+    from ktcut.isolation_branching_pool import ChildNodePool
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph = CompactGraph.from_networkx(test_graphs.get_graph())
+    terminals = graph.vertex_ids(test_graphs.get_terminals())
+    node = IsolationBranchingNode(graph, terminals, None, None, deadline=Deadline())
+    (vertex,) = node.highest_degree_vertices()
+    pool = ChildNodePool(2)
+    try:
+        assert len(pool.expand_children(node, vertex, terminals)) == len(terminals)
+        # the flag reaches the tasks, whose copies of the deadline never expire
+        pool._cancelled.value = 1
+        with pytest.raises(DeadlineExceeded):
+            pool.expand_children(node, vertex, terminals)
+    finally:
+        pool.shutdown()
+    pool = ChildNodePool(2)
+    try:
+        node.deadline.cancel()
+        with pytest.raises(DeadlineExceeded):
+            pool.expand_children(node, vertex, terminals)
+        assert pool._cancelled.value == 1
+    finally:
+        pool.shutdown()
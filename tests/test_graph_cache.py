@@ -0,0 +1,96 @@
+"""The graph cache returns the graph of the current source file."""
+import os
+
+
+def test_cache_hit_is_memory_mapped(tmp_path):
+    import numpy as np
+    from ktcut.read_data import read_dimacs_graph
+    cache_dir = str(tmp_path / 'cache')
+    graph = read_dimacs_graph(
+        'data/dimacs/jazz.graph', compact=True, cache_dir=cache_dir)
+    cached = read_dimacs_graph(
+        'data/dimacs/jazz.graph', compact=True, cache_dir=cache_dir)
+    assert isinstance(cached.neighbors, np.memmap)
+    assert (cached.offsets == graph.offsets).all()
+    assert (cached.neighbors == graph.neighbors).all()
+    assert (cached.capacities == graph.capacities).all()
+    assert cached.names == graph.names
+    networkx_graph = read_dimacs_graph('data/dimacs/jazz.graph', cache_dir=cache_dir)
+    assert len(networkx_graph.edges) == 2742
+
+
+def test_cache_follows_source(tmp_path):
+    from ktcut.read_data import read_konect_graph
+    cache_dir = str(tmp_path / 'cache')
+    source = tmp_path / 'out.graph'
+    source.write_text('% sym unweighted\n1 2\n2 3\n')
+    graph = read_konect_graph(str(source), cache_dir=cache_dir)
+    assert len(graph.edges) == 2
+    source.write_text('% sym unweighted\n1 2\n2 3\n3 4\n')
+    graph = read_konect_graph(str(source), cache_dir=cache_dir)
+    assert len(graph.edges) == 3
+
+
+def test_readers_pass_cache_size(tmp_path):
+    from ktcut.read_data import read_dimacs_graph
+    from ktcut.read_data import read_konect_graph
+    cache_dir = str(tmp_path / 'cache')
+    source = tmp_path / 'out.graph'
+    source.write_text('% sym unweighted\n1 2\n2 3\n')
+    read_konect_graph(str(source), cache_dir=cache_dir, cache_max_bytes=0)
+    read_dimacs_graph('data/dimacs/jazz.graph', cache_dir=cache_dir, cache_max_bytes=0)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from ktcut.graph_cache import GraphCache
+    from ktcut.read_data import read_dimacs_graph
+    cache_dir = str(tmp_path / 'cache')
+    cache = GraphCache(cache_dir, max_bytes=0)
+
+    def reader(filename):
+        return read_dimacs_graph(filename, compact=True)
+
+    cache.read('data/dimacs/jazz.graph', 'dimacs', reader)
+    cache.read('data/dimacs/football.graph', 'dimacs', reader)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_vanished_entry_is_a_miss(tmp_path):
+    from ktcut.read_data import read_dimacs_graph
+    cache_dir = str(tmp_path / 'cache')
+    graph = read_dimacs_graph(
+        'data/dimacs/jazz.graph', compact=True, cache_dir=cache_dir)
+    # as if another process evicted the entry after its metadata was read
+    (entry,) = os.listdir(cache_dir)
+    os.remove(os.path.join(cache_dir, entry, 'neighbors.npy'))
+    cached = read_dimacs_graph(
+        'data/dimacs/jazz.graph', compact=True, cache_dir=cache_dir)
+    assert (cached.neighbors == graph.neighbors).all()
+    assert os.path.exists(os.path.join(cache_dir, entry, 'neighbors.npy'))
+
+
+def test_cache_hit_does_not_hash_source(tmp_path, monkeypatch):
+    from ktcut import graph_cache
+    from ktcut.read_data import read_konect_graph
+    cache_dir = str(tmp_path / 'cache')
+    source = tmp_path / 'out.graph'
+    source.write_text('% sym unweighted\n1 2\n2 3\n')
+    read_konect_graph(str(source), cache_dir=cache_dir)
+    hashed = []
+    content_hash = graph_cache._content_hash
+
+    def counted_content_hash(filename):
+        hashed.append(filename)
+        return content_hash(filename)
+
+    monkeypatch.setattr(graph_cache, '_content_hash', counted_content_hash)
+    assert len(read_konect_graph(str(source), cache_dir=cache_dir).edges) == 2
+    assert hashed == []
+    # a touched file with the same content is hashed, and still hits
+    status = os.stat(str(source))
+    os.utime(str(source), ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+    assert len(read_konect_graph(str(source), cache_dir=cache_dir).edges) == 2
+    assert hashed == [str(source)]
+    assert len(read_konect_graph(str(source), cache_dir=cache_dir).edges) == 2
+    assert hashed == [str(source)]
@@ -0,0 +1,79 @@
+"""Decomposition at connected components and articulation vertices."""
+import random
+
+import networkx as nx
+import pytest
+
+
+def _clusters_graph():
+    """Triangles joined at articulation vertices, with terminals 0, 4 and 7."""
+    graph = nx.Graph()
+    graph.add_edges_from([(0, 1), (1, 2), (2, 0)], capacity=3.0)
+    graph.add_edges_from([(2, 3), (3, 4), (4, 2)], capacity=2.0)
+    graph.add_edges_from([(4, 5), (5, 6), (6, 4)], capacity=1.0)
+    graph.add_edges_from([(1, 7), (7, 8), (8, 1)], capacity=5.0)
+    graph.add_edges_from([(9, 10)], capacity=1.0)
+    return graph, [0, 4, 7]
+
+
+def test_decomposition_subproblems():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.graph_decomposition import GraphDecomposition
+    graph, terminals = _clusters_graph()
+    compact_graph = CompactGraph.from_networkx(graph)
+    decomposition = GraphDecomposition(
+        compact_graph, compact_graph.vertex_ids(terminals))
+    decomposition.decompose()
+    subproblems = decomposition.get_subproblems()
+    assert len(subproblems) == 1
+    subproblem_graph, subproblem_terminals, vertices = subproblems[0]
+    assert len(subproblem_terminals) == 3
+    assert subproblem_graph.vertex_count < compact_graph.vertex_count
+    assert set(compact_graph.vertex_ids([5, 6, 9, 10])).isdisjoint(vertices)
+
+
+def test_decomposition_keeps_cut_value():
+    from ktcut.isolation_branching import isolation_branching
+    graph, terminals = _clusters_graph()
+    source_sets, value, report = isolation_branching(
+        graph, terminals, reporting=False, reduce=False)
+    _, undecomposed_value, _ = isolation_branching(
+        graph, terminals, reporting=False, reduce=False, decompose=False)
+    assert value == undecomposed_value == 9
+    sides = {v: t for t, source_set in source_sets.items() for v in source_set}
+    assert set(sides) == set(graph.nodes())
+    assert value == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
+
+
+def _block_tree_graph(seed):
+    """Random blocks hung off random vertices, so that parts nest."""
+    rng = random.Random(seed)
+    graph = nx.Graph()
+    graph.add_node(0)
+    for _ in range(rng.randint(1, 12)):
+        block = [rng.randrange(len(graph))] + list(
+            range(len(graph), len(graph) + rng.randint(1, 5)))
+        for i, u in enumerate(block):
+            for v in block[i + 1:]:
+                if v == u + 1 or rng.random() < 0.6:
+                    graph.add_edge(u, v, capacity=rng.randint(1, 4))
+    terminals = rng.sample(list(graph.nodes), rng.randint(2, min(5, len(graph))))
+    return graph, terminals
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_decomposition_of_block_trees(seed):
+    from ktcut.isolation_branching import isolation_branching
+    graph, terminals = _block_tree_graph(seed)
+    source_sets, value, _ = isolation_branching(
+        graph, terminals, reporting=False, reduce=False)
+    _, undecomposed_value, _ = isolation_branching(
+        graph, terminals, reporting=False, reduce=False, decompose=False)
+    assert value == undecomposed_value
+    sides = {v: t for t, source_set in source_sets.items() for v in source_set}
+    assert set(sides) == set(graph.nodes())
+    assert value == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
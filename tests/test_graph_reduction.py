@@ -0,0 +1,41 @@
+"""Safe reductions before branching."""
+import networkx as nx
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+def test_reduction_of_chains_and_components():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.graph_reduction import GraphReduction
+    graph = nx.path_graph(6)
+    nx.set_edge_attributes(graph, {(2, 3): 1.0}, 'capacity')
+    graph.add_edges_from([(6, 7), (7, 8), (8, 6)])
+    compact_graph = CompactGraph.from_networkx(graph)
+    reduction = GraphReduction(compact_graph, [0, 5])
+    reduction.reduce()
+    assert reduction.get_graph().vertex_count == 2
+    assert reduction.report['Vertices Dropped'] == 3
+    reduced_terminals = reduction.get_terminals()
+    source_sets = reduction.restore(
+        {terminal: {terminal} for terminal in reduced_terminals})
+    assert source_sets[0] | source_sets[5] == set(range(9))
+    assert source_sets[0].isdisjoint(source_sets[5])
+
+
+@pytest.mark.parametrize('index', [1, 2, 3, 4, 6, 7])
+def test_reduction_keeps_cut_value(index):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    source_sets, reduced_value, _ = isolation_branching(
+        graph, terminals, reporting=False)
+    _, value, _ = isolation_branching(
+        graph, terminals, reporting=False, reduce=False)
+    assert reduced_value == value
+    sides = {v: t for t, source_set in source_sets.items() for v in source_set}
+    assert set(sides) == set(graph.nodes())
+    assert value == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
@@ -0,0 +1,33 @@
+"""The matrix (HiGHS) and PuLP formulations agree."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+@pytest.mark.parametrize('index', [1, 2, 3, 4, 5, 6, 7])
+def test_formulations_agree(index):
+    from ktcut.ip_formulation import IPFormulation
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    highs_lp = IPFormulation(graph, terminals)
+    highs_lp.solve_lp()
+    pulp_lp = IPFormulation(graph, terminals, solver='pulp')
+    pulp_lp.solve_lp()
+    assert highs_lp.get_cut_value() == pulp_lp.get_cut_value()
+    assert highs_lp.get_node_value_array().shape == (
+        graph.number_of_nodes(), len(terminals))
+
+    highs_ip = IPFormulation(graph, terminals)
+    highs_ip.solve_ip()
+    pulp_ip = IPFormulation(graph, terminals, solver='pulp')
+    pulp_ip.solve_ip()
+    assert highs_ip.get_cut_value() == pulp_ip.get_cut_value()
+    sides = {v: t for t, source_set in highs_ip.get_source_sets().items()
+             for v in source_set}
+    assert set(sides) == set(graph.nodes())
+    assert highs_ip.get_cut_value() == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
+    strong = highs_lp.get_possible_terminals_by_node_strong()
+    assert all(strong[terminal] == {terminal} for terminal in terminals)
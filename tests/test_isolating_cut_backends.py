@@ -0,0 +1,176 @@
+"""Parity of the isolating cut backends."""
+import random
+
+import networkx as nx
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+def _random_graph(seed, integer=True):
+    rnd = random.Random(seed)
+    graph = nx.powerlaw_cluster_graph(40 + 5 * seed, 3, 0.2, seed=seed)
+    for u, v in graph.edges():
+        if integer:
+            graph[u][v]['capacity'] = rnd.randint(1, 11)
+        else:
+            graph[u][v]['capacity'] = rnd.uniform(0.5, 3.0)
+    terminals = rnd.sample(list(graph.nodes()), 3 + seed % 3)
+    return graph, terminals
+
+
+def _both_backends(graph, terminals):
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolating_cut_backends import get_backend
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+    for terminal in vertex_terminals:
+        sink_vertices = set(vertex_terminals) - {terminal}
+        yield (
+            get_backend('networkx').minimum_isolating_cut(
+                compact_graph, {terminal}, sink_vertices),
+            get_backend('scipy').minimum_isolating_cut(
+                compact_graph, {terminal}, sink_vertices),
+        )
+
+
+@pytest.mark.parametrize('index', range(1, 8))
+def test_parity_small_graphs(index):
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    for (nx_source, nx_weight), (sp_source, sp_weight) in _both_backends(
+            graph, terminals):
+        assert nx_source == sp_source
+        assert nx_weight == sp_weight
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_parity_random_graphs(seed):
+    graph, terminals = _random_graph(seed)
+    for (nx_source, nx_weight), (sp_source, sp_weight) in _both_backends(
+            graph, terminals):
+        assert nx_source == sp_source
+        assert nx_weight == sp_weight
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_parity_fractional_capacities(seed):
+    graph, terminals = _random_graph(seed, integer=False)
+    for (_, nx_weight), (_, sp_weight) in _both_backends(graph, terminals):
+        assert sp_weight == pytest.approx(nx_weight)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_parity_isolation_branching(seed):
+    from ktcut.isolation_branching import isolation_branching
+    graph, terminals = _random_graph(seed)
+    _, nx_value, _ = isolation_branching(
+        graph, terminals, reporting=False, backend='networkx')
+    _, sp_value, _ = isolation_branching(
+        graph, terminals, reporting=False, backend='scipy')
+    assert nx_value == sp_value
+
+
+def test_auto_backend_needs_integer_capacities():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolating_cut_backends import get_backend
+    integer_graph = CompactGraph.from_networkx(_random_graph(0)[0])
+    fractional_graph = CompactGraph.from_networkx(_random_graph(0, integer=False)[0])
+    assert get_backend('auto', integer_graph).name == 'scipy'
+    assert get_backend('auto', fractional_graph).name == 'networkx'
+
+
+def test_unknown_backend():
+    from ktcut.isolating_cut_backends import get_backend
+    with pytest.raises(ValueError):
+        get_backend('gurobi')
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_warm_start_after_contraction(seed):
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolating_cut_backends import get_backend
+    graph, terminals = _random_graph(seed)
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+    backend = get_backend('scipy')
+    for source in vertex_terminals:
+        sinks = set(vertex_terminals) - {source}
+        cut_source, _, flow = backend.isolating_cut_flow(
+            compact_graph, {source}, sinks)
+        contracted = compact_graph.contract_vertices(
+            source, cut_source - {source})
+        unassigned = set(contracted.active_vertices.tolist()) - set(
+            vertex_terminals)
+        if unassigned:
+            break
+    contracted = contracted.contract_vertex(source, max(unassigned))
+    warm = backend.isolating_cut_flow(
+        contracted, {source}, sinks, initial_flow=flow)
+    cold = backend.isolating_cut_flow(contracted, {source}, sinks)
+    assert warm[0] == cold[0]
+    assert warm[1] == cold[1]
+    assert warm[2].base is flow
+    net_outflow = warm[2].entry_flows(contracted)[
+        contracted.offsets[source]:contracted.offsets[source + 1]].sum()
+    assert net_outflow == warm[1]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_warm_start_isolation_branching(seed):
+    from ktcut.isolation_branching import isolation_branching
+    graph, terminals = _random_graph(seed)
+    _, warm_value, _ = isolation_branching(
+        graph, terminals, reporting=False, backend='scipy', warm_start=True)
+    _, cold_value, _ = isolation_branching(
+        graph, terminals, reporting=False, backend='scipy', warm_start=False)
+    assert warm_value == cold_value
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_root_isolating_cuts_are_minimum(seed):
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_root import IsolationBranchingRoot
+    graph, terminals = _random_graph(seed)
+    graph.add_edge('lonely_1', 'lonely_2', capacity=1.0)
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+    root = IsolationBranchingRoot(compact_graph, vertex_terminals, 'scipy')
+    root.initial_isolating_cuts()
+    root_graph = root.get_graph()
+    for terminal, (_, minimum_weight) in zip(
+            vertex_terminals, _both_backends(graph, terminals)):
+        in_source = root_graph.labels == terminal
+        tails = compact_graph.entry_tails()
+        crossing = in_source[tails] & ~in_source[compact_graph.neighbors]
+        assert compact_graph.capacities[crossing].sum() == minimum_weight[1]
+
+
+def test_warm_start_chain_is_bounded():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolating_cut_backends import MAXIMUM_FLOW_CHAIN
+    from ktcut.isolating_cut_backends import get_backend
+    # capacities increase away from the source, so that its isolating cut
+    # is always its own edge, and the dive adds one vertex at a time
+    graph = nx.path_graph(40)
+    for u, v in graph.edges():
+        graph[u][v]['capacity'] = u + 1
+    compact_graph = CompactGraph.from_networkx(graph)
+    source, sinks = 0, {39}
+    backend = get_backend('scipy')
+    flow, depth = None, 0
+    while len(compact_graph.active_vertices) > 2:
+        cut_source, cut_weight, flow = backend.isolating_cut_flow(
+            compact_graph, {source}, sinks, initial_flow=flow)
+        assert cut_source == {source}
+        assert cut_weight == depth + 1
+        assert flow.length <= MAXIMUM_FLOW_CHAIN
+        chain, chain_nbytes = flow, 0
+        while chain is not None:
+            chain_nbytes += chain.nbytes
+            chain = chain.base
+        assert chain_nbytes <= MAXIMUM_FLOW_CHAIN * 16 * len(compact_graph.neighbors)
+        depth += 1
+        compact_graph = compact_graph.contract_vertex(source, depth)
+    assert depth > MAXIMUM_FLOW_CHAIN
@@ -0,0 +1,83 @@
+"""Node scheduler and search strategies."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+class _Node:
+
+    def __init__(self, lower_bound, upper_bound, depth):
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.depth = depth
+
+
+def _nodes():
+    return [_Node(3, 9, 0), _Node(5, 6, 1), _Node(4, 7, 2), _Node(6, 8, 1)]
+
+
+def test_best_first():
+    from ktcut.isolation_branching_scheduler import NodeScheduler
+    scheduler = NodeScheduler('best_first')
+    nodes = _nodes()
+    for node in nodes:
+        scheduler.push(node)
+        scheduler.update_incumbent(node)
+    assert scheduler.incumbent is nodes[1]
+    assert scheduler.best_upper_bound == 6
+    assert [scheduler.pop().lower_bound for _ in range(4)] == [3, 4, 5, 6]
+    assert not len(scheduler)
+
+
+def test_depth_first_keeps_lower_bound():
+    from ktcut.isolation_branching_scheduler import NodeScheduler
+    scheduler = NodeScheduler('depth_first')
+    for node in _nodes():
+        scheduler.push(node)
+    assert scheduler.pop().depth == 2
+    assert scheduler.best_lower_bound == 3
+    assert scheduler.pop().lower_bound == 5
+    assert scheduler.pop().lower_bound == 6
+    assert scheduler.best_lower_bound == 3
+    scheduler.pop()
+    assert scheduler.best_lower_bound == float('inf')
+
+
+def test_hybrid():
+    from ktcut.isolation_branching_scheduler import NodeScheduler
+    scheduler = NodeScheduler('hybrid', dive_length=1)
+    for node in _nodes():
+        scheduler.push(node)
+    assert [scheduler.pop().lower_bound for _ in range(4)] == [3, 4, 5, 6]
+
+
+def test_prune():
+    from ktcut.isolation_branching_scheduler import NodeScheduler
+    scheduler = NodeScheduler('depth_first')
+    for node in _nodes():
+        scheduler.push(node)
+    assert scheduler.pop().depth == 2
+    assert scheduler.update_incumbent(_Node(5, 5, 3))
+    assert scheduler.prune() == 2
+    assert len(scheduler) == 1
+    assert scheduler.pop().lower_bound == 3
+
+
+def test_unknown_strategy():
+    from ktcut.isolation_branching_scheduler import NodeScheduler
+    with pytest.raises(ValueError):
+        NodeScheduler('breadth_first')
+
+
+@pytest.mark.parametrize('strategy', ['depth_first', 'best_estimate', 'hybrid'])
+@pytest.mark.parametrize('index', [1, 3, 4, 6])
+def test_strategies_are_optimal(strategy, index):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, best_first_value, _ = isolation_branching(
+        graph, terminals, reporting=False)
+    _, cut_value, _ = isolation_branching(
+        graph, terminals, reporting=False, strategy=strategy)
+    assert cut_value == best_first_value
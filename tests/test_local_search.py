@@ -0,0 +1,43 @@
+"""Local search for the incumbent."""
+import random
+
+import networkx as nx
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_local_search_partition(seed):
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+    from ktcut.local_search import local_search_partition
+    rnd = random.Random(seed)
+    graph = nx.gnm_random_graph(60, 150, seed=seed)
+    for u, v in graph.edges():
+        graph[u][v]['capacity'] = rnd.randint(1, 5)
+    compact_graph = CompactGraph.from_networkx(graph)
+    terminals = compact_graph.vertex_ids(rnd.sample(list(graph.nodes()), 4))
+    sides, cut_weight = local_search_partition(compact_graph, terminals)
+    assert (sides[terminals] == terminals).all()
+    assert set(sides.tolist()) <= set(terminals)
+    assert cut_weight == sum(
+        capacity for u, v, capacity in graph.edges(data='capacity')
+        if sides[u] != sides[v])
+    first_node = IsolationBranchingNode(compact_graph, terminals, None, None)
+    assert cut_weight <= first_node.upper_bound
+
+
+@pytest.mark.parametrize('index', [1, 2, 3, 4, 6, 7])
+def test_local_search_keeps_cut_value(index):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(index)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, value, report = isolation_branching(
+        graph, terminals, reporting=False, reduce=False, decompose=False)
+    _, plain_value, plain_report = isolation_branching(
+        graph, terminals, reporting=False, reduce=False, decompose=False,
+        local_search=False)
+    assert value == plain_value
+    assert report['Nodes Explored'] <= plain_report['Nodes Explored']
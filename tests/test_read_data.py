@@ -13,3 +13,51 @@ def test_read_konect():
     graph = read_konect_graph('data/konect/out.arenas-jazz')
     assert len(graph.nodes) == 198
     assert len(graph.edges) == 2742
+
+
+def test_read_compact():
+    from ktcut.read_data import read_dimacs_graph
+    from ktcut.read_data import read_konect_graph
+    graph = read_dimacs_graph('data/dimacs/jazz.graph', compact=True)
+    assert graph.vertex_count == 198
+    assert len(graph.neighbors) == 2 * 2742
+    graph = read_konect_graph('data/konect/out.arenas-jazz', compact=True)
+    assert graph.vertex_count == 198
+    assert len(graph.neighbors) == 2 * 2742
+
+
+def test_read_compressed(tmp_path):
+    import bz2
+    import gzip
+    from ktcut.read_data import read_dimacs_graph
+    from ktcut.read_data import read_konect_graph
+    with open('data/konect/out.arenas-jazz', 'rb') as f:
+        konect = f.read()
+    with gzip.open(str(tmp_path / 'out.jazz.gz'), 'wb') as f:
+        f.write(konect)
+    graph = read_konect_graph(str(tmp_path / 'out.jazz.gz'))
+    assert len(graph.edges) == 2742
+    with open('data/dimacs/jazz.graph', 'rb') as f:
+        dimacs = f.read()
+    with bz2.open(str(tmp_path / 'jazz.graph.bz2'), 'wb') as f:
+        f.write(dimacs)
+    graph = read_dimacs_graph(str(tmp_path / 'jazz.graph.bz2'))
+    assert len(graph.edges) == 2742
+
+
+def test_read_weighted(tmp_path):
+    from ktcut.read_data import read_dimacs_graph
+    from ktcut.read_data import read_konect_graph
+    (tmp_path / 'out.weighted').write_text(
+        '% sym positive\n% 5 3 3\n'
+        '1 2 2.5 100\n2 1 1.5 101\n2 3 4 102\n3 3 1 103\n4\t1  2 104\n')
+    graph = read_konect_graph(str(tmp_path / 'out.weighted'))
+    assert set(graph.nodes) == {1, 2, 3, 4}
+    assert graph[1][2]['capacity'] == 4.0
+    assert graph[2][3]['capacity'] == 4.0
+    assert graph.number_of_edges() == 3
+    (tmp_path / 'weighted.graph').write_text('3 2 1\n2 5\n1 5 3 7\n2 7\n')
+    graph = read_dimacs_graph(str(tmp_path / 'weighted.graph'))
+    assert graph[1][2]['capacity'] == 5.0
+    assert graph[2][3]['capacity'] == 7.0
+    assert graph.number_of_edges() == 2
@@ -21,6 +21,148 @@ def test_combined_vertices():
     assert graph[1][6]['capacity'] == 4
 
 
+def test_node_rebuilds_graph():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph = CompactGraph.from_networkx(test_graphs.get_graph())
+    terminals = graph.vertex_ids(test_graphs.get_terminals())
+    first_node = IsolationBranchingNode(graph, terminals, None, None)
+    first_node.construct_children_nodes(graph.vertex_ids([12])[0], terminals)
+    child = first_node.children[1]
+    child.construct_children_nodes(graph.vertex_ids([34])[0], terminals)
+    grandchild = child.children[2]
+    assert grandchild.contracted_vertices.size > 0
+    grandchild.release_graph()
+    child.release_graph()
+    rebuilt = grandchild.graph
+    expected = graph.contract_vertices(
+        terminals[1], set(child.contracted_vertices.tolist())
+    ).contract_vertices(
+        terminals[2], set(grandchild.contracted_vertices.tolist())
+    )
+    assert (rebuilt.labels == expected.labels).all()
+    assert (rebuilt.capacities == expected.capacities).all()
+
+
+def test_node_vertex_order():
+    import numpy as np
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph = CompactGraph.from_networkx(test_graphs.get_graph())
+    terminals = graph.vertex_ids(test_graphs.get_terminals())
+    node = IsolationBranchingNode(graph, terminals, None, None)
+    while node.unassigned_count > 0:
+        unassigned_vertices = node.unassigned_vertices
+        degrees = node.graph.weighted_degrees()[unassigned_vertices]
+        assert node.unassigned_count == len(unassigned_vertices)
+        assert node.highest_degree_vertices(3) == unassigned_vertices[
+            np.argsort(-degrees, kind='stable')[:3]].tolist()
+        (vertex,) = node.highest_degree_vertices()
+        node.construct_children_nodes(vertex, terminals)
+        node = node.children[0]
+    assert node.highest_degree_vertices() == []
+
+
+def test_node_vertex_order_is_not_copied():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+
+    class CountingList(list):
+        """A list which counts the entries read and refuses slices."""
+
+        reads = 0
+
+        def __getitem__(self, index):
+            assert not isinstance(index, slice), 'the ordering was copied'
+            CountingList.reads += 1
+            return super().__getitem__(index)
+
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph = CompactGraph.from_networkx(test_graphs.get_graph())
+    terminals = graph.vertex_ids(test_graphs.get_terminals())
+    node = IsolationBranchingNode(graph, terminals, None, None)
+    node.highest_degree_vertices()
+    node._vertex_order = CountingList(node._vertex_order)
+    while node.unassigned_count > 0:
+        CountingList.reads = 0
+        (vertex,) = node.highest_degree_vertices()
+        # the first unassigned vertex is reached from the position of the
+        # parent, so a step only reads the vertices assigned since then
+        assert CountingList.reads <= 2 * len(node.contracted_vertices) + 3
+        node.construct_children_nodes(vertex, terminals)
+        node = node.children[0]
+
+
+def test_pool_children_share_flows():
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching_node import IsolationBranchingNode
+    from ktcut.isolation_branching_pool import ChildNodePool
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph = CompactGraph.from_networkx(test_graphs.get_graph())
+    terminals = graph.vertex_ids(test_graphs.get_terminals())
+    node = IsolationBranchingNode(
+        graph, terminals, None, None, backend='scipy', flows={})
+    pool = ChildNodePool(2)
+    try:
+        for _ in range(3):
+            (vertex,) = node.highest_degree_vertices()
+            serial = IsolationBranchingNode(
+                node.graph, terminals, None, None, backend='scipy')
+            serial.flows = dict(node.flows)
+            serial.construct_children_nodes(vertex, terminals)
+            node.construct_children_nodes(vertex, terminals, pool=pool)
+            for child, serial_child in zip(node.children, serial.children):
+                assert (child.contracted_vertices
+                        == serial_child.contracted_vertices).all()
+                assert child.lower_bound == serial_child.lower_bound
+                flow = child.flows[child.new_vertex_terminal]
+                parent_flow = node.flows.get(child.new_vertex_terminal)
+                assert flow.base is None or flow.base is parent_flow
+            node = node.children[0]
+    finally:
+        pool.shutdown()
+
+
+def test_parallel_children():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    for index in [3, 4, 6]:
+        test_graphs.set_test_graph(index)
+        graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+        _, serial_value, serial_report = isolation_branching(
+            graph, terminals, reporting=False)
+        _, parallel_value, parallel_report = isolation_branching(
+            graph, terminals, reporting=False, processes=2)
+        assert parallel_value == serial_value
+        assert parallel_report["Nodes Total"] == serial_report["Nodes Total"]
+
+
+def test_parallel_workers():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    for index in [3, 4, 6]:
+        test_graphs.set_test_graph(index)
+        graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+        _, serial_value, _ = isolation_branching(graph, terminals, reporting=False)
+        source_sets, parallel_value, report = isolation_branching(
+            graph, terminals, reporting=False, workers=3)
+        assert parallel_value == serial_value
+        assert set().union(*source_sets.values()) <= set(graph.nodes())
+        assert len(report["Workers"]) == 3
+        assert report["Nodes Explored"] == sum(
+            worker["Nodes Explored"] for worker in report["Workers"])
+        assert report["Nodes Unexplored"] == 0
+        assert report["Branching"]["Choices"] == report["Nodes Explored"]
+        assert report["Branching"]["Choices"] == sum(
+            worker["Branching"]["Choices"] for worker in report["Workers"])
+
+
 def test_graph_1():
     from ktcut.isolation_branching import isolation_branching
     from ktcut.ip_algorithm import ip_algorithm
@@ -125,6 +267,19 @@ def test_graph_6():
     assert check_persistence(graph, terminals, 'strong')
 
 
+def test_persistence_contracts_fixed_vertices():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(5)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, persistence='strong',
+        reduce=False, decompose=False, local_search=False)
+    assert cut_value == 110
+    assert report['Persistence']['Vertices Fixed'] > 0
+    assert report['Nodes Total'] == 1
+
+
 class SmallGraphs:
 
     def __init__(self):
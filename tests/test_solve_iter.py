@@ -0,0 +1,65 @@
+"""The anytime search yields its progress, and stops at a gap or node limit."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+def _cut_weight(graph, source_sets):
+    side = {vertex: terminal
+            for terminal, source_set in source_sets.items() for vertex in source_set}
+    assert len(side) == len(graph.nodes)
+    return sum(d['capacity']
+               for u, v, d in graph.edges(data=True) if side[u] != side[v])
+
+
+@pytest.mark.parametrize('i', [1, 2, 3, 4, 6, 7])
+def test_solve_iter_bounds(i):
+    from ktcut.compact_graph import CompactGraph
+    from ktcut.isolation_branching import isolation_branching
+    from ktcut.isolation_branching_tree import IsolationBranchingTree
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(i)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    compact_graph = CompactGraph.from_networkx(graph)
+    vertex_terminals = compact_graph.vertex_ids(terminals)
+    tree = IsolationBranchingTree(
+        compact_graph, vertex_terminals,
+        [vertex_terminals] * compact_graph.vertex_count)
+    progress = list(tree.solve_iter(progress_interval=0.0))
+    assert progress[0].event == 'incumbent'
+    assert progress[-1].event == 'done'
+    assert all(a.upper_bound >= b.upper_bound for a, b in zip(progress, progress[1:]))
+    assert all(a.lower_bound <= b.lower_bound for a, b in zip(progress, progress[1:]))
+    assert progress[-1].gap == 0
+    assert tree.report['Status'] == 'optimal'
+    _, cut_value = tree.result()
+    _, expected_cut_value, _ = isolation_branching(graph, terminals, reporting=False)
+    assert cut_value == expected_cut_value == progress[-1].upper_bound
+
+
+@pytest.mark.parametrize('i', [3, 4, 5])
+def test_solve_stops_at_gap(i):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(i)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    source_sets, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, decompose=False, relative_gap=0.25)
+    assert report['Status'] in {'gap', 'optimal'}
+    lower_bound = min(report['Best Unexplored Lower Bound'], report['Best Upper Bound'])
+    assert report['Best Upper Bound'] - lower_bound <= 0.25 * report['Best Upper Bound']
+    assert cut_value <= report['Best Upper Bound']
+    assert _cut_weight(graph, source_sets) == cut_value
+
+
+def test_solve_stops_at_node_limit():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    source_sets, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, decompose=False, local_search=False,
+        node_limit=1)
+    assert report['Status'] == 'node_limit'
+    assert report['Nodes Explored'] == 1
+    assert _cut_weight(graph, source_sets) == cut_value
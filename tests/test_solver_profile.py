@@ -0,0 +1,41 @@
+"""The solver profile times the phases of Isolation Branching."""
+import pytest
+
+from test_small_graphs import SmallGraphs
+
+
+@pytest.mark.parametrize('i', [1, 2, 3, 4, 6, 7])
+def test_profile_counts_phases(i):
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(i)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, cut_value, report = isolation_branching(
+        graph, terminals, reporting=False, profile=True)
+    _, plain_cut_value, plain_report = isolation_branching(
+        graph, terminals, reporting=False)
+    assert cut_value == plain_cut_value
+    assert 'Profile' not in plain_report
+    profile = report['Profile']
+    assert sum(profile['Depth Histogram'].values()) == report['Nodes Total']
+    assert profile['Frontier Bytes'] <= profile['Peak Frontier Bytes']
+    phases = profile['Phases']
+    assert phases['Root Cuts']['Calls'] >= 1
+    if report['Nodes Explored']:
+        assert phases['Node Selection']['Calls'] >= report['Nodes Explored']
+        assert phases['Vertex Selection']['Calls'] == report['Nodes Explored']
+        assert phases['Max Flow']['Calls'] >= report['Nodes Total'] - 1
+    assert all(phase['Time'] >= 0 for phase in phases.values())
+
+
+def test_profile_of_workers():
+    from ktcut.isolation_branching import isolation_branching
+    test_graphs = SmallGraphs()
+    test_graphs.set_test_graph(3)
+    graph, terminals = test_graphs.get_graph(), test_graphs.get_terminals()
+    _, _, report = isolation_branching(
+        graph, terminals, reporting=False, workers=2, decompose=False, profile=True)
+    profile = report['Profile']
+    assert profile['Phases']['Vertex Selection']['Calls'] == report['Nodes Explored']
+    assert sum(profile['Depth Histogram'].values()) == report['Nodes Total']
+    assert all('Profile' in worker for worker in report['Workers'])
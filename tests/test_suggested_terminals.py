@@ -0,0 +1,24 @@
+"""Suggested terminals are distinct vertices of the graph."""
+import pytest
+
+
+@pytest.mark.parametrize('method', ['spectral', 'k_center', 'pagerank', 'degree'])
+def test_suggested_terminals(method):
+    from ktcut import suggested_terminals
+    from ktcut.read_data import read_dimacs_graph
+    graph = read_dimacs_graph('data/dimacs/jazz.graph')
+    suggest = getattr(suggested_terminals, 'suggested_terminals_' + method)
+    terminals, total_degree = suggest(graph, 5)
+    assert len(set(terminals)) == 5
+    assert set(terminals) <= set(graph.nodes)
+    assert total_degree == sum(graph.degree(terminal) for terminal in terminals)
+
+
+@pytest.mark.parametrize('method', ['spectral', 'k_center', 'pagerank'])
+def test_suggested_terminals_spread(method):
+    import networkx as nx
+    from ktcut import suggested_terminals
+    graph = nx.disjoint_union_all([nx.complete_graph(6) for _ in range(3)])
+    suggest = getattr(suggested_terminals, 'suggested_terminals_' + method)
+    terminals, _ = suggest(graph, 3)
+    assert sorted(terminal // 6 for terminal in terminals) == [0, 1, 2]